@@ -1,52 +1,86 @@
-import random
-from patient import Patient
-from doctor import Doctor
-
-class Appointment:
-    """Appointment class to manage patient-doctor appointments"""
-    
-    def __init__(self, patient: Patient, doctor: Doctor, date: str, time: str):
-        self.appointment_id = self._generate_appointment_id()
-        self.patient = patient
-        self.doctor = doctor
-        self.date = date
-        self.time = time
-        self.status = "Scheduled"
-        self.consultation_fee = 3000  # JMD$ 3000
-    
-    def _generate_appointment_id(self) -> str:
-        """Generate unique appointment ID"""
-        return f"A{random.randint(100000, 999999)}"
-    
-    def confirm(self) -> bool:
-        """Confirm the appointment"""
-        try:
-            if self.status == "Scheduled":
-                self.status = "Confirmed"
-                return True
-            return False
-        except Exception as e:
-            print(f"Error confirming appointment: {e}")
-            return False
-    
-    def cancel(self) -> bool:
-        """Cancel the appointment"""
-        try:
-            if self.status in ["Scheduled", "Confirmed"]:
-                self.status = "Cancelled"
-                return True
-            return False
-        except Exception as e:
-            print(f"Error cancelling appointment: {e}")
-            return False
-    
-    def display(self) -> str:
-        """Display appointment details"""
-        appointment_info = f"\n=== APPOINTMENT DETAILS ===\n"
-        appointment_info += f"Appointment ID: {self.appointment_id}\n"
-        appointment_info += f"Patient: {self.patient.name} (ID: {self.patient.patient_id})\n"
-        appointment_info += f"Doctor: {self.doctor.name} (ID: {self.doctor.doctor_id})\n"
-        appointment_info += f"Date: {self.date}\n"
-        appointment_info += f"Time: {self.time}\n"
-        appointment_info += f"Status: {self.status}\n"
+from typing import Optional, Union
+from calendar_model import date_key, format_date, format_time, shared_key, time_key
+from id_allocator import get_allocator
+from patient import Patient
+from doctor import Doctor
+from catalog import DEFAULT_CONSULTATION_CENTS
+
+class Appointment:
+    """Appointment class to manage patient-doctor appointments"""
+
+    __slots__ = ("appointment_id", "patient", "doctor", "date_key", "time_key", "status", "consultation_cents")
+
+    def __init__(self, patient: Patient, doctor: Doctor, date: Union[str, int], time: Union[str, int],
+                 appointment_id: Optional[str] = None, consultation_cents: int = DEFAULT_CONSULTATION_CENTS):
+        self.appointment_id = appointment_id or self._generate_appointment_id()
+        self.patient = patient
+        self.doctor = doctor
+        # Stored as a day number and minutes after midnight; see calendar_model
+        self.date_key = shared_key(date if isinstance(date, int) else date_key(date))
+        self.time_key = shared_key(time if isinstance(time, int) else time_key(time))
+        self.status = "Scheduled"
+        # Priced from the catalog when booked; later price changes do not affect it
+        self.consultation_cents = consultation_cents
+
+    @property
+    def consultation_fee(self) -> float:
+        return self.consultation_cents / 100
+    
+    @property
+    def date(self) -> str:
+        return format_date(self.date_key)
+
+    @property
+    def time(self) -> str:
+        return format_time(self.time_key)
+    
+    def _generate_appointment_id(self) -> str:
+        """Generate unique appointment ID"""
+        return get_allocator().next_id("A")
+    
+    def confirm(self) -> bool:
+        """Confirm the appointment"""
+        try:
+            if self.status == "Scheduled":
+                self.status = "Confirmed"
+                return True
+            return False
+        except Exception as e:
+            print(f"Error confirming appointment: {e}")
+            return False
+    
+    def cancel(self) -> bool:
+        """Cancel the appointment"""
+        try:
+            if self.status in ["Scheduled", "Confirmed"]:
+                self.status = "Cancelled"
+                return True
+            return False
+        except Exception as e:
+            print(f"Error cancelling appointment: {e}")
+            return False
+    
+    def complete(self) -> bool:
+        """Mark an appointment that took place as completed"""
+        if self.status in ("Scheduled", "Confirmed"):
+            self.status = "Completed"
+            return True
+        return False
+
+    def mark_no_show(self) -> bool:
+        """Mark an appointment the patient did not attend"""
+        if self.status in ("Scheduled", "Confirmed"):
+            self.status = "No-Show"
+            return True
+        return False
+
+    def display(self) -> str:
+        """Display appointment details"""
+        appointment_info = f"\n=== APPOINTMENT DETAILS ===\n"
+        appointment_info += f"Appointment ID: {self.appointment_id}\n"
+        appointment_info += f"Patient: {self.patient.name} (ID: {self.patient.patient_id})\n"
+        appointment_info += f"Doctor: {self.doctor.name} (ID: {self.doctor.doctor_id})\n"
+        appointment_info += f"Date: {self.date}\n"
+        appointment_info += f"Time: {self.time}\n"
+        appointment_info += f"Status: {self.status}\n"
         return appointment_info 
\ No newline at end of file
@@ -0,0 +1,199 @@
+import bisect
+import collections
+import datetime
+import gzip
+import json
+import os
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from calendar_model import format_date
+from id_allocator import split_id
+
+# Archived appointment: [appointment_id, patient_id, doctor_id, day, minute, status, bill]
+# where bill is None or [consultation_cents, [[service, cents], ...], issued_at ISO]
+ArchivedRecord = list
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+INDEX_SUFFIX = ".ids.json"
+
+
+def month_of(day: int) -> str:
+    """Partition name 'YYYY-MM' of a day number"""
+    return format_date(day)[:7]
+
+
+def _arrays(ids: Dict[str, List[int]]) -> Dict[str, array]:
+    return {prefix: array("q", numbers) for prefix, numbers in ids.items()}
+
+
+class AppointmentArchive:
+    """Past appointments and their bills in compressed month partitions
+
+    Each archive run writes one gzip segment per month it touches, under
+    <directory>/<YYYY-MM>/, next to a small file listing the segment's IDs.
+    Only those IDs are kept in memory, as sorted integer arrays per
+    segment, so finding the segment of an ID is a binary search; the last
+    few segments read are cached for repeated lookups.
+    """
+
+    def __init__(self, directory: str, cached_segments: int = 4):
+        self.directory = directory
+        self.cached_segments = cached_segments
+        os.makedirs(directory, exist_ok=True)
+        # (segment path, {prefix: sorted ID numbers}), oldest first
+        self._segments: List[Tuple[str, Dict[str, array]]] = []
+        self._cache: "collections.OrderedDict[str, Dict[str, ArchivedRecord]]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        for month in sorted(os.listdir(directory)):
+            month_dir = os.path.join(directory, month)
+            if not os.path.isdir(month_dir):
+                continue
+            for name in sorted(os.listdir(month_dir)):
+                if name.endswith(INDEX_SUFFIX):
+                    with open(os.path.join(month_dir, name), encoding="utf-8") as handle:
+                        ids = json.load(handle)
+                    segment = os.path.join(month_dir, name[:-len(INDEX_SUFFIX)] + SEGMENT_SUFFIX)
+                    self._segments.append((segment, _arrays(ids)))
+
+    def __len__(self) -> int:
+        return sum(len(numbers) for _, index in self._segments for numbers in index.values())
+
+    def highest_ids(self) -> List[str]:
+        """The highest archived appointment ID of each prefix, for the ID allocator to skip past"""
+        highest: Dict[str, int] = {}
+        with self._lock:
+            for _, index in self._segments:
+                for prefix, numbers in index.items():
+                    if numbers and numbers[-1] > highest.get(prefix, -1):
+                        highest[prefix] = numbers[-1]
+        return [f"{prefix}{number}" for prefix, number in highest.items()]
+
+    def partitions(self) -> List[str]:
+        return sorted({os.path.basename(os.path.dirname(segment)) for segment, _ in self._segments})
+
+    def write(self, records: Iterable[ArchivedRecord]) -> int:
+        """Store records in their month partitions; returns how many were written
+
+        Segments are written under temporary names and renamed, index file
+        last, so a crash never leaves an ID pointing at a missing segment.
+        """
+        by_month: Dict[str, List[ArchivedRecord]] = {}
+        for record in records:
+            by_month.setdefault(month_of(record[3]), []).append(record)
+        written = 0
+        with self._lock:
+            for month, month_records in sorted(by_month.items()):
+                month_dir = os.path.join(self.directory, month)
+                os.makedirs(month_dir, exist_ok=True)
+                stem = f"{len([n for n in os.listdir(month_dir) if n.endswith(INDEX_SUFFIX)]):06d}"
+                segment = os.path.join(month_dir, stem + SEGMENT_SUFFIX)
+                with gzip.open(segment + ".tmp", "wt", encoding="utf-8") as handle:
+                    for record in month_records:
+                        handle.write(json.dumps(record, separators=(",", ":")))
+                        handle.write("\n")
+                os.replace(segment + ".tmp", segment)
+                ids: Dict[str, List[int]] = {}
+                for record in month_records:
+                    prefix, number = split_id(record[0])
+                    ids.setdefault(prefix, []).append(number)
+                for numbers in ids.values():
+                    numbers.sort()
+                index_path = os.path.join(month_dir, stem + INDEX_SUFFIX)
+                with open(index_path + ".tmp", "w", encoding="utf-8") as handle:
+                    json.dump(ids, handle, separators=(",", ":"))
+                os.replace(index_path + ".tmp", index_path)
+                self._segments.append((segment, _arrays(ids)))
+                written += len(month_records)
+        return written
+
+    def _segment_of(self, appointment_id: str) -> Optional[str]:
+        try:
+            prefix, number = split_id(appointment_id)
+        except ValueError:
+            return None
+        # Newest first: an appointment archived twice (after a crash) has the same record in both
+        for segment, index in reversed(self._segments):
+            numbers = index.get(prefix)
+            if numbers is not None:
+                position = bisect.bisect_left(numbers, number)
+                if position < len(numbers) and numbers[position] == number:
+                    return segment
+        return None
+
+    def _load(self, segment: str) -> Dict[str, ArchivedRecord]:
+        records = self._cache.get(segment)
+        if records is not None:
+            self._cache.move_to_end(segment)
+            return records
+        with gzip.open(segment, "rt", encoding="utf-8") as handle:
+            records = {record[0]: record for record in map(json.loads, handle)}
+        self._cache[segment] = records
+        while len(self._cache) > self.cached_segments:
+            self._cache.popitem(last=False)
+        return records
+
+    def __contains__(self, appointment_id: str) -> bool:
+        with self._lock:
+            return self._segment_of(appointment_id) is not None
+
+    def get(self, appointment_id: str) -> Optional[ArchivedRecord]:
+        """The archived record of an appointment, or None if it was never archived"""
+        with self._lock:
+            segment = self._segment_of(appointment_id)
+            return None if segment is None else self._load(segment).get(appointment_id)
+
+    def month(self, partition: str) -> List[ArchivedRecord]:
+        """Every record of a 'YYYY-MM' partition, e.g. for month-end reports"""
+        month_dir = os.path.join(self.directory, partition)
+        records: List[ArchivedRecord] = []
+        with self._lock:
+            for segment, _ in self._segments:
+                if os.path.dirname(segment) == month_dir:
+                    records.extend(self._load(segment).values())
+        return records
+
+
+class LifecycleJob:
+    """Background thread closing past appointments and archiving old ones
+
+    Every `interval` seconds: appointments dated before today get a final
+    status (see HospitalSystem.close_past_appointments), and those older
+    than `keep_days` move to the archive with their bills. The hospital
+    must be thread_safe when other threads use it meanwhile; single-threaded
+    front ends can call run_once from their own loop instead.
+    """
+
+    def __init__(self, hospital, archive: AppointmentArchive, keep_days: int = 30, interval: float = 3600.0):
+        self.hospital = hospital
+        self.archive = archive
+        self.keep_days = keep_days
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self, today: Optional[datetime.date] = None) -> Tuple[int, int]:
+        """Close and archive once; returns (appointments closed, appointments archived)"""
+        today = today or datetime.date.today()
+        closed = self.hospital.close_past_appointments(today.isoformat())
+        cutoff = today - datetime.timedelta(days=self.keep_days)
+        archived = self.hospital.archive_appointments(cutoff.isoformat(), self.archive)
+        return closed, archived
+
+    def start(self) -> "LifecycleJob":
+        self._thread = threading.Thread(target=self._run, name="appointment-lifecycle", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while True:
+            self.run_once()
+            if self._stop.wait(self.interval):
+                break
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
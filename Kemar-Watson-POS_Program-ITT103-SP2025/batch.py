@@ -0,0 +1,117 @@
+"""Run scripted operations against a HospitalSystem without prompts
+
+A script has one operation per line, using the names in commands.OPERATIONS:
+
+    # comments and blank lines are ignored
+    p1 = add_patient name="John Smith" age=35 gender=male
+    d1 = add_doctor name="Dr. Sarah Wilson" age=40 gender=female specialty=Cardiology
+    a1 = book_appointment patient_id=$p1 doctor_id=$d1 date=2025-03-03 time=09:00
+    generate_bill appointment_id=$a1
+    add_service appointment_id=$a1 service="X-Ray" fee=1500
+
+`name = ...` binds the operation's result so later lines can refer to it
+as $name. Lines may also be JSON objects as accepted by the network server,
+with an optional "bind" key: {"op": "cancel_appointment", "args": {...}}.
+"""
+import collections
+import json
+import shlex
+import time
+from typing import Dict, Iterable, Optional, TextIO
+
+from commands import execute
+from hospital_system import HospitalSystem
+
+
+class BatchSummary:
+    """Counts of what a script run did"""
+
+    def __init__(self):
+        self.succeeded = 0
+        self.failed = 0
+        self.by_operation: Dict[str, int] = collections.Counter()
+        self.elapsed = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.succeeded + self.failed
+
+    def __str__(self) -> str:
+        rate = self.total / self.elapsed * 60 if self.elapsed else 0
+        lines = [f"Processed {self.total:,} operations in {self.elapsed:.2f} s ({rate:,.0f}/min): "
+                 f"{self.succeeded:,} succeeded, {self.failed:,} failed"]
+        lines.extend(f"  {name}: {count:,}" for name, count in sorted(self.by_operation.items()))
+        return "\n".join(lines)
+
+
+def parse_line(line: str):
+    """Split a script line into (binding, operation, args); None for blank and comment lines"""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        request = json.loads(line)
+        if not isinstance(request, dict) or not isinstance(request.get("op"), str):
+            raise ValueError("A JSON line must be an object with an 'op' string")
+        return request.get("bind"), request["op"], request.get("args") or {}
+    binding = None
+    words = shlex.split(line)
+    if len(words) >= 2 and words[1] == "=":
+        binding, words = words[0], words[2:]
+    if not words:
+        raise ValueError("Missing operation")
+    args = {}
+    for word in words[1:]:
+        key, separator, value = word.partition("=")
+        if not separator:
+            raise ValueError(f"Expected key=value, got {word!r}")
+        args[key] = value
+    return binding, words[0], args
+
+
+def _substitute(args: Dict, variables: Dict) -> Dict:
+    resolved = {}
+    for key, value in args.items():
+        if isinstance(value, str) and value.startswith("$"):
+            if value[1:] not in variables:
+                raise ValueError(f"Unbound variable {value}")
+            value = variables[value[1:]]
+        resolved[key] = value
+    return resolved
+
+
+def run_script(hospital: HospitalSystem, lines: Iterable[str], out: TextIO, quiet: bool = False,
+               stop_on_error: bool = False, errors: Optional[TextIO] = None) -> BatchSummary:
+    """Run every operation in `lines`; failures are always reported, successes unless `quiet`"""
+    errors = errors if errors is not None else out
+    summary = BatchSummary()
+    variables: Dict = {}
+    started = time.perf_counter()
+    for number, line in enumerate(lines, 1):
+        binding, name = None, "?"
+        try:
+            parsed = parse_line(line)
+            if parsed is None:
+                continue
+            binding, name, args = parsed
+            response = execute(hospital, name, _substitute(args, variables))
+        except (ValueError, KeyError, AttributeError) as e:
+            response = {"ok": False, "error": f"Invalid line: {e}"}
+        except Exception as e:
+            # Whatever goes wrong, it fails this line only and the run carries on
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        summary.by_operation[name] += 1
+        if response["ok"]:
+            summary.succeeded += 1
+            if binding is not None:
+                variables[binding] = response["result"]
+            if not quiet:
+                message = response.get("message")
+                out.write(f"{number}: {message if message is not None else json.dumps(response['result'])}\n")
+        else:
+            summary.failed += 1
+            errors.write(f"{number}: {name} failed: {response.get('error') or response.get('message')}\n")
+            if stop_on_error:
+                break
+    summary.elapsed = time.perf_counter() - started
+    return summary
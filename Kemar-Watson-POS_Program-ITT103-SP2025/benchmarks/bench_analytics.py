@@ -0,0 +1,111 @@
+"""Reports over 1M appointments: object loops vs the columnar store (with and without NumPy)
+
+Usage: python benchmarks/bench_analytics.py [appointments] [doctors]
+"""
+import collections
+import contextlib
+import datetime
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appointment import Appointment
+from calendar_model import DEFAULT_TIMES, date_key, time_key
+from columnar import numpy
+from hospital_system import HospitalSystem
+
+SPECIALTIES = ["Cardiology", "Pediatrics", "Neurology", "Oncology", "Dermatology",
+               "Orthopedics", "Radiology", "Psychiatry", "Urology", "General Surgery"]
+START, END = "2025-01-01", "2025-12-31"
+
+
+def build(appointments: int, doctors: int) -> HospitalSystem:
+    rng = random.Random(5)
+    hospital = HospitalSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        patient_ids = [hospital.add_patient(f"Bench Patient{i}", 30, "other") for i in range(50_000)]
+        doctor_ids = [hospital.add_doctor(f"Bench Doctor{i}", 40, "other", SPECIALTIES[i % len(SPECIALTIES)])
+                      for i in range(doctors)]
+    minutes = [time_key(t) for t in DEFAULT_TIMES]
+    first_day = date_key(START)
+    for i in range(appointments):
+        slot, doctor = divmod(i, doctors)
+        day, position = divmod(slot, len(minutes))
+        appointment = Appointment(hospital.patients[patient_ids[i % len(patient_ids)]],
+                                  hospital.doctors[doctor_ids[doctor]], first_day + day % 365, minutes[position])
+        roll = rng.random()
+        if roll < 0.1:
+            appointment.cancel()
+        elif roll < 0.4:
+            appointment.confirm()
+        hospital._register_appointment(appointment)
+    return hospital
+
+
+def loop_reports(hospital: HospitalSystem):
+    """The same reports written as plain loops over Appointment objects"""
+    start, end = date_key(START), date_key(END)
+    statuses = collections.Counter()
+    daily = collections.defaultdict(lambda: [0] * (end - start + 1))
+    revenue = collections.defaultdict(collections.Counter)
+    for appointment in hospital.appointments.values():
+        if not start <= appointment.date_key <= end:
+            continue
+        statuses[appointment.status] += 1
+        if appointment.status == "Cancelled":
+            continue
+        daily[appointment.doctor.specialty][appointment.date_key - start] += 1
+        month = datetime.date.fromordinal(appointment.date_key).strftime("%Y-%m")
+        revenue[appointment.doctor.doctor_id][month] += appointment.consultation_cents
+    return statuses, daily, revenue
+
+
+def columnar_reports(hospital: HospitalSystem):
+    return (hospital.status_rates(START, END), hospital.daily_bookings_by_specialty(START, END),
+            hospital.revenue_by_doctor_month(START, END))
+
+
+def timed(label: str, run, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<36} {best * 1e3:10.1f} ms")
+    return best, result
+
+
+def main() -> None:
+    appointments = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    doctors = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    hospital = build(appointments, doctors)
+    print(f"{appointments:,} appointments, {doctors} doctors, reports: status rates, "
+          f"daily bookings per specialty, revenue per doctor per month")
+
+    loop_time, (statuses, daily, revenue) = timed("python loop over objects", lambda: loop_reports(hospital), 1)
+
+    start = time.perf_counter()
+    hospital.appointment_columns(use_numpy=False)
+    print(f"{'build columnar store':<36} {(time.perf_counter() - start) * 1e3:10.1f} ms")
+    fallback_time, _ = timed("columnar, pure-Python fallback", lambda: columnar_reports(hospital), 1)
+
+    if numpy is None:
+        print("NumPy not installed; skipping the vectorized run")
+        return
+    hospital.appointment_columns(use_numpy=True)
+    numpy_time, (rates, by_specialty, by_doctor) = timed("columnar, NumPy", lambda: columnar_reports(hospital))
+
+    assert by_specialty == dict(daily)
+    assert by_doctor == {doctor_id: dict(months) for doctor_id, months in revenue.items()}
+    total = sum(statuses.values())
+    assert all(abs(rates[status] - count / total) < 1e-12 for status, count in statuses.items())
+    print(f"NumPy speedup: {loop_time / numpy_time:.0f}x over object loops, "
+          f"{fallback_time / numpy_time:.0f}x over the fallback")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Hot-set size and lookup cost before and after archiving past appointments
+
+A year of appointments (a third of them billed) is closed and archived as
+of a date in the last month; reports the records left in memory, traced
+memory, archive time and ID lookup latency for hot, archived (first read of
+a segment) and archived (cached segment) appointments.
+
+Usage: python benchmarks/bench_archive.py [appointments]
+"""
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import AppointmentArchive, LifecycleJob
+from calendar_model import DEFAULT_TIMES, date_key, format_date
+from hospital_system import HospitalSystem
+
+DOCTORS = 200
+FIRST_DAY = date_key("2025-01-01")
+
+
+def lookup_us(hospital: HospitalSystem, ids) -> float:
+    start = time.perf_counter()
+    for appointment_id in ids:
+        hospital.find_appointment(appointment_id)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+def main() -> None:
+    appointments = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    rng = random.Random(9)
+    tracemalloc.start()
+    hospital = HospitalSystem(echo=None)
+    doctor_ids = [hospital.add_doctor(f"Archive Doctor{i}", 45, "other", "General") for i in range(DOCTORS)]
+    patient_ids = [hospital.add_patient(f"Archive Patient{i}", 30, "other") for i in range(appointments // 20)]
+    per_day = DOCTORS * len(DEFAULT_TIMES)
+    days = 365
+    ids = []
+    for i in range(appointments):
+        # Spread the bookings over the whole year
+        day = FIRST_DAY + (i * days) // appointments
+        doctor, slot = divmod(i % per_day, len(DEFAULT_TIMES))
+        appointment_id = hospital.book_appointment(rng.choice(patient_ids), doctor_ids[doctor], format_date(day),
+                                                   DEFAULT_TIMES[slot])
+        if appointment_id is None:
+            continue
+        ids.append(appointment_id)
+        roll = rng.random()
+        if roll < 0.33:
+            hospital.generate_bill(appointment_id)
+        elif roll < 0.4:
+            hospital.cancel_appointment(appointment_id)
+        elif roll < 0.7:
+            hospital.confirm_appointment(appointment_id)
+    before = tracemalloc.get_traced_memory()[0]
+    print(f"{len(hospital.appointments):,} appointments, {len(hospital.bills):,} bills in memory, "
+          f"{before / 2**20:.0f} MiB traced")
+
+    with tempfile.TemporaryDirectory() as directory:
+        job = LifecycleJob(hospital, AppointmentArchive(directory), keep_days=14)
+        start = time.perf_counter()
+        closed, archived = job.run_once(datetime.date.fromordinal(FIRST_DAY + days - 14))
+        elapsed = time.perf_counter() - start
+        after = tracemalloc.get_traced_memory()[0]
+        size = sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(directory) for name in names)
+        print(f"closed {closed:,} and archived {archived:,} in {elapsed:.1f} s "
+              f"({len(job.archive.partitions())} month partitions, {size / 2**20:.1f} MiB on disk)")
+        print(f"{len(hospital.appointments):,} appointments, {len(hospital.bills):,} bills in memory, "
+              f"{after / 2**20:.0f} MiB traced")
+        tracemalloc.stop()
+
+        hot = [a for a in ids if a in hospital.appointments][:1000]
+        cold = [a for a in ids if a not in hospital.appointments]
+        same_month = cold[:1000]
+        scattered = rng.sample(cold, 50)
+        print(f"lookup: hot {lookup_us(hospital, hot):.2f} us, archived (cached segment) "
+              f"{lookup_us(hospital, same_month):.2f} us, archived (segment read) "
+              f"{lookup_us(hospital, scattered) / 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
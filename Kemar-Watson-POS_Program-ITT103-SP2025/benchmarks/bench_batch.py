@@ -0,0 +1,61 @@
+"""Throughput of `main.py --batch` on a generated script of mixed operations
+
+Usage: python benchmarks/bench_batch.py [operations]
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMES = ["09:00", "10:00", "11:00", "14:00", "15:00", "16:00"]
+
+
+def write_script(path: str, operations: int) -> None:
+    rng = random.Random(3)
+    doctors = max(operations // 200, 10)
+    patients = max(operations // 10, 10)
+    with open(path, "w", encoding="utf-8") as script:
+        for i in range(doctors):
+            script.write(f'd{i} = add_doctor name="Batch Doctor{i}" age=45 gender=other specialty=General\n')
+        for i in range(patients):
+            script.write(f'p{i} = add_patient name="Batch Patient{i}" age=30 gender=other\n')
+        booked = 0
+        for _ in range(operations - doctors - patients):
+            roll = rng.random()
+            if booked and roll < 0.15:
+                script.write(f"generate_bill appointment_id=$a{rng.randrange(booked)}\n")
+            elif booked and roll < 0.2:
+                script.write(f"cancel_appointment appointment_id=$a{rng.randrange(booked)}\n")
+            else:
+                # Every slot is unique, so each booking succeeds and can be referred to later
+                day, rest = divmod(booked, doctors * len(TIMES))
+                doctor, slot = divmod(rest, len(TIMES))
+                date = f"2025-{1 + day // 28 % 12:02d}-{1 + day % 28:02d}"
+                script.write(f"a{booked} = book_appointment patient_id=$p{rng.randrange(patients)} "
+                             f"doctor_id=$d{doctor} date={date} time={TIMES[slot]}\n")
+                booked += 1
+
+
+def main() -> None:
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, "ops.txt")
+        write_script(script, operations)
+        for label, extra in (("quiet", ["--quiet"]), ("per-record output", [])):
+            data = os.path.join(directory, label.split()[0])
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, os.path.join(HERE, "main.py"), "--data", data,
+                                     "--batch", script] + extra,
+                                    capture_output=True, text=True)
+            # Cancelling an already cancelled appointment fails by design, so the exit status is not checked
+            elapsed = time.perf_counter() - start
+            summary = next(line for line in result.stdout.splitlines() if line.startswith("Processed"))
+            print(f"{label:<18} {operations / elapsed * 60:12,.0f} operations/min end to end "
+                  f"(exit {result.returncode})\n  {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""End-of-day billing: one generate_bill call per appointment against bill_confirmed
+
+Books and confirms a day's appointments for many doctors, then bills them
+three ways on fresh copies of the same data: generate_bill per appointment
+with messages printed (to a discarded stream), the same without messages,
+and one bill_confirmed call for the date. Also times catalog price lookups.
+
+Usage: python benchmarks/bench_billing.py [doctors] [days]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_model import DEFAULT_TIMES, date_key, format_date
+from hospital_system import HospitalSystem
+
+SPECIALTIES = ["Cardiology", "Pediatrics", "Neurology", "Dermatology", "General Practice"]
+FIRST_DAY = date_key("2025-03-03")
+
+
+def confirmed_day(doctors: int, days: int) -> HospitalSystem:
+    hospital = HospitalSystem(echo=None)
+    for i, specialty in enumerate(SPECIALTIES):
+        hospital.set_consultation_fee(specialty, 3000 + 500 * i, "2025-01-01")
+    hospital.set_service_price("XRAY", "X-Ray", 1500, "2025-01-01")
+    hospital.set_service_price("XRAY", "X-Ray", 1750, "2025-03-01")
+    doctor_ids = [hospital.add_doctor(f"Billing Doctor{i}", 45, "other", SPECIALTIES[i % len(SPECIALTIES)])
+                  for i in range(doctors)]
+    patient_ids = [hospital.add_patient(f"Billing Patient{i}", 30, "other") for i in range(doctors * 4)]
+    for day in range(FIRST_DAY, FIRST_DAY + days):
+        for d, doctor_id in enumerate(doctor_ids):
+            for t, slot in enumerate(DEFAULT_TIMES):
+                appointment_id = hospital.book_appointment(patient_ids[(d * 7 + t) % len(patient_ids)], doctor_id,
+                                                           format_date(day), slot)
+                hospital.confirm_appointment(appointment_id)
+    return hospital
+
+
+def one_by_one(hospital: HospitalSystem, dates) -> int:
+    billed = 0
+    for date in dates:
+        for appointment in list(hospital.appointments_between(date, date)):
+            if hospital.generate_bill(appointment.appointment_id):
+                billed += 1
+    return billed
+
+
+def main() -> None:
+    doctors = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    dates = [format_date(day) for day in range(FIRST_DAY, FIRST_DAY + days)]
+    print(f"{doctors} doctors x {days} days x {len(DEFAULT_TIMES)} slots, all confirmed")
+
+    hospital = confirmed_day(doctors, days)
+    hospital.echo = print
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        billed = one_by_one(hospital, dates)
+    printed = time.perf_counter() - start
+
+    hospital = confirmed_day(doctors, days)
+    start = time.perf_counter()
+    one_by_one(hospital, dates)
+    silent = time.perf_counter() - start
+
+    hospital = confirmed_day(doctors, days)
+    start = time.perf_counter()
+    batched = sum(hospital.bill_confirmed(date) for date in dates)
+    batch = time.perf_counter() - start
+    assert batched == billed and not hospital.verify_ledger()
+
+    print(f"{'generate_bill, printed':>26}: {billed / printed:12,.0f} bills/s")
+    print(f"{'generate_bill, silent':>26}: {billed / silent:12,.0f} bills/s")
+    print(f"{'bill_confirmed per date':>26}: {batched / batch:12,.0f} bills/s")
+
+    lookups = 1_000_000
+    catalog = hospital.catalog
+    start = time.perf_counter()
+    for i in range(lookups):
+        catalog.service("XRAY", FIRST_DAY + (i & 7) - 4)
+    print(f"{'catalog.service lookup':>26}: {(time.perf_counter() - start) / lookups * 1e9:12,.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
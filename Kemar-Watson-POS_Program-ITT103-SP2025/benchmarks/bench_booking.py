@@ -0,0 +1,82 @@
+"""Booking latency with N stored appointments, linear scan vs booking index
+
+Usage: python benchmarks/bench_booking.py [sizes...]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appointment import Appointment
+from calendar_model import date_key, time_key
+from hospital_system import HospitalSystem
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+TIMES = ["09:00", "10:00", "11:00", "14:00", "15:00", "16:00"]
+TIME_KEYS = [time_key(t) for t in TIMES]
+FIRST_DAY = date_key("2025-01-01")
+LOOKUPS = 200
+
+
+def legacy_conflict_check(appointments, doctor_id: str, day: int, minute: int) -> bool:
+    """The pre-index conflict check: scan every stored appointment"""
+    for appointment in appointments.values():
+        if (appointment.doctor.doctor_id == doctor_id and
+            appointment.date_key == day and
+            appointment.time_key == minute and
+            appointment.status != "Cancelled"):
+            return True
+    return False
+
+
+def populate(hospital: HospitalSystem, size: int):
+    """Fill the system with `size` appointments spread over doctors and days"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        patient_id = hospital.add_patient("Bench Patient", 30, "other")
+        doctor_ids = [hospital.add_doctor(f"Bench Doctor{i}", 40, "other", "General") for i in range(20)]
+    patient = hospital.patients[patient_id]
+    doctors = [hospital.doctors[d] for d in doctor_ids]
+    for i in range(size):
+        doctor = doctors[i % len(doctors)]
+        slot = i // len(doctors)
+        day = FIRST_DAY + slot // len(TIMES)
+        minute = TIME_KEYS[slot % len(TIMES)]
+        appointment = Appointment(patient, doctor, day, minute, f"A{i}")
+        hospital.appointments[appointment.appointment_id] = appointment
+        hospital.booking_index.book(doctor.doctor_id, day, minute, appointment.appointment_id)
+    return patient_id, doctor_ids
+
+
+def run(size: int) -> None:
+    hospital = HospitalSystem()
+    patient_id, doctor_ids = populate(hospital, size)
+    doctor_id = doctor_ids[0]
+
+    # Worst case for the scan: the slot is free, so every entry is visited
+    scan_runs = max(1, min(LOOKUPS, 2_000_000 // size))
+    start = time.perf_counter()
+    for i in range(scan_runs):
+        legacy_conflict_check(hospital.appointments, doctor_id, date_key("2099-01-01"), TIME_KEYS[i % len(TIMES)])
+    before = (time.perf_counter() - start) / scan_runs
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(LOOKUPS):
+            hospital.book_appointment(patient_id, doctor_id, f"2099-01-{i // len(TIMES) + 1:02d}", TIMES[i % len(TIMES)])
+    after = (time.perf_counter() - start) / LOOKUPS
+
+    print(f"{size:>10,} appointments | scan check: {before * 1e3:10.3f} ms | "
+          f"indexed booking: {after * 1e6:8.2f} us")
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for size in sizes:
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Bulk import/export throughput in rows per second
+
+Usage: python benchmarks/bench_bulk_io.py [rows]
+"""
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_system import HospitalSystem
+
+DEFAULT_ROWS = 300_000
+GENDERS = ["male", "female", "other"]
+
+
+def write_patients(path: str, rows: int) -> None:
+    """Write a patient file with roughly 1% invalid rows"""
+    records = ({"name": f"Patient Number{i}" if i % 100 else "",
+                "age": 1 + i % 99, "gender": GENDERS[i % 3]} for i in range(rows))
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(handle, fieldnames=["name", "age", "gender"])
+            writer.writeheader()
+            writer.writerows(records)
+        else:
+            handle.writelines(json.dumps(record) + "\n" for record in records)
+
+
+def report(label: str, rows: int, elapsed: float) -> None:
+    print(f"{label:<28} {rows:>10,} rows in {elapsed:6.2f} s = {rows / elapsed:12,.0f} rows/s")
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("csv", "jsonl"):
+            source = os.path.join(tmp, f"patients.{fmt}")
+            write_patients(source, rows)
+
+            hospital = HospitalSystem()
+            start = time.perf_counter()
+            result = hospital.import_patients(source)
+            report(f"import {fmt} ({result.rejected} rejected)", rows, time.perf_counter() - start)
+
+            destination = os.path.join(tmp, f"export.{fmt}")
+            start = time.perf_counter()
+            written = hospital.export_patients(destination)
+            report(f"export {fmt}", written, time.perf_counter() - start)
+
+        # The one-record-at-a-time path the bulk loader replaces
+        hospital = HospitalSystem()
+        source = os.path.join(tmp, "patients.csv")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), open(source, newline="") as handle:
+            for row in csv.DictReader(handle):
+                hospital.add_patient(row["name"], int(row["age"]), row["gender"])
+        report("csv + add_patient loop", rows, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Concurrent booking stress test: N threads booking across M doctors
+
+Usage: python benchmarks/bench_concurrency.py [threads] [doctors] [attempts_per_thread]
+"""
+import collections
+import contextlib
+import io
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_system import HospitalSystem
+
+TIMES = ["09:00", "10:00", "11:00", "14:00", "15:00", "16:00"]
+DATES = [f"2025-03-{day:02d}" for day in range(1, 8)]
+
+
+def double_bookings(hospital: HospitalSystem) -> int:
+    """Count slots held by more than one active appointment"""
+    slots = collections.Counter((a.doctor.doctor_id, a.date_key, a.time_key)
+                                for a in hospital.appointments.values() if a.status != "Cancelled")
+    return sum(count - 1 for count in slots.values() if count > 1)
+
+
+def run(threads: int, doctors: int, attempts: int, **options) -> None:
+    hospital = HospitalSystem(**options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        patient_ids = [hospital.add_patient(f"Stress Patient{i}", 30, "other") for i in range(100)]
+        doctor_ids = [hospital.add_doctor(f"Stress Doctor{i}", 40, "other", "General") for i in range(doctors)]
+
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        barrier.wait()
+        for _ in range(attempts):
+            hospital.book_appointment(rng.choice(patient_ids), rng.choice(doctor_ids),
+                                      rng.choice(DATES), rng.choice(TIMES))
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    # Printing from many threads would dominate the run, so discard it
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    total = threads * attempts
+    label = ", ".join(f"{key}={value}" for key, value in options.items()) or "unsynchronized"
+    print(f"{label:<44} {total / elapsed:10,.0f} attempts/s | booked {len(hospital.appointments):,} "
+          f"| double bookings: {double_bookings(hospital)}")
+
+
+def main() -> None:
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    doctors = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    attempts = int(sys.argv[3]) if len(sys.argv) > 3 else 20_000
+
+    # Switch threads very often to expose check-then-insert races
+    sys.setswitchinterval(1e-6)
+    run(threads, doctors, attempts)
+    run(threads, doctors, attempts, thread_safe=True, lock_granularity="doctor")
+    run(threads, doctors, attempts, thread_safe=True, lock_granularity="slot")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Duplicate-patient lookups at registration time, against a linear scan
+
+Registers patients with varied synthetic names, then looks up altered
+copies of existing patients (a typo, a changed spelling, swapped name
+order, an age off by one) as a registration desk would. Reports the time
+to build the index, lookup latency, how many of the altered copies were
+found, lookups of genuinely new people that matched something, and the
+cost of comparing against every patient instead.
+
+Usage: python benchmarks/bench_duplicates.py [patients] [queries]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from duplicates import DEFAULT_THRESHOLD, similarity
+from hospital_system import HospitalSystem
+
+SYLLABLES = ["ka", "mar", "sha", "ni", "de", "von", "ta", "ri", "lo", "bren", "chel", "sea", "an", "dre", "ke",
+             "ish", "wat", "son", "gor", "don", "camp", "bell", "ro", "bin", "mor", "gan", "fran", "cis", "lee"]
+GENDERS = ["male", "female", "other"]
+
+
+def make_name(rng: random.Random) -> str:
+    def word():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    return f"{word()} {word()}"
+
+
+def alter(rng: random.Random, name: str) -> str:
+    first, last = name.split()
+    change = rng.randrange(4)
+    if change == 0:
+        position = rng.randrange(1, len(last))
+        return f"{first} {last[:position]}{rng.choice('aeiou')}{last[position + 1:]}"
+    if change == 1:
+        position = rng.randrange(1, len(first))
+        return f"{first[:position]}{first[position + 1:]} {last}"
+    if change == 2:
+        return f"{last} {first}"
+    return f"{first} {last}e"
+
+
+def percentile(values, share: float) -> float:
+    return sorted(values)[min(int(len(values) * share), len(values) - 1)]
+
+
+def main() -> None:
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    rng = random.Random(17)
+    hospital = HospitalSystem(echo=None)
+    for _ in range(patients):
+        hospital.add_patient(make_name(rng), rng.randint(1, 95), rng.choice(GENDERS))
+    start = time.perf_counter()
+    hospital.duplicate_index()
+    print(f"{patients:,} patients; index built in {time.perf_counter() - start:.2f} s "
+          f"({len(hospital.duplicates):,} blocks)")
+
+    existing = rng.sample(list(hospital.patients.values()), queries)
+    latencies, found = [], 0
+    for patient in existing:
+        age = patient.age + rng.choice((0, 0, 1, -1))
+        start = time.perf_counter()
+        matches = hospital.find_duplicate_patients(alter(rng, patient.name), age, patient.gender)
+        latencies.append(time.perf_counter() - start)
+        found += any(match == patient.patient_id for match, _ in matches)
+    flagged = 0
+    for _ in range(queries):
+        start = time.perf_counter()
+        flagged += bool(hospital.find_duplicate_patients(make_name(rng), rng.randint(1, 95), rng.choice(GENDERS)))
+        latencies.append(time.perf_counter() - start)
+    print(f"lookup p50 {percentile(latencies, 0.5) * 1e3:.3f} ms, p99 {percentile(latencies, 0.99) * 1e3:.3f} ms; "
+          f"altered copies found {found / queries:.1%}, new people flagged {flagged / queries:.1%}")
+
+    sample = existing[:3]
+    start = time.perf_counter()
+    for patient in sample:
+        for other in hospital.patients.values():
+            similarity(patient.name, patient.age, patient.gender, other.name, other.age, other.gender)
+    print(f"linear scan: {(time.perf_counter() - start) / len(sample) * 1e3:,.0f} ms per lookup")
+
+    subset = list(hospital.patients.values())[:20_000]
+    start = time.perf_counter()
+    pairs = sum(1 for _ in hospital.duplicates.pairs(subset, DEFAULT_THRESHOLD))
+    elapsed = time.perf_counter() - start
+    print(f"bulk pass: {len(subset):,} patients checked in {elapsed:.2f} s "
+          f"({len(subset) / elapsed:,.0f}/s), {pairs:,} likely pairs")
+
+
+if __name__ == "__main__":
+    main()
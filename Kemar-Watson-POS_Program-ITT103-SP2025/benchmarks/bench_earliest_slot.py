@@ -0,0 +1,77 @@
+"""Earliest-slot search by specialty with 5,000 doctors and 1M booked appointments
+
+Usage: python benchmarks/bench_earliest_slot.py [doctors] [appointments] [queries]
+"""
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appointment import Appointment
+from calendar_model import DEFAULT_TIMES, date_key, format_date, time_key
+from hospital_system import HospitalSystem
+
+SPECIALTIES = ["Cardiology", "Pediatrics", "Neurology", "Oncology", "Dermatology",
+               "Orthopedics", "Radiology", "Psychiatry", "Urology", "Gastroenterology",
+               "Endocrinology", "Nephrology", "Pulmonology", "Rheumatology", "Ophthalmology",
+               "Hematology", "Immunology", "Geriatrics", "Obstetrics", "General Surgery"]
+FIRST_DAY = date_key("2025-01-01")
+DAYS = 365
+
+
+def build(doctors: int, appointments: int) -> HospitalSystem:
+    rng = random.Random(7)
+    hospital = HospitalSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        patient_ids = [hospital.add_patient(f"Bench Patient{i}", 30, "other") for i in range(50_000)]
+        doctor_ids = [hospital.add_doctor(f"Bench Doctor{i}", 40, "other", SPECIALTIES[i % len(SPECIALTIES)])
+                      for i in range(doctors)]
+    minutes = [time_key(t) for t in DEFAULT_TIMES]
+    booked = 0
+    while booked < appointments:
+        doctor_id = rng.choice(doctor_ids)
+        day = FIRST_DAY + rng.randrange(DAYS)
+        minute = rng.choice(minutes)
+        if hospital.booking_index.is_booked(doctor_id, day, minute):
+            continue
+        appointment = Appointment(hospital.patients[rng.choice(patient_ids)], hospital.doctors[doctor_id],
+                                  day, minute)
+        hospital._register_appointment(appointment)
+        booked += 1
+    return hospital
+
+
+def main() -> None:
+    doctors = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    appointments = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    queries = int(sys.argv[3]) if len(sys.argv) > 3 else 2_000
+
+    start = time.perf_counter()
+    hospital = build(doctors, appointments)
+    print(f"built {doctors:,} doctors / {appointments:,} appointments in {time.perf_counter() - start:.1f} s")
+
+    rng = random.Random(11)
+    latencies = []
+    for _ in range(queries):
+        specialty = rng.choice(SPECIALTIES)
+        first = FIRST_DAY + rng.randrange(DAYS - 14)
+        start_date, end_date = format_date(first), format_date(first + 14)
+        start = time.perf_counter()
+        slots = hospital.find_earliest_slots(specialty, start_date, end_date, count=5)
+        latencies.append(time.perf_counter() - start)
+        assert len(slots) == 5
+
+    latencies.sort()
+    print(f"find_earliest_slots (5 slots, 14-day window, {doctors // len(SPECIALTIES)} doctors/specialty): "
+          f"mean {statistics.mean(latencies) * 1e3:.3f} ms | "
+          f"p50 {latencies[len(latencies) // 2] * 1e3:.3f} ms | "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Booking cost for a long-term patient as their history grows, and archiving
+
+One patient books many appointments; the time per booking is reported for
+each block of bookings, so a cost growing with history size shows up as a
+rising column. Then the older history is archived and read back.
+
+Usage: python benchmarks/bench_history.py [appointments]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_model import DEFAULT_TIMES
+from history import HistoryStore
+from hospital_system import HospitalSystem
+
+DOCTORS = 50
+
+
+def main() -> None:
+    appointments = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    block = max(appointments // 5, 1)
+    hospital = HospitalSystem(echo=None)
+    patient_id = hospital.add_patient("Long Term Patient", 60, "female")
+    doctor_ids = [hospital.add_doctor(f"History Doctor{i}", 45, "other", "General") for i in range(DOCTORS)]
+
+    print(f"{'history size':>14} {'us/booking':>11}")
+    start = time.perf_counter()
+    for i in range(appointments):
+        day, rest = divmod(i, DOCTORS * len(DEFAULT_TIMES))
+        doctor, slot = divmod(rest, len(DEFAULT_TIMES))
+        hospital.book_appointment(patient_id, doctor_ids[doctor], f"20{25 + day // 336:02d}-{1 + day // 28 % 12:02d}-"
+                                  f"{1 + day % 28:02d}", DEFAULT_TIMES[slot])
+        if (i + 1) % block == 0:
+            print(f"{i + 1 - block:>6,}-{i + 1:<7,} {(time.perf_counter() - start) / block * 1e6:11.2f}")
+            start = time.perf_counter()
+
+    history = hospital.patients[patient_id].history
+    last = hospital.appointments[history.recent(1)[0]].date
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        moved = hospital.archive_patient_history(last, HistoryStore(os.path.join(directory, "history.jsonl")))
+        archive = time.perf_counter() - start
+        start = time.perf_counter()
+        recent = sum(1 for _ in hospital.appointments_for_patient(patient_id, include_archived=False))
+        recent_time = time.perf_counter() - start
+        start = time.perf_counter()
+        full = sum(1 for _ in hospital.appointments_for_patient(patient_id))
+        full_time = time.perf_counter() - start
+    print(f"archived {moved:,} of {history.count:,} entries in {archive * 1e3:.1f} ms")
+    print(f"recent history: {recent:,} appointments in {recent_time * 1e3:.2f} ms; "
+          f"full history (archive read back): {full:,} in {full_time * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
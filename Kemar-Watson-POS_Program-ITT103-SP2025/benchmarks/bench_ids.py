@@ -0,0 +1,72 @@
+"""ID allocation throughput and uniqueness for each allocator
+
+Usage: python benchmarks/bench_ids.py [count] [processes]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from id_allocator import (BlockAllocator, FileBlockStore, SequenceAllocator,
+                          TimeOrderedAllocator)
+
+DEFAULT_COUNT = 2_000_000
+DEFAULT_PROCESSES = 4
+
+
+def measure(name: str, allocate, count: int) -> None:
+    start = time.perf_counter()
+    ids = allocate(count)
+    elapsed = time.perf_counter() - start
+    duplicates = len(ids) - len(set(ids))
+    print(f"{name:<32} {count / elapsed / 1e6:6.2f} M ids/s | duplicates: {duplicates}")
+    if duplicates:
+        raise SystemExit(f"{name} produced duplicate IDs")
+
+
+def _worker(path: str, count: int, queue) -> None:
+    allocator = BlockAllocator(FileBlockStore(path), block_size=10_000)
+    queue.put([allocator.next_id("A") for _ in range(count)])
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PROCESSES
+
+    sequence = SequenceAllocator()
+    measure("sequence next_id", lambda n: [sequence.next_id("A") for _ in range(n)], count)
+    measure("sequence reserve", lambda n: sequence.reserve("A", n), count)
+
+    ordered = TimeOrderedAllocator(node=1)
+    measure("time-ordered next_id", lambda n: [ordered.next_id("A") for _ in range(n)], count)
+    measure("time-ordered reserve", lambda n: ordered.reserve("A", n), count)
+
+    block = BlockAllocator(block_size=10_000)
+    measure("block next_id", lambda n: [block.next_id("A") for _ in range(n)], count)
+    measure("block reserve", lambda n: block.reserve("A", n), count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ids.json")
+        queue = multiprocessing.Queue()
+        per_process = count // processes
+
+        def shared(n):
+            workers = [multiprocessing.Process(target=_worker, args=(path, per_process, queue))
+                       for _ in range(processes)]
+            for worker in workers:
+                worker.start()
+            ids = []
+            for _ in workers:
+                ids.extend(queue.get())
+            for worker in workers:
+                worker.join()
+            return ids
+
+        measure(f"file block store x{processes} procs", shared, per_process * processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Month-end revenue from ledger aggregates vs a scan of every bill
+
+Also replays random bill changes (new bills, added and re-added services)
+and checks after each round that the running aggregates equal a full
+recomputation.
+
+Usage: python benchmarks/bench_ledger.py [bills] [rounds]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appointment import Appointment
+from calendar_model import DEFAULT_TIMES, date_key, time_key
+from hospital_system import HospitalSystem
+from ledger import format_cents
+
+SERVICES = ["X-Ray", "Lab Work", "Medication", "Ultrasound", "Dressing"]
+FIRST_DAY = date_key("2025-01-01")
+
+
+def build(bills: int, doctors: int = 200) -> HospitalSystem:
+    hospital = HospitalSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        patient_ids = [hospital.add_patient(f"Bench Patient{i}", 30, "other") for i in range(20_000)]
+        doctor_ids = [hospital.add_doctor(f"Bench Doctor{i}", 40, "other", "General") for i in range(doctors)]
+    minutes = [time_key(t) for t in DEFAULT_TIMES]
+    for i in range(bills):
+        slot, doctor = divmod(i, doctors)
+        day, position = divmod(slot, len(minutes))
+        hospital._register_appointment(Appointment(hospital.patients[patient_ids[i % len(patient_ids)]],
+                                                   hospital.doctors[doctor_ids[doctor]], FIRST_DAY + day % 365,
+                                                   minutes[position]))
+    return hospital
+
+
+def churn(hospital: HospitalSystem, rng: random.Random, changes: int) -> None:
+    """Random bill generation and service additions through the public API"""
+    appointment_ids = list(hospital.appointments)
+    billed = list(hospital.bills)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(changes):
+            if not billed or rng.random() < 0.3:
+                appointment_id = rng.choice(appointment_ids)
+                hospital.generate_bill(appointment_id)
+                billed.append(appointment_id)
+            else:
+                hospital.add_service_to_bill(rng.choice(billed), rng.choice(SERVICES),
+                                             round(rng.uniform(0.01, 20_000), 2))
+
+
+def scan_month(hospital: HospitalSystem, year: int, month: int) -> float:
+    """Month revenue the old way: walk every bill and add float totals"""
+    total = 0.0
+    for bill in hospital.bills.values():
+        date = bill.appointment.date
+        if date.startswith(f"{year:04d}-{month:02d}"):
+            total += bill.total_amount
+    return total
+
+
+def main() -> None:
+    bills = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    hospital = build(bills)
+    rng = random.Random(13)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        churn(hospital, rng, bills // rounds * 2)
+        problems = hospital.verify_ledger()
+        assert not problems, problems[:5]
+    print(f"{rounds} rounds of random bill changes: aggregates matched a full recomputation every round "
+          f"({len(hospital.bills):,} bills, {time.perf_counter() - start:.1f} s)")
+
+    start = time.perf_counter()
+    scanned = [scan_month(hospital, 2025, month) for month in range(1, 13)]
+    scan_time = (time.perf_counter() - start) / 12
+    start = time.perf_counter()
+    ledger = [hospital.revenue_for_month(2025, month) for month in range(1, 13)]
+    ledger_time = (time.perf_counter() - start) / 12
+
+    exact = sum(bill.total_cents for bill in hospital.bills.values())
+    print(f"month-end revenue, scan of all bills:  {scan_time * 1e3:10.3f} ms per month")
+    print(f"month-end revenue, ledger:             {ledger_time * 1e3:10.3f} ms per month "
+          f"({scan_time / ledger_time:,.0f}x faster)")
+    print(f"year total: ledger JMD$ {format_cents(sum(ledger))} (exact {format_cents(exact)}), "
+          f"float scan JMD$ {sum(scanned):,.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""First-page latency of paginated listing versus printing every appointment
+
+Usage: python benchmarks/bench_listing.py [appointments] [page_size]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appointment import Appointment
+from calendar_model import DEFAULT_TIMES, date_key, time_key
+from hospital_system import HospitalSystem
+from listing import appointment_row
+
+
+def build(appointments: int) -> HospitalSystem:
+    hospital = HospitalSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        patient_ids = [hospital.add_patient(f"Bench Patient{i}", 30, "other") for i in range(50_000)]
+        doctor_ids = [hospital.add_doctor(f"Bench Doctor{i}", 40, "other", "General") for i in range(500)]
+    minutes = [time_key(t) for t in DEFAULT_TIMES]
+    first_day = date_key("2025-01-01")
+    for i in range(appointments):
+        slot, doctor = divmod(i, len(doctor_ids))
+        day, position = divmod(slot, len(minutes))
+        appointment = Appointment(hospital.patients[patient_ids[i % len(patient_ids)]],
+                                  hospital.doctors[doctor_ids[doctor]], first_day + day, minutes[position])
+        if i % 10 == 0:
+            appointment.cancel()
+        hospital._register_appointment(appointment)
+    return hospital
+
+
+def main() -> None:
+    appointments = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    hospital = build(appointments)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        hospital.list_all_appointments()
+    print(f"list_all_appointments ({appointments:,} rows):  {time.perf_counter() - start:8.3f} s")
+
+    start = time.perf_counter()
+    rows, cursor = hospital.page_appointments(page_size=page_size)
+    rendered = len([appointment_row(appointment) for appointment in rows])
+    print(f"first page of {page_size}:                       {(time.perf_counter() - start) * 1e6:8.1f} us")
+
+    pages = 0
+    start = time.perf_counter()
+    while cursor is not None and pages < 1000:
+        rows, cursor = hospital.page_appointments(cursor, page_size)
+        rendered += len([appointment_row(appointment) for appointment in rows])
+        pages += 1
+    print(f"next {pages} pages:                         {(time.perf_counter() - start) / max(pages, 1) * 1e6:8.1f} us/page")
+    print(f"rows rendered:                             {rendered:8,}")
+
+    start = time.perf_counter()
+    rows, cursor = hospital.page_appointments(page_size=page_size, status="Cancelled")
+    print(f"first page, status=Cancelled:              {(time.perf_counter() - start) * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
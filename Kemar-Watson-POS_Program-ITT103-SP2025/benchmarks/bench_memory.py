@@ -0,0 +1,95 @@
+"""Memory per record (tracemalloc) for patients, doctors, appointments and bills
+
+Reports the bytes of the domain objects alone and of a fully registered
+record (including the system's indexes).
+
+Usage: python benchmarks/bench_memory.py [appointments] [patients] [doctors]
+"""
+import contextlib
+import io
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appointment import Appointment
+from bill import Bill
+from calendar_model import DEFAULT_TIMES, date_key, time_key
+from doctor import Doctor
+from hospital_system import HospitalSystem
+from patient import Patient
+
+
+def measure(build) -> int:
+    """Bytes still allocated after `build()` returns, keeping its result alive"""
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    del result
+    return after - before
+
+
+def report(label: str, total: int, count: int) -> None:
+    print(f"{label:<34} {total / count:8.1f} bytes/record ({total / 2**20:8.1f} MiB for {count:,})")
+
+
+def main() -> None:
+    appointments = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    patients = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    doctors = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    bills = appointments // 10
+    minutes = [time_key(t) for t in DEFAULT_TIMES]
+    first_day = date_key("2025-01-01")
+
+    def slot(i: int):
+        position, doctor = divmod(i, doctors)
+        day, minute = divmod(position, len(minutes))
+        return doctor, first_day + day, minutes[minute]
+
+    tracemalloc.start()
+
+    # Domain objects on their own
+    report("Patient object", measure(lambda: [Patient(f"Bench Patient{i}", 30, "other")
+                                              for i in range(patients)]), patients)
+    report("Doctor object", measure(lambda: [Doctor(f"Bench Doctor{i}", 40, "other", "General")
+                                             for i in range(doctors)]), doctors)
+    patient = Patient("Bench Patient", 30, "other")
+    doctor = Doctor("Bench Doctor", 40, "other", "General")
+    report("Appointment object", measure(lambda: [Appointment(patient, doctor, first_day, minutes[0])
+                                                  for _ in range(appointments)]), appointments)
+    appointment = Appointment(patient, doctor, first_day, minutes[0])
+    report("Bill object", measure(lambda: [Bill(appointment) for _ in range(bills)]), bills)
+
+    # Registered records, including every index that references them
+    hospital = HospitalSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        patient_total = measure(lambda: [hospital.add_patient(f"Bench Patient{i}", 30, "other")
+                                         for i in range(patients)])
+        doctor_total = measure(lambda: [hospital.add_doctor(f"Bench Doctor{i}", 40, "other", "General")
+                                        for i in range(doctors)])
+    report("Patient registered", patient_total, patients)
+    report("Doctor registered", doctor_total, doctors)
+    patient_list = list(hospital.patients.values())
+    doctor_list = list(hospital.doctors.values())
+
+    def book() -> None:
+        for i in range(appointments):
+            doctor_index, day, minute = slot(i)
+            hospital._register_appointment(Appointment(patient_list[i % patients], doctor_list[doctor_index],
+                                                       day, minute))
+
+    report("Appointment registered", measure(book), appointments)
+    appointment_list = list(hospital.appointments.values())
+
+    def bill() -> None:
+        for appointment in appointment_list[:bills]:
+            hospital._register_bill(Bill(appointment))
+
+    report("Bill registered", measure(bill), bills)
+    current, peak = tracemalloc.get_traced_memory()
+    print(f"total traced {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
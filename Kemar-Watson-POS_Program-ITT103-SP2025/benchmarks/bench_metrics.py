@@ -0,0 +1,58 @@
+"""Cost per operation of console messages vs metrics off, on and sampled
+
+Each run registers patients and books appointments through the public
+methods; console output goes to os.devnull so only the printing itself is
+measured.
+
+Usage: python benchmarks/bench_metrics.py [operations]
+"""
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_system import HospitalSystem
+from metrics import Metrics
+
+TIMES = ["09:00", "10:00", "11:00", "14:00", "15:00", "16:00"]
+
+
+def run(operations: int, **options) -> float:
+    hospital = HospitalSystem(**options)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        doctor_ids = [hospital.add_doctor(f"Bench Doctor{i}", 40, "other", "General") for i in range(100)]
+        start = time.perf_counter()
+        for i in range(operations):
+            patient_id = hospital.add_patient(f"Bench Patient{i}", 30, "other")
+            day, slot = divmod(i, len(doctor_ids) * len(TIMES))
+            hospital.book_appointment(patient_id, doctor_ids[slot % len(doctor_ids)],
+                                      f"2025-{1 + day // 28 % 12:02d}-{1 + day % 28:02d}",
+                                      TIMES[slot // len(doctor_ids)])
+        return (time.perf_counter() - start) / (operations * 2)
+
+
+def main() -> None:
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    baseline = None
+    for label, options in (("print messages (old behaviour)", {}),
+                           ("echo off, metrics off", {"echo": None}),
+                           ("echo off, metrics on", {"echo": None, "metrics": Metrics()}),
+                           ("echo off, metrics on, 1% events", {"echo": None, "metrics": Metrics(sample_rate=0.01)})):
+        per_op = run(operations, **options)
+        baseline = baseline or per_op
+        print(f"{label:<34} {per_op * 1e6:7.2f} us/op ({per_op / baseline:5.0%} of print)")
+        metrics = options.get("metrics")
+        if metrics is not None:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "metrics.json")
+                metrics.export(path)
+                latency = metrics.snapshot()["latency"]["book_appointment"]
+                print(f"  book_appointment p50 {latency['p50_us']:.0f} us, p99 {latency['p99_us']:.0f} us, "
+                      f"snapshot {os.path.getsize(path)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Receipts per second: concatenating renderer vs cached receipts and batch export
+
+Usage: python benchmarks/bench_receipts.py [bills] [days]
+"""
+import contextlib
+import datetime
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from appointment import Appointment
+from bill import Bill
+from calendar_model import DEFAULT_TIMES, date_key, format_date, time_key
+from hospital_system import HospitalSystem
+
+FIRST_DATE = "2025-03-01"
+
+
+def concatenated_receipt(bill: Bill) -> str:
+    """The receipt as it used to be built: string concatenation and a fresh timestamp"""
+    receipt = "\n" + "="*50 + "\n"
+    receipt += "           UCC HOSPITAL CENTER\n"
+    receipt += "              Medical Services\n"
+    receipt += "="*50 + "\n"
+    receipt += f"Receipt Date: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+    receipt += f"Appointment ID: {bill.appointment.appointment_id}\n"
+    receipt += f"Patient: {bill.appointment.patient.name}\n"
+    receipt += f"Doctor: {bill.appointment.doctor.name}\n"
+    receipt += f"Date: {bill.appointment.date} at {bill.appointment.time}\n"
+    receipt += f"Status: {bill.appointment.status}\n"
+    receipt += "-"*50 + "\n"
+    receipt += "SERVICES:\n"
+    receipt += f"  Consultation Fee: JMD$ {bill.consultation_fee:,.2f}\n"
+    for service, fee in bill.additional_services.items():
+        receipt += f"  {service}: JMD$ {fee:,.2f}\n"
+    receipt += "-"*50 + "\n"
+    receipt += f"TOTAL AMOUNT: JMD$ {bill.total_amount:,.2f}\n"
+    receipt += "="*50 + "\n"
+    receipt += "Thank you for choosing UCC Hospital Center!\n"
+    receipt += "="*50 + "\n"
+    return receipt
+
+
+def build(bills: int, days: int) -> HospitalSystem:
+    hospital = HospitalSystem()
+    with contextlib.redirect_stdout(io.StringIO()):
+        patient_ids = [hospital.add_patient(f"Bench Patient{i}", 30, "other") for i in range(10_000)]
+        doctors = -(-bills // (days * len(DEFAULT_TIMES)))
+        doctor_ids = [hospital.add_doctor(f"Bench Doctor{i}", 40, "other", "General") for i in range(doctors)]
+    minutes = [time_key(t) for t in DEFAULT_TIMES]
+    first_day = date_key(FIRST_DATE)
+    for i in range(bills):
+        slot, doctor = divmod(i, doctors)
+        day, position = divmod(slot, len(minutes))
+        appointment = Appointment(hospital.patients[patient_ids[i % len(patient_ids)]],
+                                  hospital.doctors[doctor_ids[doctor]], first_day + day, minutes[position])
+        hospital._register_appointment(appointment)
+        bill = Bill(appointment)
+        bill.add_service("Lab Work", 2500)
+        hospital._register_bill(bill)
+    return hospital
+
+
+def rate(label: str, count: int, elapsed: float) -> None:
+    print(f"{label:<40} {count / elapsed:12,.0f} receipts/s")
+
+
+def main() -> None:
+    bills = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    hospital = build(bills, days)
+    all_bills = list(hospital.bills.values())
+
+    start = time.perf_counter()
+    for bill in all_bills:
+        concatenated_receipt(bill)
+    rate("concatenation + datetime.now()", bills, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for bill in all_bills:
+        bill.generate_receipt()
+    rate("generate_receipt, first render", bills, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for bill in all_bills:
+        bill.generate_receipt()
+    rate("generate_receipt, cached", bills, time.perf_counter() - start)
+
+    last_date = format_date(date_key(FIRST_DATE) + days - 1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "receipts.txt")
+        start = time.perf_counter()
+        written = hospital.export_receipts(path, FIRST_DATE, last_date)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+    rate(f"export_receipts to file ({size / 2**20:.0f} MiB)", written, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Cost of publishing snapshot replicas, and reports run against them
+
+Books a base load, publishes a full snapshot, then keeps booking and
+cancelling in rounds of different sizes and publishes incrementally after
+each. Reports the time the hospital's locks are held (capture) and the
+total publish time for each, then runs the status and per-doctor reports
+in a separate process attached to the latest snapshot and compares them
+with the same reports on the live system. The process also pages through
+the snapshot's patient and appointment listings, timing the first read
+of the records region separately.
+
+Usage: python benchmarks/bench_replica.py [appointments]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_model import DEFAULT_TIMES, date_key, format_date
+from hospital_system import HospitalSystem
+from replica import Snapshot, SnapshotPublisher
+
+DOCTORS = 500
+FIRST_DAY = date_key("2025-01-06")
+
+
+class Load:
+    """Books consecutive slots, cancelling a few as it goes"""
+
+    def __init__(self, hospital: HospitalSystem):
+        self.hospital = hospital
+        self.rng = random.Random(5)
+        self.doctor_ids = [hospital.add_doctor(f"Replica Doctor{i}", 45, "other", f"Specialty {i % 12}")
+                           for i in range(DOCTORS)]
+        self.patient_ids = [hospital.add_patient(f"Replica Patient{i}", 30, "other") for i in range(5000)]
+        self.booked = []
+        self.slot = 0
+
+    def run(self, count: int) -> None:
+        per_day = DOCTORS * len(DEFAULT_TIMES)
+        for _ in range(count):
+            day, rest = divmod(self.slot, per_day)
+            doctor, time_slot = divmod(rest, len(DEFAULT_TIMES))
+            self.slot += 1
+            appointment_id = self.hospital.book_appointment(
+                self.rng.choice(self.patient_ids), self.doctor_ids[doctor], format_date(FIRST_DAY + day),
+                DEFAULT_TIMES[time_slot])
+            self.booked.append(appointment_id)
+            if self.rng.random() < 0.05:
+                self.hospital.cancel_appointment(self.rng.choice(self.booked))
+
+
+def report(directory: str, repeats: int, queue) -> None:
+    start = time.perf_counter()
+    snapshot = Snapshot.latest(directory)
+    columns = snapshot.columns()
+    attached = time.perf_counter()
+    for _ in range(repeats):
+        columns.status_counts()
+        columns.bookings_by_doctor()
+    finished = time.perf_counter()
+    snapshot.page_patients(page_size=50)
+    parsed = time.perf_counter()
+    for _ in range(repeats):
+        snapshot.page_patients(page_size=50, min_age=30)
+        snapshot.page_appointments(page_size=50, status="Cancelled")
+    paged = time.perf_counter()
+    queue.put((snapshot.version, len(snapshot), attached - start, (finished - attached) / repeats,
+               sum(columns.status_counts().values()), parsed - finished, (paged - parsed) / repeats))
+    del columns
+    snapshot.close()
+
+
+def main() -> None:
+    appointments = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    hospital = HospitalSystem(echo=None)
+    load = Load(hospital)
+    load.run(appointments)
+    hospital.appointment_columns()
+
+    with tempfile.TemporaryDirectory() as directory:
+        publisher = SnapshotPublisher(hospital, directory)
+        print(f"{'publish':>24} {'rows':>10} {'lock held ms':>13} {'total ms':>9}")
+        result = publisher.publish(full=True)
+        print(f"{'full':>24} {result['rows']:>10,} {result['capture_seconds'] * 1e3:13.2f} "
+              f"{result['total_seconds'] * 1e3:9.2f}")
+        for changes in (100, 1_000, 10_000, 50_000):
+            load.run(changes)
+            result = publisher.publish()
+            label = f"incremental +{changes:,}"
+            print(f"{label:>24} {result['rows']:>10,} {result['capture_seconds'] * 1e3:13.2f} "
+                  f"{result['total_seconds'] * 1e3:9.2f}")
+        result = publisher.publish(full=True)
+        print(f"{'full (same rows)':>24} {result['rows']:>10,} {result['capture_seconds'] * 1e3:13.2f} "
+              f"{result['total_seconds'] * 1e3:9.2f}")
+
+        repeats = 20
+        queue = multiprocessing.Queue()
+        worker = multiprocessing.Process(target=report, args=(directory, repeats, queue))
+        worker.start()
+        version, rows, attach, per_report, counted, parse, per_page = queue.get()
+        worker.join()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            with hospital._locks.all():
+                hospital.appointment_columns().status_counts()
+                hospital.appointment_columns().bookings_by_doctor()
+        live = (time.perf_counter() - start) / repeats
+        print(f"reporting process: attached to version {version} ({rows:,} rows, {counted:,} counted) "
+              f"in {attach * 1e3:.2f} ms, reports {per_report * 1e3:.2f} ms; live system {live * 1e3:.2f} ms")
+        start = time.perf_counter()
+        for _ in range(repeats):
+            with hospital._locks.all():
+                hospital.page_patients(page_size=50, min_age=30)
+                hospital.page_appointments(page_size=50, status="Cancelled")
+        live = (time.perf_counter() - start) / repeats
+        print(f"listings: records read in {parse * 1e3:.2f} ms, then a patient and an appointment page "
+              f"{per_page * 1e3:.2f} ms; live system {live * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Bulk scheduling: greedy one-by-one booking against the batch solver
+
+Generates requests for a specialty and a short date window, most of them
+early in the period and many with preferred times, so demand for some
+days exceeds their slots. The greedy baseline books each request in turn
+into its earliest preferred slot (or earliest slot) via find_earliest_slots
+and book_appointment; the solver books the whole batch with schedule_batch.
+Reports requests placed, slot utilisation, share placed at a preferred
+time, and elapsed time.
+
+Usage: python benchmarks/bench_scheduler.py [requests] [doctors] [days]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_model import DEFAULT_TIMES, date_key, format_date, time_key
+from hospital_system import HospitalSystem
+from scheduler import SlotRequest
+
+SPECIALTIES = ["Cardiology", "Pediatrics", "Neurology", "Dermatology", "General Practice"]
+FIRST_DAY = date_key("2025-03-03")
+MORNING, AFTERNOON = (time_key("08:00"), time_key("12:00")), (time_key("12:00"), time_key("18:00"))
+
+
+def setup(doctors: int, patients: int):
+    hospital = HospitalSystem(echo=None)
+    for i in range(doctors):
+        hospital.add_doctor(f"Scheduler Doctor{i}", 45, "other", SPECIALTIES[i % len(SPECIALTIES)])
+    patient_ids = [hospital.add_patient(f"Scheduler Patient{i}", 30, "other") for i in range(patients)]
+    return hospital, patient_ids
+
+
+def make_requests(patient_ids, count: int, days: int, seed: int = 3):
+    rng = random.Random(seed)
+    requests = []
+    for i in range(count):
+        # Skewed towards the first days, as when a clinic opens bookings
+        start = FIRST_DAY + min(int(rng.expovariate(2.0 / days)), days - 1)
+        end = min(start + rng.choice((0, 0, 1, 2, 4)), FIRST_DAY + days - 1)
+        times = rng.choice(((), (MORNING,), (AFTERNOON,)))
+        requests.append(SlotRequest(patient_ids[i % len(patient_ids)], rng.choice(SPECIALTIES), start, end, times,
+                                    rng.choice((0, 0, 0, 1))))
+    return requests
+
+
+def greedy(hospital: HospitalSystem, requests):
+    placed = []
+    for request in requests:
+        slots = hospital.find_earliest_slots(request.specialty, format_date(request.start_day),
+                                             format_date(request.end_day), count=200)
+        chosen = next((slot for slot in slots if request.prefers(time_key(slot[1]))), slots[0] if slots else None)
+        appointment_id = None
+        if chosen is not None:
+            appointment_id = hospital.book_appointment(request.patient_id, chosen[2], chosen[0], chosen[1])
+        placed.append(appointment_id)
+    return placed
+
+
+def summarise(label: str, hospital: HospitalSystem, requests, placed, elapsed: float, capacity: int) -> None:
+    filled = [(request, appointment_id) for request, appointment_id in zip(requests, placed) if appointment_id]
+    preferred = sum(1 for request, appointment_id in filled
+                    if request.prefers(hospital.appointments[appointment_id].time_key))
+    print(f"{label:>8} {len(filled):>8,} {len(filled) / len(requests):8.1%} {len(filled) / capacity:12.1%} "
+          f"{preferred / max(len(filled), 1):10.1%} {elapsed:10.2f}")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    doctors = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    capacity = doctors * days * len(DEFAULT_TIMES)
+    print(f"{count:,} requests, {doctors} doctors x {days} days x {len(DEFAULT_TIMES)} slots "
+          f"({capacity:,} slots)")
+    print(f"{'':>8} {'placed':>8} {'of reqs':>8} {'utilisation':>12} {'preferred':>10} {'seconds':>10}")
+
+    hospital, patient_ids = setup(doctors, count)
+    requests = make_requests(patient_ids, count, days)
+    start = time.perf_counter()
+    placed = greedy(hospital, requests)
+    summarise("greedy", hospital, requests, placed, time.perf_counter() - start, capacity)
+
+    hospital, patient_ids = setup(doctors, count)
+    requests = make_requests(patient_ids, count, days)
+    start = time.perf_counter()
+    placed = hospital.schedule_batch(requests)
+    summarise("solver", hospital, requests, placed, time.perf_counter() - start, capacity)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Load generator for server.py: latency percentiles and throughput
+
+Starts a local in-memory server in a subprocess, registers doctors and
+patients, then opens many concurrent connections that each send a mix of
+lookups, bookings and cancellations one request at a time. A second run
+sends the same mix as batches of requests per line.
+
+Usage: python benchmarks/bench_server.py [connections] [requests_per_connection] [batch_size]
+"""
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMES = ["09:00", "10:00", "11:00", "14:00", "15:00", "16:00"]
+DATES = [f"2025-03-{day:02d}" for day in range(3, 29)]
+DOCTORS = 200
+PATIENTS = 20_000
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, port: int) -> "Client":
+        reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=1 << 22)
+        return cls(reader, writer)
+
+    async def call(self, request):
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        return json.loads(await self.reader.readline())
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def random_request(rng: random.Random, booked: list) -> dict:
+    roll = rng.random()
+    if roll < 0.35:
+        return {"op": "get_patient", "args": {"patient_id": f"P{10000 + rng.randrange(PATIENTS)}"}}
+    if roll < 0.6:
+        return {"op": "next_free_slot", "args": {"doctor_id": f"D{1000 + rng.randrange(DOCTORS)}",
+                                                 "date": rng.choice(DATES)}}
+    if roll < 0.9 or not booked:
+        return {"op": "book_appointment", "args": {"patient_id": f"P{10000 + rng.randrange(PATIENTS)}",
+                                                   "doctor_id": f"D{1000 + rng.randrange(DOCTORS)}",
+                                                   "date": rng.choice(DATES), "time": rng.choice(TIMES)}}
+    return {"op": "cancel_appointment", "args": {"appointment_id": booked.pop(rng.randrange(len(booked)))}}
+
+
+async def setup(port: int) -> None:
+    client = await Client.connect(port)
+    doctors = [{"op": "add_doctor", "args": {"name": f"Load Doctor{i}", "age": 45, "gender": "other",
+                                             "specialty": "General"}} for i in range(DOCTORS)]
+    await client.call(doctors)
+    for start in range(0, PATIENTS, 1000):
+        await client.call([{"op": "add_patient", "args": {"name": f"Load Patient{i}", "age": 30, "gender": "other"}}
+                           for i in range(start, start + 1000)])
+    client.close()
+
+
+async def worker(port: int, seed: int, requests: int, batch: int, latencies: list, start_gate) -> None:
+    rng = random.Random(seed)
+    booked = []
+    client = await Client.connect(port)
+    await start_gate.wait()
+    for _ in range(requests // batch):
+        items = [random_request(rng, booked) for _ in range(batch)]
+        started = time.perf_counter()
+        response = await client.call(items if batch > 1 else items[0])
+        latencies.append(time.perf_counter() - started)
+        for item, answer in zip(items, response if batch > 1 else [response]):
+            if item["op"] == "book_appointment" and answer["ok"]:
+                booked.append(answer["result"])
+    client.close()
+
+
+async def load(port: int, connections: int, requests: int, batch: int) -> None:
+    latencies = []
+    start_gate = asyncio.Event()
+    tasks = [asyncio.create_task(worker(port, seed, requests, batch, latencies, start_gate))
+             for seed in range(connections)]
+    await asyncio.sleep(0.5)
+    started = time.perf_counter()
+    start_gate.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    total = len(latencies) * batch
+    label = f"{connections} connections, " + ("1 request per line" if batch == 1 else f"batches of {batch}")
+    print(f"{label:<38} {total / elapsed:10,.0f} req/s | "
+          f"p50 {latencies[len(latencies) // 2] * 1e3:7.2f} ms | "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:7.2f} ms per line")
+
+
+def main() -> None:
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    batch = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    process = subprocess.Popen([sys.executable, os.path.join(HERE, "server.py"), "--memory", "--port", "0"],
+                               stdout=subprocess.PIPE, text=True)
+    try:
+        line = process.stdout.readline()
+        port = int(line.rsplit(":", 1)[1])
+        asyncio.run(setup(port))
+        asyncio.run(load(port, connections, requests, 1))
+        asyncio.run(load(port, connections, requests, batch))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
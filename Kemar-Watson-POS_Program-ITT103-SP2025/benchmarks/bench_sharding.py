@@ -0,0 +1,101 @@
+"""Throughput of a sharded HospitalSystem as worker processes are added
+
+Books appointments across many doctors, bills them and reads patient
+histories (which fan out to every shard), sending requests to the
+coordinator in batches. A single in-process HospitalSystem running the same
+requests through commands.execute is the baseline. Scaling needs as many
+free CPU cores as workers.
+
+Usage: python benchmarks/bench_sharding.py [bookings] [max_workers]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_model import DEFAULT_TIMES
+from commands import execute
+from hospital_system import HospitalSystem
+from sharding import ShardedHospital
+
+DOCTORS = 400
+PATIENTS = 5000
+BATCH = 2000
+HISTORIES = 2000
+
+
+class InProcess:
+    """The unsharded baseline behind the same execute_many interface"""
+
+    def __init__(self):
+        self.hospital = HospitalSystem(echo=None)
+
+    def execute_many(self, requests):
+        return [execute(self.hospital, name, args) for name, args in requests]
+
+    def close(self):
+        pass
+
+
+def in_batches(system, requests):
+    results = []
+    for start in range(0, len(requests), BATCH):
+        results.extend(system.execute_many(requests[start:start + BATCH]))
+    return results
+
+
+def run(system, bookings: int) -> dict:
+    rng = random.Random(5)
+    doctor_ids = [r["result"] for r in in_batches(system, [
+        ("add_doctor", {"name": f"Shard Doctor{i}", "age": 45, "gender": "other", "specialty": f"Specialty{i % 10}"})
+        for i in range(DOCTORS)])]
+    patient_ids = [r["result"] for r in in_batches(system, [
+        ("add_patient", {"name": f"Shard Patient{i}", "age": 30, "gender": "other"}) for i in range(PATIENTS)])]
+
+    requests = []
+    for i in range(bookings):
+        day, rest = divmod(i, DOCTORS * len(DEFAULT_TIMES))
+        doctor, slot = divmod(rest, len(DEFAULT_TIMES))
+        requests.append(("book_appointment", {"patient_id": rng.choice(patient_ids), "doctor_id": doctor_ids[doctor],
+                                              "date": f"2025-{1 + day // 28 % 12:02d}-{1 + day % 28:02d}",
+                                              "time": DEFAULT_TIMES[slot]}))
+    timings = {}
+    start = time.perf_counter()
+    appointment_ids = [r["result"] for r in in_batches(system, requests) if r["ok"]]
+    timings["book"] = len(requests) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    in_batches(system, [("generate_bill", {"appointment_id": a}) for a in appointment_ids])
+    timings["bill"] = len(appointment_ids) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    in_batches(system, [("appointments_for_patient", {"patient_id": rng.choice(patient_ids)})
+                        for _ in range(HISTORIES)])
+    timings["history"] = HISTORIES / (time.perf_counter() - start)
+    timings["booked"] = len(appointment_ids)
+    return timings
+
+
+def main() -> None:
+    bookings = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    print(f"{os.cpu_count()} CPU cores; {bookings:,} bookings over {DOCTORS} doctors, batches of {BATCH}")
+    print(f"{'system':<16} {'book/s':>10} {'bill/s':>10} {'history/s':>10} {'book speedup':>13}")
+    baseline = None
+    configurations = [("in-process", 0)] + [(f"{n} worker(s)", n) for n in (1, 2, 4, 8, 16) if n <= max_workers]
+    for label, workers in configurations:
+        system = InProcess() if not workers else ShardedHospital(workers)
+        try:
+            timings = run(system, bookings)
+        finally:
+            system.close()
+        if workers == 1:
+            baseline = timings["book"]
+        speedup = f"{timings['book'] / baseline:12.2f}x" if baseline else ""
+        print(f"{label:<16} {timings['book']:10,.0f} {timings['bill']:10,.0f} {timings['history']:10,.0f} {speedup:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Booking throughput with the write-ahead log, and restart time
+
+Usage: python benchmarks/bench_storage.py [appointments]
+"""
+import contextlib
+import datetime
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_system import HospitalSystem
+from storage import WriteAheadLog
+
+DEFAULT_APPOINTMENTS = 1_000_000
+TIMES = ["09:00", "10:00", "11:00", "14:00", "15:00", "16:00"]
+DOCTORS = 50
+PATIENTS = 50_000
+
+
+def fill(hospital: HospitalSystem, count: int) -> float:
+    """Book `count` appointments and return bookings per second"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        patient_ids = [hospital.add_patient(f"Bench Patient{i}", 30, "other") for i in range(PATIENTS)]
+        doctor_ids = [hospital.add_doctor(f"Bench Doctor{i}", 40, "other", "General") for i in range(DOCTORS)]
+        first_day = datetime.date(2025, 1, 1).toordinal()
+        start = time.perf_counter()
+        for i in range(count):
+            slot = i // DOCTORS
+            date = datetime.date.fromordinal(first_day + slot // len(TIMES)).isoformat()
+            hospital.book_appointment(patient_ids[i % len(patient_ids)], doctor_ids[i % DOCTORS],
+                                      date, TIMES[slot % len(TIMES)])
+        elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_APPOINTMENTS
+    sample = min(count, 50_000)
+
+    print(f"in-memory only      : {fill(HospitalSystem(), sample):10,.0f} bookings/s")
+    for sync in ("batch", "commit"):
+        with tempfile.TemporaryDirectory() as tmp:
+            hospital = HospitalSystem(WriteAheadLog(tmp, sync=sync, checkpoint_every=None))
+            rate = fill(hospital, sample if sync == "batch" else min(sample, 5_000))
+            hospital.close()
+            print(f"wal sync={sync:<6}    : {rate:10,.0f} bookings/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        hospital = HospitalSystem(WriteAheadLog(tmp))
+        fill(hospital, count)
+        hospital.close()
+
+        start = time.perf_counter()
+        restarted = HospitalSystem(WriteAheadLog(tmp))
+        elapsed = time.perf_counter() - start
+        print(f"restart             : {len(restarted.appointments):,} appointments in {elapsed:.2f} s")
+        restarted.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Simulated cancellations with and without a waitlist
+
+Doctors are fully booked for a period, patients join the waitlist for a
+doctor or a specialty over a few days, and then a share of the
+appointments is cancelled in random order. Reports slot utilisation after
+the cancellations, how many slots were backfilled, and the latency of
+cancel_appointment (which now includes the backfill).
+
+Usage: python benchmarks/bench_waitlist.py [doctors] [days] [cancel_rate] [waitlisted]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_model import DEFAULT_TIMES, date_key, format_date
+from hospital_system import HospitalSystem
+
+SPECIALTIES = ["Cardiology", "Pediatrics", "Neurology", "Dermatology", "General Practice"]
+FIRST_DAY = date_key("2025-03-03")
+
+
+def simulate(doctors: int, days: int, cancel_rate: float, waitlisted: int) -> dict:
+    rng = random.Random(11)
+    hospital = HospitalSystem(echo=None)
+    doctor_ids = [hospital.add_doctor(f"Sim Doctor{i}", 45, "other", SPECIALTIES[i % len(SPECIALTIES)])
+                  for i in range(doctors)]
+    patient_ids = [hospital.add_patient(f"Sim Patient{i}", 30, "other") for i in range(doctors * 10)]
+    appointment_ids = []
+    for day in range(FIRST_DAY, FIRST_DAY + days):
+        for doctor_id in doctor_ids:
+            for slot in hospital.doctors[doctor_id].calendar.slots_on(day):
+                appointment_ids.append(hospital.book_appointment(rng.choice(patient_ids), doctor_id,
+                                                                 format_date(day), f"{slot // 60:02d}:{slot % 60:02d}"))
+    capacity = len(appointment_ids)
+
+    for _ in range(waitlisted):
+        start = FIRST_DAY + rng.randrange(days)
+        end = min(start + rng.randint(0, 6), FIRST_DAY + days - 1)
+        if rng.random() < 0.5:
+            target = {"doctor_id": rng.choice(doctor_ids)}
+        else:
+            target = {"specialty": rng.choice(SPECIALTIES)}
+        hospital.join_waitlist(rng.choice(patient_ids), format_date(start), format_date(end),
+                               priority=rng.choice((0, 0, 0, 1, 2)), **target)
+
+    cancelled = rng.sample(appointment_ids, int(capacity * cancel_rate))
+    latencies = []
+    for appointment_id in cancelled:
+        start = time.perf_counter()
+        hospital.cancel_appointment(appointment_id)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    booked = sum(1 for a in hospital.appointments.values() if a.status != "Cancelled")
+    return {"capacity": capacity, "cancelled": len(cancelled), "booked": booked,
+            "backfilled": booked - (capacity - len(cancelled)), "waiting": len(hospital.waitlist),
+            "p50_us": latencies[len(latencies) // 2] * 1e6, "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6}
+
+
+def main() -> None:
+    doctors = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    cancel_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.08
+    waitlisted = int(sys.argv[4]) if len(sys.argv) > 4 else doctors * days
+    print(f"{doctors} doctors x {days} days x {len(DEFAULT_TIMES)} slots, {cancel_rate:.0%} cancelled")
+    print(f"{'waitlisted':>10} {'utilisation':>12} {'backfilled':>11} {'still waiting':>14} "
+          f"{'cancel p50 us':>14} {'cancel p99 us':>14}")
+    for count in (0, waitlisted // 4, waitlisted):
+        result = simulate(doctors, days, cancel_rate, count)
+        print(f"{count:>10,} {result['booked'] / result['capacity']:12.1%} {result['backfilled']:>11,} "
+              f"{result['waiting']:>14,} {result['p50_us']:14.2f} {result['p99_us']:14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Synthetic patients, doctors, appointments and bills for benchmarks
+
+Records are registered through the public HospitalSystem methods, so the
+generated system has every index populated exactly as in real use.
+"""
+import os
+import random
+import sys
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_model import DEFAULT_TIMES, date_key, format_date
+from hospital_system import HospitalSystem
+
+FIRST_NAMES = ["John", "Mary", "Robert", "Patricia", "Michael", "Jennifer", "David", "Linda", "Andre", "Keisha",
+               "Marcus", "Tanya", "Devon", "Shanice", "Omar", "Alicia", "Kemar", "Nadine", "Ricardo", "Simone"]
+LAST_NAMES = ["Smith", "Johnson", "Brown", "Williams", "Campbell", "Thompson", "Clarke", "Reid", "Wright",
+              "Robinson", "Watson", "Henry", "Lewis", "Grant", "Francis", "Morgan", "Bailey", "Gordon"]
+SPECIALTIES = ["Cardiology", "Pediatrics", "Neurology", "Oncology", "Dermatology", "Orthopedics",
+               "Radiology", "Psychiatry", "General Practice", "Obstetrics"]
+SERVICES = {"X-Ray": 4500, "Lab Work": 2500, "Ultrasound": 6000, "Medication": 1200, "Dressing": 800}
+GENDERS = ["male", "female", "other"]
+FIRST_DATE = "2025-01-06"
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"patients": 1_000, "doctors": 20, "appointments": 5_000, "bills": 2_000},
+    "medium": {"patients": 10_000, "doctors": 100, "appointments": 50_000, "bills": 20_000},
+    "large": {"patients": 100_000, "doctors": 500, "appointments": 500_000, "bills": 200_000},
+}
+
+
+def person_name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def slots(doctor_ids: List[str], start: int = 0):
+    """Endless (doctor_id, date, time) slots, each distinct, filling days in order"""
+    first_day = date_key(FIRST_DATE)
+    index = start
+    while True:
+        day, rest = divmod(index, len(doctor_ids) * len(DEFAULT_TIMES))
+        doctor, time_slot = divmod(rest, len(DEFAULT_TIMES))
+        yield doctor_ids[doctor], format_date(first_day + day), DEFAULT_TIMES[time_slot]
+        index += 1
+
+
+def populate(hospital: HospitalSystem, patients: int, doctors: int, appointments: int, bills: int,
+             seed: int = 42) -> Dict[str, List[str]]:
+    """Register generated records; returns the IDs created, by kind"""
+    rng = random.Random(seed)
+    echo, hospital.echo = hospital.echo, None
+    try:
+        doctor_ids = [hospital.add_doctor(f"Dr. {person_name(rng)}", rng.randint(30, 65), rng.choice(GENDERS),
+                                          SPECIALTIES[i % len(SPECIALTIES)]) for i in range(doctors)]
+        patient_ids = [hospital.add_patient(person_name(rng), rng.randint(1, 95), rng.choice(GENDERS))
+                       for _ in range(patients)]
+        appointment_ids = []
+        free = slots(doctor_ids)
+        for _ in range(appointments):
+            doctor_id, date, time = next(free)
+            appointment_ids.append(hospital.book_appointment(rng.choice(patient_ids), doctor_id, date, time))
+        billed = rng.sample(appointment_ids, min(bills, len(appointment_ids)))
+        for appointment_id in billed:
+            hospital.generate_bill(appointment_id)
+            service = rng.choice(list(SERVICES))
+            hospital.add_service_to_bill(appointment_id, service, SERVICES[service])
+    finally:
+        hospital.echo = echo
+    return {"patients": patient_ids, "doctors": doctor_ids, "appointments": appointment_ids, "bills": billed}
@@ -0,0 +1,260 @@
+"""Benchmark suite: core HospitalSystem operations at a chosen scale
+
+Populates a system with synthetic data (benchmarks/datagen.py), then times
+each scenario call by call and reports throughput and latency percentiles.
+Results can be saved as JSON and compared with an earlier run; a scenario
+whose time per operation grew by more than the threshold is flagged and
+the exit status is 1.
+
+Usage:
+    python benchmarks/suite.py [--scale small|medium|large] [--output FILE]
+                               [--compare BASELINE] [--threshold 0.15]
+                               [--profile cprofile|tracemalloc] [--profile-dir DIR]
+                               [--only SCENARIO ...]
+"""
+import argparse
+import cProfile
+import datetime
+import io
+import json
+import os
+import platform
+import pstats
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datagen import SCALES, SERVICES, person_name, populate, slots
+from hospital_system import HospitalSystem
+
+Calls = Tuple[Callable, List[tuple]]
+
+# Whole-table scans are slow and few; repeat them so one stall does not decide the result
+LISTING_REPEATS = 5
+
+
+def _discard(message: str) -> None:
+    pass
+
+
+# Each scenario prepares (function, argument tuples) from the populated system;
+# preparation is not timed. They run in this order, which keeps them independent:
+# new bookings, bills for unbilled appointments, and cancellations last.
+
+def scenario_add_patient(hospital: HospitalSystem, ids: Dict, rng: random.Random, count: int) -> Calls:
+    return hospital.add_patient, [(person_name(rng), rng.randint(1, 95), "other") for _ in range(count)]
+
+
+def scenario_book_appointment(hospital: HospitalSystem, ids: Dict, rng: random.Random, count: int) -> Calls:
+    free = slots(ids["doctors"], start=len(ids["appointments"]))
+    calls = []
+    for _ in range(count):
+        doctor_id, date, time_ = next(free)
+        calls.append((rng.choice(ids["patients"]), doctor_id, date, time_))
+    ids["new_appointments"] = []
+    book = hospital.book_appointment
+
+    def book_and_remember(*args):
+        ids["new_appointments"].append(book(*args))
+    return book_and_remember, calls
+
+
+def scenario_generate_bill(hospital: HospitalSystem, ids: Dict, rng: random.Random, count: int) -> Calls:
+    unbilled = [a for a in ids["new_appointments"] if a is not None][:count]
+    ids["new_bills"] = unbilled
+    return hospital.generate_bill, [(appointment_id,) for appointment_id in unbilled]
+
+
+def scenario_add_service_to_bill(hospital: HospitalSystem, ids: Dict, rng: random.Random, count: int) -> Calls:
+    services = list(SERVICES)
+    return hospital.add_service_to_bill, [(appointment_id, service, SERVICES[service])
+                                          for appointment_id in ids["new_bills"][:count]
+                                          for service in [rng.choice(services)]]
+
+
+def scenario_list_all_patients(hospital: HospitalSystem, ids: Dict, rng: random.Random, count: int) -> Calls:
+    return hospital.list_all_patients, [()] * LISTING_REPEATS
+
+
+def scenario_list_all_appointments(hospital: HospitalSystem, ids: Dict, rng: random.Random, count: int) -> Calls:
+    return hospital.list_all_appointments, [()] * LISTING_REPEATS
+
+
+def scenario_page_appointments(hospital: HospitalSystem, ids: Dict, rng: random.Random, count: int) -> Calls:
+    cursors = [None]
+    for _ in range(count - 1):
+        _, cursor = hospital.page_appointments(cursors[-1], 50)
+        if cursor is None:
+            break
+        cursors.append(cursor)
+    return hospital.page_appointments, [(cursor, 50) for cursor in cursors]
+
+
+def scenario_appointments_by_status(hospital: HospitalSystem, ids: Dict, rng: random.Random, count: int) -> Calls:
+    return (lambda status: sum(1 for _ in hospital.appointments_by_status(status))), \
+        [("Scheduled",)] * LISTING_REPEATS
+
+
+def scenario_cancel_appointment(hospital: HospitalSystem, ids: Dict, rng: random.Random, count: int) -> Calls:
+    candidates = [a for a in ids["appointments"] if a is not None]
+    return hospital.cancel_appointment, [(a,) for a in rng.sample(candidates, min(count, len(candidates)))]
+
+
+SCENARIOS = {
+    "add_patient": scenario_add_patient,
+    "book_appointment": scenario_book_appointment,
+    "generate_bill": scenario_generate_bill,
+    "add_service_to_bill": scenario_add_service_to_bill,
+    "list_all_patients": scenario_list_all_patients,
+    "list_all_appointments": scenario_list_all_appointments,
+    "page_appointments": scenario_page_appointments,
+    "appointments_by_status": scenario_appointments_by_status,
+    "cancel_appointment": scenario_cancel_appointment,
+}
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def measure(function: Callable, calls: List[tuple]) -> Dict:
+    latencies = []
+    clock = time.perf_counter
+    started = clock()
+    for args in calls:
+        start = clock()
+        function(*args)
+        latencies.append(clock() - start)
+    elapsed = clock() - started
+    latencies.sort()
+    return {"operations": len(calls), "seconds": elapsed,
+            "ops_per_s": len(calls) / elapsed if elapsed else 0.0,
+            "us_per_op": elapsed / len(calls) * 1e6,
+            "p50_us": percentile(latencies, 0.5) * 1e6, "p99_us": percentile(latencies, 0.99) * 1e6}
+
+
+def run_scenario(name: str, function: Callable, calls: List[tuple], profile: Optional[str],
+                 profile_dir: Optional[str]) -> Dict:
+    if not calls:
+        return {"operations": 0, "skipped": True}
+    if profile == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        result = measure(function, calls)
+        profiler.disable()
+        path = os.path.join(profile_dir, f"{name}.prof")
+        profiler.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(15)
+        with open(os.path.join(profile_dir, f"{name}.txt"), "w", encoding="utf-8") as handle:
+            handle.write(report.getvalue())
+        result["profile"] = path
+    elif profile == "tracemalloc":
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        result = measure(function, calls)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        path = os.path.join(profile_dir, f"{name}.tracemalloc.txt")
+        with open(path, "w", encoding="utf-8") as handle:
+            for stat in after.compare_to(before, "lineno")[:25]:
+                handle.write(f"{stat}\n")
+        result.update({"allocated_bytes": current, "peak_bytes": peak, "profile": path})
+    else:
+        result = measure(function, calls)
+    return result
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Scenarios more than `threshold` slower per operation than in `baseline`"""
+    regressions = []
+    if baseline.get("meta", {}).get("profile") != results["meta"]["profile"]:
+        print("warning: only one of the runs was profiled; its timings include the profiler's overhead")
+    print(f"\n{'scenario':<26} {'baseline us':>12} {'now us':>12} {'change':>8}")
+    for name, result in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old or not old.get("operations") or not result.get("operations"):
+            continue
+        change = result["us_per_op"] / old["us_per_op"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<26} {old['us_per_op']:12.2f} {result['us_per_op']:12.2f} {change:+8.1%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time the core HospitalSystem operations")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--operations", type=int, help="operations per scenario (default: scale dependent)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="flag scenarios this much slower than the baseline (default 0.15 = 15%%)")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"])
+    parser.add_argument("--profile-dir", default="profiles")
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="run just these scenarios")
+    options = parser.parse_args(argv)
+
+    scale = SCALES[options.scale]
+    count = options.operations or max(scale["appointments"] // 10, 1000)
+    if options.profile:
+        os.makedirs(options.profile_dir, exist_ok=True)
+
+    hospital = HospitalSystem(echo=None)
+    start = time.perf_counter()
+    ids = populate(hospital, seed=options.seed, **scale)
+    print(f"populated {options.scale} scale ({', '.join(f'{v:,} {k}' for k, v in scale.items())}) "
+          f"in {time.perf_counter() - start:.1f} s")
+    # Listing methods format every row; send the text nowhere so formatting is what gets timed
+    hospital.echo = _discard
+
+    rng = random.Random(options.seed)
+    results = {"meta": {"scale": options.scale, "operations": count, "seed": options.seed,
+                        "profile": options.profile, "revision": git_revision(),
+                        "python": platform.python_version(), "platform": platform.platform(),
+                        "time": datetime.datetime.now().isoformat(timespec="seconds")},
+               "scenarios": {}}
+    print(f"{'scenario':<26} {'ops':>8} {'ops/s':>12} {'us/op':>10} {'p50 us':>10} {'p99 us':>10}")
+    for name, prepare in SCENARIOS.items():
+        function, calls = prepare(hospital, ids, rng, count)
+        if options.only and name not in options.only:
+            continue
+        result = run_scenario(name, function, calls, options.profile, options.profile_dir)
+        results["scenarios"][name] = result
+        if result.get("skipped"):
+            print(f"{name:<26} skipped (nothing to do)")
+            continue
+        print(f"{name:<26} {result['operations']:8,} {result['ops_per_s']:12,.0f} {result['us_per_op']:10.2f} "
+              f"{result['p50_us']:10.2f} {result['p99_us']:10.2f}")
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"results written to {options.output}")
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), options.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,49 +1,86 @@
-import datetime
-
-from appointment import Appointment
-
-class Bill:
-    """Bill class to handle billing and receipts"""
-    def __init__(self, appointment: Appointment):
-        self.appointment = appointment
-        self.consultation_fee = appointment.consultation_fee if appointment.status != "Cancelled" else 0
-        self.additional_services = {}
-        self.total_amount = self.consultation_fee
-    
-    def add_service(self, service_name: str, fee: float) -> bool:
-        """Add additional service to the bill"""
-        try:
-            if fee > 0:
-                self.additional_services[service_name] = fee
-                self.total_amount += fee
-                return True
-            return False
-        except Exception as e:
-            print(f"Error adding service: {e}")
-            return False
-    
-    def generate_receipt(self) -> str:
-        """Generate formatted receipt"""
-        receipt = "\n" + "="*50 + "\n"
-        receipt += "           UCC HOSPITAL CENTER\n"
-        receipt += "              Medical Services\n"
-        receipt += "="*50 + "\n"
-        receipt += f"Receipt Date: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        receipt += f"Appointment ID: {self.appointment.appointment_id}\n"
-        receipt += f"Patient: {self.appointment.patient.name}\n"
-        receipt += f"Doctor: {self.appointment.doctor.name}\n"
-        receipt += f"Date: {self.appointment.date} at {self.appointment.time}\n"
-        receipt += f"Status: {self.appointment.status}\n"
-        receipt += "-"*50 + "\n"
-        receipt += "SERVICES:\n"
-        receipt += f"  Consultation Fee: JMD$ {self.consultation_fee:,.2f}\n"
-        
-        for service, fee in self.additional_services.items():
-            receipt += f"  {service}: JMD$ {fee:,.2f}\n"
-        
-        receipt += "-"*50 + "\n"
-        receipt += f"TOTAL AMOUNT: JMD$ {self.total_amount:,.2f}\n"
-        receipt += "="*50 + "\n"
-        receipt += "Thank you for choosing UCC Hospital Center!\n"
-        receipt += "="*50 + "\n"
-        return receipt 
\ No newline at end of file
+import datetime
+from typing import Dict, Optional, Tuple
+
+from appointment import Appointment
+from ledger import format_cents, to_cents
+
+class Bill:
+    """Bill class to handle billing and receipts"""
+
+    __slots__ = ("appointment", "consultation_cents", "service_cents", "issued_at", "_receipt")
+
+    def __init__(self, appointment: Appointment, issued_at: Optional[datetime.datetime] = None):
+        self.appointment = appointment
+        # Amounts are whole cents so totals add up exactly
+        self.consultation_cents = appointment.consultation_cents if appointment.status != "Cancelled" else 0
+        self.service_cents: Dict[str, int] = {}
+        # Fixed when the bill is created so every copy of the receipt matches
+        self.issued_at = issued_at or datetime.datetime.now().replace(microsecond=0)
+        # (appointment status, rendered text) of the last receipt
+        self._receipt: Optional[Tuple[str, str]] = None
+    
+    @property
+    def total_cents(self) -> int:
+        return self.consultation_cents + sum(self.service_cents.values())
+
+    @property
+    def consultation_fee(self) -> float:
+        return self.consultation_cents / 100
+
+    @property
+    def additional_services(self) -> Dict[str, float]:
+        return {service: cents / 100 for service, cents in self.service_cents.items()}
+
+    @property
+    def total_amount(self) -> float:
+        return self.total_cents / 100
+    
+    def add_service(self, service_name: str, fee: float) -> bool:
+        """Add additional service to the bill; adding a service again replaces its fee"""
+        try:
+            cents = to_cents(fee)
+            if cents > 0:
+                self.service_cents[service_name] = cents
+                self._receipt = None
+                return True
+            return False
+        except Exception as e:
+            print(f"Error adding service: {e}")
+            return False
+    
+    def generate_receipt(self) -> str:
+        """Generate formatted receipt, reusing the last one while the bill is unchanged"""
+        status = self.appointment.status
+        cached = self._receipt
+        if cached is None or cached[0] != status:
+            cached = self._receipt = (status, self._render(status))
+        return cached[1]
+
+    def _render(self, status: str) -> str:
+        appointment = self.appointment
+        lines = [
+            "",
+            "=" * 50,
+            "           UCC HOSPITAL CENTER",
+            "              Medical Services",
+            "=" * 50,
+            f"Receipt Date: {self.issued_at.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Appointment ID: {appointment.appointment_id}",
+            f"Patient: {appointment.patient.name}",
+            f"Doctor: {appointment.doctor.name}",
+            f"Date: {appointment.date} at {appointment.time}",
+            f"Status: {status}",
+            "-" * 50,
+            "SERVICES:",
+            f"  Consultation Fee: JMD$ {format_cents(self.consultation_cents)}",
+        ]
+        lines.extend(f"  {service}: JMD$ {format_cents(cents)}" for service, cents in self.service_cents.items())
+        lines.extend([
+            "-" * 50,
+            f"TOTAL AMOUNT: JMD$ {format_cents(self.total_cents)}",
+            "=" * 50,
+            "Thank you for choosing UCC Hospital Center!",
+            "=" * 50,
+            "",
+        ])
+        return "\n".join(lines)
\ No newline at end of file
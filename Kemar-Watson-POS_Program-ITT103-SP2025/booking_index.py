@@ -0,0 +1,51 @@
+from typing import Dict, Optional, Tuple
+
+SlotKey = Tuple[str, int, int]
+
+ACTIVE = "Active"
+CANCELLED = "Cancelled"
+
+
+class BookingIndex:
+    """Index of booked slots keyed by (doctor_id, date key, time key)"""
+
+    def __init__(self):
+        # slot key -> (appointment_id, state)
+        self._slots: Dict[SlotKey, Tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def is_booked(self, doctor_id: str, day: int, minute: int) -> bool:
+        """Check if a slot holds an active booking"""
+        entry = self._slots.get((doctor_id, day, minute))
+        return entry is not None and entry[1] == ACTIVE
+
+    def book(self, doctor_id: str, day: int, minute: int, appointment_id: str) -> bool:
+        """Mark a slot as booked by an appointment"""
+        key = (doctor_id, day, minute)
+        entry = self._slots.get(key)
+        if entry is not None and entry[1] == ACTIVE:
+            return False
+        self._slots[key] = (appointment_id, ACTIVE)
+        return True
+
+    def release(self, doctor_id: str, day: int, minute: int, appointment_id: str) -> bool:
+        """Mark a slot as cancelled if it is held by the given appointment"""
+        key = (doctor_id, day, minute)
+        entry = self._slots.get(key)
+        if entry is None or entry[0] != appointment_id or entry[1] != ACTIVE:
+            return False
+        self._slots[key] = (appointment_id, CANCELLED)
+        return True
+
+    def drop(self, doctor_id: str, day: int, minute: int, appointment_id: str) -> None:
+        """Forget a slot entirely if it is held by the given appointment (after archiving)"""
+        key = (doctor_id, day, minute)
+        entry = self._slots.get(key)
+        if entry is not None and entry[0] == appointment_id:
+            del self._slots[key]
+
+    def get(self, doctor_id: str, day: int, minute: int) -> Optional[Tuple[str, str]]:
+        """Get (appointment_id, state) for a slot"""
+        return self._slots.get((doctor_id, day, minute))
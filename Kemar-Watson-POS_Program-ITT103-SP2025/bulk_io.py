@@ -0,0 +1,287 @@
+import contextlib
+import csv
+import itertools
+import json
+import sys
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from person import Person
+from patient import Patient
+from doctor import Doctor
+from appointment import Appointment
+from id_allocator import get_allocator, split_id
+from calendar_model import date_key, time_key
+from columnar import STATUSES
+from storage import (ADD_PATIENT, ADD_DOCTOR, BOOK_APPOINTMENT, CANCEL_APPOINTMENT,
+                     CONFIRM_APPOINTMENT, SET_STATUS)
+
+CSV = "csv"
+JSONL = "jsonl"
+
+PATIENT_FIELDS = ["patient_id", "name", "age", "gender"]
+DOCTOR_FIELDS = ["doctor_id", "name", "age", "gender", "specialty"]
+APPOINTMENT_FIELDS = ["appointment_id", "patient_id", "doctor_id", "date", "time", "status"]
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+class ImportReport:
+    """Outcome of a bulk import
+
+    Only the first `max_rejects` rejected rows are kept, so the report stays
+    small no matter how many rows fail.
+    """
+
+    def __init__(self, max_rejects: int = 1000):
+        self.imported = 0
+        self.rejected = 0
+        self.max_rejects = max_rejects
+        self.rejects: List[Tuple[int, str]] = []
+
+    def reject(self, row_number: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.rejects) < self.max_rejects:
+            self.rejects.append((row_number, reason))
+
+    def __str__(self) -> str:
+        return f"Imported {self.imported} rows, rejected {self.rejected}"
+
+
+def detect_format(source, fmt: Optional[str]) -> str:
+    """Pick the file format from `fmt` or the file extension"""
+    if fmt is not None:
+        fmt = fmt.lower()
+    elif isinstance(source, str):
+        if source.lower().endswith(".csv"):
+            fmt = CSV
+        elif source.lower().endswith((".jsonl", ".ndjson")):
+            fmt = JSONL
+    if fmt not in (CSV, JSONL):
+        raise ValueError("Format must be 'csv' or 'jsonl'")
+    return fmt
+
+
+@contextlib.contextmanager
+def _open(source, mode: str):
+    if isinstance(source, str):
+        with open(source, mode, newline="", encoding="utf-8") as handle:
+            yield handle
+    else:
+        yield source
+
+
+def read_rows(handle, fmt: str) -> Iterator[Dict]:
+    """Stream rows from an open file as dicts"""
+    if fmt == CSV:
+        yield from csv.DictReader(handle)
+    else:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most `size` items"""
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _person_fields(row: Dict) -> Tuple[str, int, str]:
+    name = (row.get("name") or "").strip()
+    age = int(row.get("age"))
+    gender = (row.get("gender") or "").strip().lower()
+    error = Person.check_fields(name, age, gender)
+    if error is not None:
+        raise ValueError(error)
+    return name, age, gender
+
+
+def _import(source, fmt: Optional[str], chunk_size: int, prefix: str, id_field: str,
+            existing: Dict, parse: Callable, create: Callable, checkpoint: Callable) -> ImportReport:
+    """Validate rows a chunk at a time and register the accepted ones
+
+    `create` returns None on success or the reason the row was rejected.
+    """
+    fmt = detect_format(source, fmt)
+    report = ImportReport()
+    allocator = get_allocator()
+    row_number = 0
+    with _open(source, "r") as handle:
+        rows = read_rows(handle, fmt)
+        for chunk in chunked(rows, chunk_size):
+            accepted = []
+            for row in chunk:
+                row_number += 1
+                try:
+                    record_id = (row.get(id_field) or "").strip().upper() or None
+                    if record_id is not None:
+                        # Checked here, as the allocator cannot observe an ID it cannot split
+                        if split_id(record_id)[0] != prefix:
+                            raise ValueError(f"ID {record_id} does not start with {prefix}")
+                        if record_id in existing:
+                            raise ValueError(f"Duplicate ID {record_id}")
+                    accepted.append((row_number, record_id, parse(row)))
+                except (TypeError, ValueError, KeyError) as e:
+                    reason = str(e) or type(e).__name__
+                    report.reject(row_number, reason)
+
+            # The chunk's own IDs first, so none of them is handed out to a row without one
+            missing = 0
+            for _, record_id, _ in accepted:
+                if record_id is None:
+                    missing += 1
+                else:
+                    allocator.observe(record_id)
+            # One allocator call for every row that arrived without an ID
+            fresh = iter(allocator.reserve(prefix, missing)) if missing else iter(())
+            for number, record_id, fields in accepted:
+                if record_id is None:
+                    record_id = next(fresh)
+                # Also catches an ID given twice in one chunk
+                if record_id in existing:
+                    report.reject(number, f"Duplicate ID {record_id}")
+                    continue
+                error = create(record_id, fields)
+                if error is None:
+                    report.imported += 1
+                else:
+                    report.reject(number, error)
+            checkpoint()
+    return report
+
+
+def import_patients(hospital, source, fmt: Optional[str] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> ImportReport:
+    """Bulk-load patients from CSV or JSON Lines"""
+    def create(patient_id, fields):
+        name, age, gender = fields
+        hospital._register_patient(Patient(name, age, gender, patient_id))
+        hospital._log([ADD_PATIENT, patient_id, name, age, gender])
+
+    return _import(source, fmt, chunk_size, "P", "patient_id", hospital.patients,
+                   _person_fields, create, hospital._checkpoint_if_due)
+
+
+def import_doctors(hospital, source, fmt: Optional[str] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> ImportReport:
+    """Bulk-load doctors from CSV or JSON Lines"""
+    def parse(row):
+        specialty = (row.get("specialty") or "").strip()
+        if not specialty:
+            raise ValueError("Specialty cannot be empty")
+        return _person_fields(row) + (specialty,)
+
+    def create(doctor_id, fields):
+        name, age, gender, specialty = fields
+        hospital._register_doctor(Doctor(name, age, gender, specialty, doctor_id))
+        hospital._log([ADD_DOCTOR, doctor_id, name, age, gender, specialty])
+
+    return _import(source, fmt, chunk_size, "D", "doctor_id", hospital.doctors, parse, create,
+                   hospital._checkpoint_if_due)
+
+
+def import_appointments(hospital, source, fmt: Optional[str] = None,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> ImportReport:
+    """Bulk-load appointments from CSV or JSON Lines
+
+    Rows must reference existing patients and doctors and a free slot;
+    an optional status column, spelled as export_appointments writes it,
+    may give any other status than Scheduled.
+    """
+    def parse(row):
+        patient_id = (row.get("patient_id") or "").strip().upper()
+        doctor_id = (row.get("doctor_id") or "").strip().upper()
+        day = date_key((row.get("date") or "").strip())
+        minute = time_key((row.get("time") or "").strip())
+        status = (row.get("status") or "Scheduled").strip()
+        if patient_id not in hospital.patients:
+            raise ValueError(f"Patient not found: {patient_id}")
+        if doctor_id not in hospital.doctors:
+            raise ValueError(f"Doctor not found: {doctor_id}")
+        if status not in STATUSES:
+            raise ValueError(f"Unknown status: {status}")
+        if not hospital.doctors[doctor_id].calendar.is_open(day, minute):
+            raise ValueError("Doctor is not available at the specified time")
+        return patient_id, doctor_id, day, minute, status
+
+    def create(appointment_id, fields):
+        patient_id, doctor_id, day, minute, status = fields
+        with hospital._slot_lock(doctor_id, day, minute):
+            # Re-checked here because earlier rows of the same chunk may hold the slot
+            if status != "Cancelled" and hospital.booking_index.is_booked(doctor_id, day, minute):
+                return "This time slot is already booked"
+            doctor = hospital.doctors[doctor_id]
+            appointment = Appointment(hospital.patients[patient_id], doctor, day, minute, appointment_id,
+                                      hospital.catalog.consultation_cents(doctor.specialty, day))
+            appointment.status = sys.intern(status)
+            hospital._register_appointment(appointment)
+            hospital._log([BOOK_APPOINTMENT, appointment_id, patient_id, doctor_id,
+                           appointment.date, appointment.time, appointment.consultation_cents])
+            if status == "Cancelled":
+                hospital._log([CANCEL_APPOINTMENT, appointment_id])
+            elif status == "Confirmed":
+                hospital._log([CONFIRM_APPOINTMENT, appointment_id])
+            elif status != "Scheduled":
+                hospital._log([SET_STATUS, appointment_id, status])
+
+    return _import(source, fmt, chunk_size, "A", "appointment_id", hospital.appointments,
+                   parse, create, hospital._checkpoint_if_due)
+
+
+def _export(source, fmt: Optional[str], fields: List[str], rows: Iterable[Tuple],
+            chunk_size: int) -> int:
+    fmt = detect_format(source, fmt)
+    written = 0
+    with _open(source, "w") as handle:
+        if fmt == CSV:
+            writer = csv.writer(handle)
+            writer.writerow(fields)
+            for chunk in chunked(rows, chunk_size):
+                writer.writerows(chunk)
+                written += len(chunk)
+        else:
+            for chunk in chunked(rows, chunk_size):
+                handle.write("".join(json.dumps(dict(zip(fields, row))) + "\n" for row in chunk))
+                written += len(chunk)
+    return written
+
+
+def export_patients(hospital, destination, fmt: Optional[str] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Stream every patient to CSV or JSON Lines; returns the row count"""
+    rows = ((p.patient_id, p.name, p.age, p.gender) for p in hospital.patients.values())
+    return _export(destination, fmt, PATIENT_FIELDS, rows, chunk_size)
+
+
+def export_doctors(hospital, destination, fmt: Optional[str] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Stream every doctor to CSV or JSON Lines; returns the row count"""
+    rows = ((d.doctor_id, d.name, d.age, d.gender, d.specialty) for d in hospital.doctors.values())
+    return _export(destination, fmt, DOCTOR_FIELDS, rows, chunk_size)
+
+
+def export_appointments(hospital, destination, fmt: Optional[str] = None,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Stream every appointment to CSV or JSON Lines; returns the row count"""
+    rows = ((a.appointment_id, a.patient.patient_id, a.doctor.doctor_id, a.date, a.time, a.status)
+            for a in hospital.appointments.values())
+    return _export(destination, fmt, APPOINTMENT_FIELDS, rows, chunk_size)
+
+
+def export_receipts(hospital, destination, start_day: int, end_day: int,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Write the receipt of every billed appointment dated in [start_day, end_day]; returns the count"""
+    bills = hospital.bills
+    receipts = (bills[appointment_id].generate_receipt()
+                for day in range(start_day, end_day + 1)
+                for appointment_id in hospital.day_index.get(day) if appointment_id in bills)
+    written = 0
+    with _open(destination, "w") as handle:
+        for chunk in chunked(receipts, chunk_size):
+            handle.write("".join(chunk))
+            written += len(chunk)
+    return written
@@ -0,0 +1,185 @@
+import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Dates are stored as proleptic ordinals (datetime.date.toordinal) and times
+# as minutes after midnight, so comparisons and range scans are integer work.
+
+DEFAULT_TIMES = ("09:00", "10:00", "11:00", "14:00", "15:00", "16:00")
+
+
+def date_key(date: str) -> int:
+    """Convert 'YYYY-MM-DD' to a day number"""
+    return datetime.date.fromisoformat(date).toordinal()
+
+
+def time_key(time: str) -> int:
+    """Convert 'HH:MM' to minutes after midnight"""
+    hours, minutes = time.split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time: {time}")
+    return hours * 60 + minutes
+
+
+# Day and minute numbers above 256 are separate int objects each time they are
+# computed; sharing one object per value saves ~28 bytes per stored key.
+_SHARED_KEYS: Dict[int, int] = {}
+
+
+def shared_key(value: int) -> int:
+    """Canonical int object for a day or minute number"""
+    return _SHARED_KEYS.setdefault(value, value)
+
+
+def format_date(day: int) -> str:
+    return datetime.date.fromordinal(day).isoformat()
+
+
+def format_time(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+class WeeklyTemplate:
+    """Slot start times for each weekday (0 = Monday)"""
+
+    def __init__(self, days: Dict[int, Iterable[int]]):
+        self.days: Dict[int, Tuple[int, ...]] = {}
+        for weekday in range(7):
+            slots = tuple(sorted(set(days.get(weekday, ()))))
+            if any(not 0 <= minute < 24 * 60 for minute in slots):
+                raise ValueError("Slot times must be within the day")
+            self.days[weekday] = slots
+
+    @classmethod
+    def from_times(cls, times: Sequence[str], weekdays: Iterable[int] = range(7)) -> "WeeklyTemplate":
+        """Same list of 'HH:MM' slots on each of the given weekdays"""
+        minutes = [time_key(time) for time in times]
+        return cls({weekday: minutes for weekday in weekdays})
+
+    @classmethod
+    def from_hours(cls, start: str, end: str, slot_minutes: int, weekdays: Iterable[int] = range(5),
+                   breaks: Sequence[Tuple[str, str]] = ()) -> "WeeklyTemplate":
+        """Back-to-back slots of `slot_minutes` between `start` and `end`, skipping breaks"""
+        if slot_minutes <= 0:
+            raise ValueError("Slot length must be positive")
+        blocked = [(time_key(a), time_key(b)) for a, b in breaks]
+        minutes = []
+        minute = time_key(start)
+        while minute + slot_minutes <= time_key(end):
+            if not any(a < minute + slot_minutes and minute < b for a, b in blocked):
+                minutes.append(minute)
+            minute += slot_minutes
+        return cls({weekday: minutes for weekday in weekdays})
+
+    def slots_for(self, weekday: int) -> Tuple[int, ...]:
+        return self.days[weekday]
+
+    def to_dict(self) -> Dict[int, List[int]]:
+        return {weekday: list(slots) for weekday, slots in self.days.items() if slots}
+
+
+DEFAULT_TEMPLATE = WeeklyTemplate.from_times(DEFAULT_TIMES)
+
+
+class DoctorCalendar:
+    """Working slots of one doctor with a booked-slot bitmap per day
+
+    Bit i of a day's mask is set when the i-th slot of that day is booked,
+    so the free slots of a day are `~booked & full_mask` without touching
+    any appointment objects. Only days with bookings take memory.
+    """
+
+    __slots__ = ("template", "holidays", "leave", "overrides", "_booked")
+
+    def __init__(self, template: WeeklyTemplate = DEFAULT_TEMPLATE, holidays: Optional[Set[int]] = None):
+        self.template = template
+        self.holidays: Set[int] = holidays if holidays is not None else set()
+        self.leave: Set[int] = set()
+        self.overrides: Dict[int, Tuple[int, ...]] = {}
+        self._booked: Dict[int, int] = {}
+
+    def _day_slots(self, day: int) -> Tuple[int, ...]:
+        """Scheduled slots of a day, ignoring leave; bit positions follow this order"""
+        slots = self.overrides.get(day)
+        if slots is None:
+            # Ordinal 1 (0001-01-01) was a Monday
+            slots = self.template.days[(day - 1) % 7]
+        return slots
+
+    def is_off(self, day: int) -> bool:
+        return day in self.leave or day in self.holidays
+
+    def slots_on(self, day: int) -> Tuple[int, ...]:
+        """Slot start times on a day, empty on leave and holidays"""
+        if self.is_off(day):
+            return ()
+        return self._day_slots(day)
+
+    def is_open(self, day: int, minute: int) -> bool:
+        """Check if the doctor works the slot (booked or not)"""
+        return minute in self.slots_on(day)
+
+    def is_free(self, day: int, minute: int) -> bool:
+        slots = self.slots_on(day)
+        if minute not in slots:
+            return False
+        return not (self._booked.get(day, 0) >> slots.index(minute)) & 1
+
+    def book(self, day: int, minute: int) -> bool:
+        """Mark a slot as booked; False if it is not a scheduled slot"""
+        slots = self._day_slots(day)
+        if minute not in slots:
+            return False
+        self._booked[day] = self._booked.get(day, 0) | (1 << slots.index(minute))
+        return True
+
+    def release(self, day: int, minute: int) -> None:
+        slots = self._day_slots(day)
+        if minute in slots and day in self._booked:
+            mask = self._booked[day] & ~(1 << slots.index(minute))
+            if mask:
+                self._booked[day] = mask
+            else:
+                del self._booked[day]
+
+    def free_on(self, day: int) -> List[int]:
+        """Free slot start times on a day, in order"""
+        slots = self.slots_on(day)
+        booked = self._booked.get(day, 0)
+        if not booked:
+            return list(slots)
+        if booked == (1 << len(slots)) - 1:
+            return []
+        return [minute for i, minute in enumerate(slots) if not (booked >> i) & 1]
+
+    def iter_free(self, start_day: int, end_day: int, from_minute: int = 0) -> Iterator[Tuple[int, int]]:
+        """Yield (day, minute) for every free slot in [start_day, end_day]"""
+        for day in range(start_day, end_day + 1):
+            for minute in self.free_on(day):
+                if day == start_day and minute < from_minute:
+                    continue
+                yield day, minute
+
+    def next_free(self, start_day: int, from_minute: int = 0, horizon: int = 366) -> Optional[Tuple[int, int]]:
+        """Earliest free slot on or after the given day and time"""
+        return next(self.iter_free(start_day, start_day + horizon, from_minute), None)
+
+    def set_template(self, template: WeeklyTemplate) -> None:
+        self._rebuild(lambda: setattr(self, "template", template))
+
+    def set_day(self, day: int, times: Iterable[int]) -> None:
+        """Use a different set of slots (e.g. other slot lengths) on one day"""
+        self._rebuild(lambda: self.overrides.__setitem__(day, tuple(sorted(set(times)))))
+
+    def add_leave(self, days: Iterable[int]) -> None:
+        self.leave.update(days)
+
+    def _rebuild(self, change) -> None:
+        """Apply a schedule change and re-map booked bits to the new slot positions"""
+        booked = {day: [minute for i, minute in enumerate(self._day_slots(day)) if (mask >> i) & 1]
+                  for day, mask in self._booked.items()}
+        change()
+        self._booked = {}
+        for day, minutes in booked.items():
+            for minute in minutes:
+                self.book(day, minute)
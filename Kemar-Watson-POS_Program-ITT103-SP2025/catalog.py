@@ -0,0 +1,112 @@
+import bisect
+import threading
+from typing import Dict, Iterator, List, Optional
+
+# JMD$ 3000, the consultation fee of a specialty without its own price
+DEFAULT_CONSULTATION_CENTS = 300000
+
+SERVICE = "service"
+CONSULTATION = "consultation"
+
+
+def service_code(code: str) -> str:
+    """Canonical form of a service code, e.g. 'xray ' -> 'XRAY'"""
+    return code.strip().upper()
+
+
+def specialty_key(specialty: str) -> str:
+    return specialty.strip().lower()
+
+
+class PriceHistory:
+    """Prices of one catalog item, each effective from a day number onwards"""
+
+    __slots__ = ("name", "days", "cents")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.days: List[int] = []
+        self.cents: List[int] = []
+
+    def set(self, day: int, cents: int) -> None:
+        """Add a price version; a version for the same day replaces it"""
+        position = bisect.bisect_left(self.days, day)
+        if position < len(self.days) and self.days[position] == day:
+            self.cents[position] = cents
+        else:
+            self.days.insert(position, day)
+            self.cents.insert(position, cents)
+
+    def on(self, day: int) -> Optional[int]:
+        """Price in effect on a day, or None before the first version"""
+        days = self.days
+        # Most lookups are for current dates, at or after the newest version
+        if days and day >= days[-1]:
+            return self.cents[-1]
+        position = bisect.bisect_right(days, day) - 1
+        return self.cents[position] if position >= 0 else None
+
+    def versions(self) -> List[tuple]:
+        return list(zip(self.days, self.cents))
+
+
+class PriceCatalog:
+    """Billable services by code, and consultation fees by specialty
+
+    Every price is versioned by the day it takes effect, so changing a
+    price never alters what was charged for earlier dates. Looking up a
+    service is one dict access by code plus, for dates before the newest
+    version, a binary search over that service's few versions.
+    """
+
+    def __init__(self, default_consultation_cents: int = DEFAULT_CONSULTATION_CENTS):
+        self.default_consultation_cents = default_consultation_cents
+        self.services: Dict[str, PriceHistory] = {}
+        self.consultations: Dict[str, PriceHistory] = {}
+        self._lock = threading.Lock()
+
+    def set_service(self, code: str, name: str, day: int, cents: int) -> None:
+        code = service_code(code)
+        with self._lock:
+            history = self.services.get(code)
+            if history is None:
+                history = self.services[code] = PriceHistory(name)
+            history.name = name
+            history.set(day, cents)
+
+    def set_consultation(self, specialty: str, day: int, cents: int) -> None:
+        key = specialty_key(specialty)
+        with self._lock:
+            history = self.consultations.get(key)
+            if history is None:
+                history = self.consultations[key] = PriceHistory(specialty.strip())
+            history.set(day, cents)
+
+    def service(self, code: str, day: int) -> Optional[tuple]:
+        """(name, cents) of a service on a day, or None if it is unknown or not yet priced"""
+        history = self.services.get(service_code(code))
+        if history is None:
+            return None
+        cents = history.on(day)
+        return None if cents is None else (history.name, cents)
+
+    def consultation_cents(self, specialty: str, day: int) -> int:
+        """Consultation fee of a specialty on a day, or the default fee"""
+        history = self.consultations.get(specialty_key(specialty))
+        cents = history.on(day) if history is not None else None
+        return self.default_consultation_cents if cents is None else cents
+
+    def records(self) -> Iterator[list]:
+        """Every price version as [kind, key, name, day, cents], for snapshots"""
+        with self._lock:
+            for kind, items in ((SERVICE, self.services), (CONSULTATION, self.consultations)):
+                for key, history in items.items():
+                    for day, cents in history.versions():
+                        yield [kind, key, history.name, day, cents]
+
+    def apply(self, record) -> None:
+        kind, key, name, day, cents = record
+        if kind == SERVICE:
+            self.set_service(key, name, day, cents)
+        else:
+            self.set_consultation(name, day, cents)
@@ -0,0 +1,223 @@
+import datetime
+from array import array
+from typing import Dict, List, Optional, Set
+
+from id_allocator import split_id
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - reports fall back to plain Python loops
+    numpy = None
+
+# Status codes stored in the status column; new statuses are appended so codes never change
+STATUSES = ("Scheduled", "Confirmed", "Cancelled", "Completed", "No-Show")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+CANCELLED = STATUS_CODES["Cancelled"]
+_STATUS_NAMES = {status.lower(): status for status in STATUSES}
+
+
+def status_name(status: str) -> str:
+    """Spelling of a status as stored, for filters typed in any case (e.g. 'no-show' -> 'No-Show')"""
+    return _STATUS_NAMES.get(status.strip().lower(), status)
+
+
+def month_label(month_number: int) -> str:
+    """'YYYY-MM' for a month counted as year * 12 + month - 1"""
+    return f"{month_number // 12:04d}-{month_number % 12 + 1:02d}"
+
+
+class AppointmentColumns:
+    """Appointments as parallel integer columns for analytics
+
+    Doctors, patients and specialties are coded as small integers; each
+    appointment is one row across the doctor, patient, date, time, status
+    and fee columns. Columns are stdlib arrays, so appending stays cheap,
+    and reports read them through zero-copy NumPy views when NumPy is
+    installed or with plain loops when it is not.
+    """
+
+    def __init__(self, use_numpy: Optional[bool] = None):
+        if use_numpy and numpy is None:
+            raise RuntimeError("NumPy is not installed")
+        self.use_numpy = numpy is not None if use_numpy is None else use_numpy
+        self.doctor = array("i")
+        self.patient = array("i")
+        self.date = array("i")
+        self.time = array("h")
+        self.status = array("b")
+        # Consultation fee in cents
+        self.fee = array("i")
+        # Numeric part of the appointment ID, and billed cents (-1 while unbilled)
+        self.number = array("q")
+        self.bill = array("q")
+        # Appointment ID of each row, for readers that map rows back to records
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Rows changed in place since the last take_changes(); None while nobody asks
+        self.changed: Optional[Set[int]] = None
+        self.doctor_ids: List[str] = []
+        self.patient_ids: List[str] = []
+        self.specialties: List[str] = []
+        # Specialty code of each doctor code
+        self.doctor_specialty = array("i")
+        self._doctor_codes: Dict[str, int] = {}
+        self._patient_codes: Dict[str, int] = {}
+        self._specialty_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def _doctor_code(self, doctor) -> int:
+        code = self._doctor_codes.get(doctor.doctor_id)
+        if code is None:
+            specialty = doctor.specialty.strip().lower()
+            specialty_code = self._specialty_codes.get(specialty)
+            if specialty_code is None:
+                specialty_code = self._specialty_codes[specialty] = len(self.specialties)
+                self.specialties.append(doctor.specialty.strip())
+            code = self._doctor_codes[doctor.doctor_id] = len(self.doctor_ids)
+            self.doctor_ids.append(doctor.doctor_id)
+            self.doctor_specialty.append(specialty_code)
+        return code
+
+    def _patient_code(self, patient_id: str) -> int:
+        code = self._patient_codes.get(patient_id)
+        if code is None:
+            code = self._patient_codes[patient_id] = len(self.patient_ids)
+            self.patient_ids.append(patient_id)
+        return code
+
+    def add(self, appointment) -> None:
+        """Append an appointment, or refresh its status if it is already stored"""
+        if appointment.appointment_id in self._rows:
+            self.set_status(appointment)
+            return
+        self._rows[appointment.appointment_id] = len(self.date)
+        self.ids.append(appointment.appointment_id)
+        self.doctor.append(self._doctor_code(appointment.doctor))
+        self.patient.append(self._patient_code(appointment.patient.patient_id))
+        self.date.append(appointment.date_key)
+        self.time.append(appointment.time_key)
+        self.status.append(STATUS_CODES[appointment.status])
+        self.fee.append(appointment.consultation_cents)
+        self.number.append(split_id(appointment.appointment_id)[1])
+        self.bill.append(-1)
+
+    def set_status(self, appointment) -> None:
+        row = self._rows.get(appointment.appointment_id)
+        if row is not None:
+            self.status[row] = STATUS_CODES[appointment.status]
+            if self.changed is not None:
+                self.changed.add(row)
+
+    def set_bill(self, bill) -> None:
+        row = self._rows.get(bill.appointment.appointment_id)
+        if row is not None:
+            self.bill[row] = bill.total_cents
+            if self.changed is not None:
+                self.changed.add(row)
+
+    def take_changes(self) -> Set[int]:
+        """Rows changed in place since the previous call, and start tracking from now"""
+        changed, self.changed = self.changed or set(), set()
+        return changed
+
+    def forget(self, appointment_id: str) -> None:
+        """Stop tracking an archived appointment; its row (with a final status) stays in the reports"""
+        self._rows.pop(appointment_id, None)
+
+    def _views(self):
+        """NumPy views over the columns; callers must not keep them past the report"""
+        return (numpy.frombuffer(self.doctor, dtype=numpy.int32),
+                numpy.frombuffer(self.date, dtype=numpy.int32),
+                numpy.frombuffer(self.status, dtype=numpy.int8),
+                numpy.frombuffer(self.fee, dtype=numpy.int32))
+
+    @staticmethod
+    def _date_mask(date, start_day: Optional[int], end_day: Optional[int]):
+        mask = numpy.ones(len(date), dtype=bool)
+        if start_day is not None:
+            mask &= date >= start_day
+        if end_day is not None:
+            mask &= date <= end_day
+        return mask
+
+    def _rows_between(self, start_day: Optional[int], end_day: Optional[int]):
+        """Yield (doctor, date, status, fee) rows dated in the range, for the fallback reports"""
+        low = start_day if start_day is not None else -1
+        high = end_day if end_day is not None else 1 << 31
+        for row in zip(self.doctor, self.date, self.status, self.fee):
+            if low <= row[1] <= high:
+                yield row
+
+    def status_counts(self, start_day: Optional[int] = None, end_day: Optional[int] = None) -> Dict[str, int]:
+        """Number of appointments in each status, optionally within a date range"""
+        if self.use_numpy:
+            doctor, date, status, fee = self._views()
+            counts = numpy.bincount(status[self._date_mask(date, start_day, end_day)],
+                                    minlength=len(STATUSES)).tolist()
+        else:
+            counts = [0] * len(STATUSES)
+            for _, _, status, _ in self._rows_between(start_day, end_day):
+                counts[status] += 1
+        return dict(zip(STATUSES, counts))
+
+    def bookings_by_doctor(self, start_day: Optional[int] = None, end_day: Optional[int] = None) -> Dict[str, int]:
+        """Non-cancelled appointments per doctor"""
+        if self.use_numpy:
+            doctor, date, status, fee = self._views()
+            mask = self._date_mask(date, start_day, end_day) & (status != CANCELLED)
+            counts = numpy.bincount(doctor[mask], minlength=len(self.doctor_ids)).tolist()
+        else:
+            counts = [0] * len(self.doctor_ids)
+            for doctor, _, status, _ in self._rows_between(start_day, end_day):
+                if status != CANCELLED:
+                    counts[doctor] += 1
+        return {doctor_id: count for doctor_id, count in zip(self.doctor_ids, counts) if count}
+
+    def daily_bookings_by_specialty(self, start_day: int, end_day: int) -> Dict[str, List[int]]:
+        """Non-cancelled appointments per specialty, one count per day of the range"""
+        days = end_day - start_day + 1
+        if days <= 0:
+            return {}
+        if self.use_numpy:
+            doctor, date, status, fee = self._views()
+            mask = self._date_mask(date, start_day, end_day) & (status != CANCELLED)
+            specialty = numpy.frombuffer(self.doctor_specialty, dtype=numpy.int32)[doctor[mask]]
+            cells = specialty.astype(numpy.int64) * days + (date[mask] - start_day)
+            grid = numpy.bincount(cells, minlength=len(self.specialties) * days).reshape(-1, days)
+            rows = grid.tolist()
+        else:
+            rows = [[0] * days for _ in self.specialties]
+            for doctor, date, status, _ in self._rows_between(start_day, end_day):
+                if status != CANCELLED:
+                    rows[self.doctor_specialty[doctor]][date - start_day] += 1
+        return {name: counts for name, counts in zip(self.specialties, rows) if any(counts)}
+
+    def revenue_by_doctor_month(self, start_day: int, end_day: int) -> Dict[str, Dict[str, int]]:
+        """Consultation fees in cents of non-cancelled appointments, per doctor and 'YYYY-MM'"""
+        if end_day < start_day:
+            return {}
+        first = datetime.date.fromordinal(start_day)
+        first_month = first.year * 12 + first.month - 1
+        # Month offset of every day in the range, so dates map to months without datetime per row
+        month_of = [0] * (end_day - start_day + 1)
+        for offset in range(len(month_of)):
+            day = datetime.date.fromordinal(start_day + offset)
+            month_of[offset] = day.year * 12 + day.month - 1 - first_month
+        months = month_of[-1] + 1
+        if self.use_numpy:
+            doctor, date, status, fee = self._views()
+            mask = self._date_mask(date, start_day, end_day) & (status != CANCELLED)
+            month = numpy.asarray(month_of, dtype=numpy.int64)[date[mask] - start_day]
+            cells = doctor[mask].astype(numpy.int64) * months + month
+            totals = numpy.bincount(cells, weights=fee[mask], minlength=len(self.doctor_ids) * months)
+            rows = totals.astype(numpy.int64).reshape(-1, months).tolist()
+        else:
+            rows = [[0] * months for _ in self.doctor_ids]
+            for doctor, date, status, fee in self._rows_between(start_day, end_day):
+                if status != CANCELLED:
+                    rows[doctor][month_of[date - start_day]] += fee
+        return {doctor_id: {month_label(first_month + month): amount
+                            for month, amount in enumerate(amounts) if amount}
+                for doctor_id, amounts in zip(self.doctor_ids, rows) if any(amounts)}
@@ -0,0 +1,245 @@
+from typing import Any, Callable, Dict, List, Optional
+
+from hospital_system import HospitalSystem
+from scheduler import SlotRequest
+
+# Operations that front ends other than the console menu (network server,
+# batch scripts) can run by name with keyword arguments. Each returns plain
+# JSON-compatible values; a None or False result means the operation failed
+# and the message HospitalSystem reported explains why.
+
+OPERATIONS: Dict[str, Callable[..., Any]] = {}
+
+
+def operation(name: str):
+    """Register a function in OPERATIONS under `name`"""
+    def register(function):
+        OPERATIONS[name] = function
+        return function
+    return register
+
+
+def patient_record(patient) -> Dict:
+    return {"patient_id": patient.patient_id, "name": patient.name, "age": patient.age,
+            "gender": patient.gender, "appointments": patient.history.count}
+
+
+def doctor_record(doctor) -> Dict:
+    return {"doctor_id": doctor.doctor_id, "name": doctor.name, "age": doctor.age, "gender": doctor.gender,
+            "specialty": doctor.specialty, "schedule": doctor.schedule}
+
+
+def appointment_record(appointment) -> Dict:
+    return {"appointment_id": appointment.appointment_id, "patient_id": appointment.patient.patient_id,
+            "doctor_id": appointment.doctor.doctor_id, "date": appointment.date, "time": appointment.time,
+            "status": appointment.status}
+
+
+def bill_record(bill) -> Dict:
+    return {"appointment_id": bill.appointment.appointment_id, "consultation_cents": bill.consultation_cents,
+            "services": dict(bill.service_cents), "total_cents": bill.total_cents,
+            "issued_at": bill.issued_at.isoformat(), "receipt": bill.generate_receipt()}
+
+
+@operation("add_patient")
+def add_patient(hospital: HospitalSystem, name: str, age: int, gender: str,
+                patient_id: Optional[str] = None, check_duplicates: bool = False) -> Optional[str]:
+    if isinstance(check_duplicates, str):
+        check_duplicates = check_duplicates.lower() in ("1", "true", "yes")
+    return hospital.add_patient(name, int(age), gender, patient_id, check_duplicates)
+
+
+@operation("add_doctor")
+def add_doctor(hospital: HospitalSystem, name: str, age: int, gender: str, specialty: str,
+               doctor_id: Optional[str] = None) -> Optional[str]:
+    return hospital.add_doctor(name, int(age), gender, specialty, doctor_id)
+
+
+@operation("book_appointment")
+def book_appointment(hospital: HospitalSystem, patient_id: str, doctor_id: str, date: str,
+                     time: str) -> Optional[str]:
+    return hospital.book_appointment(patient_id, doctor_id, date, time)
+
+
+@operation("confirm_appointment")
+def confirm_appointment(hospital: HospitalSystem, appointment_id: str) -> bool:
+    return hospital.confirm_appointment(appointment_id)
+
+
+@operation("cancel_appointment")
+def cancel_appointment(hospital: HospitalSystem, appointment_id: str) -> bool:
+    return hospital.cancel_appointment(appointment_id)
+
+
+@operation("generate_bill")
+def generate_bill(hospital: HospitalSystem, appointment_id: str) -> Optional[str]:
+    return hospital.generate_bill(appointment_id)
+
+
+@operation("add_service")
+def add_service(hospital: HospitalSystem, appointment_id: str, service: str, fee: Optional[float] = None) -> bool:
+    """Without a fee, `service` is a catalog code"""
+    return hospital.add_service_to_bill(appointment_id, service, None if fee is None else float(fee))
+
+
+@operation("bill_confirmed")
+def bill_confirmed(hospital: HospitalSystem, date: Optional[str] = None, doctor_id: Optional[str] = None) -> int:
+    return hospital.bill_confirmed(date, doctor_id)
+
+
+@operation("set_service_price")
+def set_service_price(hospital: HospitalSystem, code: str, name: str, price: float,
+                      effective_date: Optional[str] = None) -> bool:
+    return hospital.set_service_price(code, name, price, effective_date)
+
+
+@operation("set_consultation_fee")
+def set_consultation_fee(hospital: HospitalSystem, specialty: str, price: float,
+                         effective_date: Optional[str] = None) -> bool:
+    return hospital.set_consultation_fee(specialty, price, effective_date)
+
+
+@operation("schedule_batch")
+def schedule_batch(hospital: HospitalSystem, requests: List[Dict]) -> List[Optional[str]]:
+    """Each request: patient_id, specialty, start_date, optional end_date, times ['HH:MM-HH:MM'] and priority"""
+    return hospital.schedule_batch([SlotRequest.parse(**request) for request in requests])
+
+
+@operation("join_waitlist")
+def join_waitlist(hospital: HospitalSystem, patient_id: str, start_date: str, end_date: str,
+                  doctor_id: Optional[str] = None, specialty: Optional[str] = None, priority: int = 0,
+                  auto_book: bool = True) -> Optional[str]:
+    if isinstance(auto_book, str):
+        auto_book = auto_book.lower() not in ("0", "false", "no")
+    return hospital.join_waitlist(patient_id, start_date, end_date, doctor_id, specialty, int(priority), auto_book)
+
+
+@operation("leave_waitlist")
+def leave_waitlist(hospital: HospitalSystem, entry_id: str) -> bool:
+    return hospital.leave_waitlist(entry_id)
+
+
+@operation("accept_offer")
+def accept_offer(hospital: HospitalSystem, entry_id: str) -> Optional[str]:
+    return hospital.accept_offer(entry_id)
+
+
+@operation("decline_offer")
+def decline_offer(hospital: HospitalSystem, entry_id: str) -> bool:
+    return hospital.decline_offer(entry_id)
+
+
+@operation("get_patient")
+def get_patient(hospital: HospitalSystem, patient_id: str) -> Optional[Dict]:
+    patient = hospital.patients.get(patient_id)
+    if patient is None:
+        hospital._say("Patient not found!")
+        return None
+    return patient_record(patient)
+
+
+@operation("get_doctor")
+def get_doctor(hospital: HospitalSystem, doctor_id: str) -> Optional[Dict]:
+    doctor = hospital.doctors.get(doctor_id)
+    if doctor is None:
+        hospital._say("Doctor not found!")
+        return None
+    return doctor_record(doctor)
+
+
+@operation("get_appointment")
+def get_appointment(hospital: HospitalSystem, appointment_id: str) -> Optional[Dict]:
+    appointment = hospital.find_appointment(appointment_id)
+    if appointment is None:
+        hospital._say("Appointment not found!")
+        return None
+    return appointment_record(appointment)
+
+
+@operation("get_bill")
+def get_bill(hospital: HospitalSystem, appointment_id: str) -> Optional[Dict]:
+    bill = hospital.find_bill(appointment_id)
+    if bill is None:
+        hospital._say("Bill not found! Generate bill first.")
+        return None
+    return bill_record(bill)
+
+
+@operation("find_patients")
+def find_patients(hospital: HospitalSystem, prefix: str, limit: int = 20) -> List[Dict]:
+    patients = []
+    for patient in hospital.find_patients_by_name(prefix):
+        if len(patients) == limit:
+            break
+        patients.append(patient_record(patient))
+    return patients
+
+
+@operation("find_duplicate_patients")
+def find_duplicate_patients(hospital: HospitalSystem, name: str, age: int, gender: str,
+                            limit: int = 5) -> List[Dict]:
+    return [dict(patient_record(hospital.patients[patient_id]), score=score)
+            for patient_id, score in hospital.find_duplicate_patients(name, int(age), gender, int(limit))]
+
+
+@operation("appointments_for_patient")
+def appointments_for_patient(hospital: HospitalSystem, patient_id: str) -> List[Dict]:
+    return [appointment_record(appointment) for appointment in hospital.appointments_for_patient(patient_id)]
+
+
+@operation("appointments_for_doctor")
+def appointments_for_doctor(hospital: HospitalSystem, doctor_id: str, date: str) -> List[Dict]:
+    return [appointment_record(appointment) for appointment in hospital.appointments_for_doctor(doctor_id, date)]
+
+
+@operation("list_appointments")
+def list_appointments(hospital: HospitalSystem, cursor: Optional[int] = None, page_size: int = 20,
+                      **filters) -> Dict:
+    rows, cursor = hospital.page_appointments(cursor, int(page_size), **filters)
+    return {"rows": [appointment_record(appointment) for appointment in rows], "cursor": cursor}
+
+
+@operation("free_slots")
+def free_slots(hospital: HospitalSystem, doctor_id: str, start_date: str, end_date: str) -> List[List[str]]:
+    return [list(slot) for slot in hospital.free_slots(doctor_id, start_date, end_date)]
+
+
+@operation("next_free_slot")
+def next_free_slot(hospital: HospitalSystem, doctor_id: str, date: str, time: str = "00:00") -> Optional[List[str]]:
+    slot = hospital.next_free_slot(doctor_id, date, time)
+    return list(slot) if slot is not None else None
+
+
+@operation("find_earliest_slots")
+def find_earliest_slots(hospital: HospitalSystem, specialty: str, start_date: str, end_date: str,
+                        count: int = 5, time: str = "00:00") -> List[List[str]]:
+    return [list(slot) for slot in hospital.find_earliest_slots(specialty, start_date, end_date, int(count), time)]
+
+
+def execute(hospital: HospitalSystem, name: str, args: Optional[Dict] = None) -> Dict:
+    """Run one named operation and describe the outcome as a JSON-compatible dict
+
+    The messages the operation reports are collected instead of printed;
+    the last one is returned as "message" (e.g. why a booking failed).
+    An operation that raises is answered with an error rather than
+    propagating, so one bad request cannot take its caller down.
+    """
+    function = OPERATIONS.get(name)
+    if function is None:
+        return {"ok": False, "error": f"Unknown operation: {name}"}
+    messages: List[str] = []
+    echo = hospital.echo
+    hospital.echo = messages.append
+    try:
+        result = function(hospital, **(args or {}))
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        # Mostly arguments of the wrong type, e.g. a number where a name was expected
+        return {"ok": False, "error": f"Bad arguments for {name}: {e}"}
+    except Exception as e:
+        return {"ok": False, "error": f"{name} failed: {type(e).__name__}: {e}"}
+    finally:
+        hospital.echo = echo
+    response = {"ok": result is not None and result is not False, "result": result}
+    if messages:
+        response["message"] = messages[-1]
+    return response
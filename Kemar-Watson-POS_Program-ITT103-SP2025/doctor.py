@@ -1,42 +1,60 @@
-import random
-from person import Person
-
-class Doctor(Person):
-    """Doctor class inheriting from Person"""
-    
-    def __init__(self, name: str, age: int, gender: str, specialty: str):
-        super().__init__(name, age, gender)
-        self.doctor_id = self._generate_id()
-        self.specialty = specialty
-        self.schedule = []
-        self._initialize_schedule()
-    
-    def _generate_id(self) -> str:
-        """Generate unique doctor ID"""
-        return f"D{random.randint(1000, 9999)}"
-    
-    def _initialize_schedule(self):
-        """Initialize default schedule"""
-        self.schedule = [
-            "09:00", "10:00", "11:00", "14:00", "15:00", "16:00"
-        ]
-    
-    def is_available(self, date: str, time: str) -> bool:
-        """Check if doctor is available at given date and time"""
-        try:
-            # Check if time is in schedule
-            if time in self.schedule:
-                return True
-            return False
-        except Exception as e:
-            print(f"Error checking availability: {e}")
-            return False
-    
-    def view_schedule(self) -> str:
-        """View doctor's schedule"""
-        schedule_info = f"\n=== DOCTOR SCHEDULE ===\n"
-        schedule_info += f"Doctor ID: {self.doctor_id}\n"
-        schedule_info += f"Name: {self.name}\n"
-        schedule_info += f"Specialty: {self.specialty}\n"
-        schedule_info += f"Available Times: {', '.join(self.schedule)}\n"
+import calendar
+import sys
+from typing import List, Optional
+from calendar_model import DoctorCalendar, date_key, format_time, time_key
+from id_allocator import get_allocator
+from person import Person
+
+class Doctor(Person):
+    """Doctor class inheriting from Person"""
+
+    __slots__ = ("doctor_id", "specialty", "calendar")
+    
+    def __init__(self, name: str, age: int, gender: str, specialty: str, doctor_id: Optional[str] = None):
+        super().__init__(name, age, gender)
+        self.doctor_id = doctor_id or self._generate_id()
+        # Interned so every doctor of a specialty shares one string
+        self.specialty = sys.intern(specialty)
+        self._initialize_schedule()
+    
+    def _generate_id(self) -> str:
+        """Generate unique doctor ID"""
+        return get_allocator().next_id("D")
+    
+    def _initialize_schedule(self):
+        """Initialize default schedule (shares DEFAULT_TEMPLATE until changed)"""
+        self.calendar = DoctorCalendar()
+
+    @property
+    def schedule(self) -> List[str]:
+        """Slot times the doctor works on at least one weekday"""
+        minutes = set()
+        for slots in self.calendar.template.days.values():
+            minutes.update(slots)
+        return [format_time(minute) for minute in sorted(minutes)]
+    
+    def is_available(self, date: str, time: str) -> bool:
+        """Check if doctor is available at given date and time"""
+        try:
+            return self.calendar.is_open(date_key(date), time_key(time))
+        except Exception as e:
+            print(f"Error checking availability: {e}")
+            return False
+    
+    def view_schedule(self) -> str:
+        """View doctor's schedule"""
+        schedule_info = f"\n=== DOCTOR SCHEDULE ===\n"
+        schedule_info += f"Doctor ID: {self.doctor_id}\n"
+        schedule_info += f"Name: {self.name}\n"
+        schedule_info += f"Specialty: {self.specialty}\n"
+        days = self.calendar.template.days
+        if len(set(days.values())) == 1:
+            schedule_info += f"Available Times: {', '.join(self.schedule)}\n"
+        else:
+            for weekday, slots in days.items():
+                if slots:
+                    times = ', '.join(format_time(minute) for minute in slots)
+                    schedule_info += f"{calendar.day_name[weekday]}: {times}\n"
+        if self.calendar.leave:
+            schedule_info += f"Days on Leave: {len(self.calendar.leave)}\n"
         return schedule_info 
\ No newline at end of file
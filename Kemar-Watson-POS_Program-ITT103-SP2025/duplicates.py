@@ -0,0 +1,139 @@
+import difflib
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# How far apart two registrations' ages may be and still be the same person
+# (a birthday between visits, or a slip of the key)
+AGE_TOLERANCE = 2
+# Least similarity reported as a likely duplicate
+DEFAULT_THRESHOLD = 0.8
+
+_SOUNDEX_DIGITS = {letter: str(digit) for digit, letters in enumerate(
+    ("aeiouyhw", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r")) for letter in letters}
+
+
+def soundex(word: str) -> str:
+    """American Soundex code of a word, e.g. 'Robert' and 'Rupert' -> 'R163'"""
+    letters = [char for char in word.lower() if char in _SOUNDEX_DIGITS]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    previous = _SOUNDEX_DIGITS[letters[0]]
+    for letter in letters[1:]:
+        digit = _SOUNDEX_DIGITS[letter]
+        if digit != "0" and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # H and W do not separate letters with the same code; vowels do
+        if letter not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def name_words(name: str) -> List[str]:
+    return "".join(char if char.isalpha() or char.isspace() else " " for char in name.lower()).split()
+
+
+def sorted_name(name: str) -> str:
+    """Normalised name with its words sorted, so word order does not matter"""
+    return " ".join(sorted(name_words(name)))
+
+
+def trigrams(name: str) -> Set[str]:
+    padded = "  " + sorted_name(name) + " "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def blocking_keys(name: str) -> List[str]:
+    """Keys under which a name is filed; a likely duplicate shares at least one
+
+    The Soundex codes of the first and last words (in either order) catch
+    spelling variants that sound alike, and the exact first or last word
+    catches a typo in the other one that changes its sound.
+    """
+    words = name_words(name)
+    if not words:
+        return []
+    first, last = words[0], words[-1]
+    return ["P" + "".join(sorted((soundex(first), soundex(last)))), "F" + first, "L" + last]
+
+
+def similarity(name_a: str, age_a: int, gender_a: str, name_b: str, age_b: int, gender_b: str,
+               grams_a: Optional[Set[str]] = None) -> float:
+    """Score in [0, 1] of two registrations being the same person"""
+    grams_a = grams_a if grams_a is not None else trigrams(name_a)
+    grams_b = trigrams(name_b)
+    # Dice coefficient of the name trigrams; cheap, but harsh on a typo in a short word
+    score = 2 * len(grams_a & grams_b) / ((len(grams_a) + len(grams_b)) or 1)
+    # One typo changes only a few trigrams, so names this far apart need no closer look
+    if 0.4 <= score < 0.95:
+        score = max(score, difflib.SequenceMatcher(None, sorted_name(name_a), sorted_name(name_b)).ratio())
+    words_a, words_b = name_words(name_a), name_words(name_b)
+    if words_a and words_b and sorted((soundex(words_a[0]), soundex(words_a[-1]))) == \
+            sorted((soundex(words_b[0]), soundex(words_b[-1]))):
+        # Sounds the same: count as at least a close spelling
+        score = max(score, 0.8)
+    score -= 0.03 * abs(age_a - age_b)
+    if gender_a.lower() != gender_b.lower():
+        score -= 0.1
+    return max(score, 0.0)
+
+
+class DuplicateIndex:
+    """Blocking index over patient name and age for finding likely duplicates
+
+    Each patient is filed under a few blocking keys (see blocking_keys)
+    combined with their age. A lookup reads the blocks of its own keys for
+    every age within AGE_TOLERANCE and scores only the patients found
+    there, so its cost depends on block sizes rather than on how many
+    patients are registered.
+    """
+
+    def __init__(self, patients: Dict):
+        self.patients = patients
+        self._blocks: Dict[Tuple[str, int], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def add(self, patient) -> None:
+        for key in blocking_keys(patient.name):
+            block = self._blocks.get((key, patient.age))
+            if block is None:
+                self._blocks[(key, patient.age)] = [patient.patient_id]
+            else:
+                block.append(patient.patient_id)
+
+    def _candidates(self, name: str, age: int) -> Set[str]:
+        candidates: Set[str] = set()
+        blocks = self._blocks
+        for key in blocking_keys(name):
+            for candidate_age in range(age - AGE_TOLERANCE, age + AGE_TOLERANCE + 1):
+                block = blocks.get((key, candidate_age))
+                if block:
+                    candidates.update(block)
+        return candidates
+
+    def find(self, name: str, age: int, gender: str, threshold: float = DEFAULT_THRESHOLD,
+             limit: int = 5, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Registered patients likely to be this person, best first, as (patient_id, score)"""
+        grams = trigrams(name)
+        patients = self.patients
+        matches = []
+        for patient_id in self._candidates(name, age):
+            patient = patients.get(patient_id)
+            if patient is None or patient_id == exclude:
+                continue
+            score = similarity(name, age, gender, patient.name, patient.age, patient.gender, grams)
+            if score >= threshold:
+                matches.append((patient_id, round(score, 3)))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+
+    def pairs(self, patients: Iterable, threshold: float = DEFAULT_THRESHOLD) -> Iterator[Tuple[str, str, float]]:
+        """Every likely duplicate pair among `patients` as (id, id, score), each pair once"""
+        for patient in patients:
+            for other_id, score in self.find(patient.name, patient.age, patient.gender, threshold,
+                                             limit=len(self.patients), exclude=patient.patient_id):
+                if other_id > patient.patient_id:
+                    yield patient.patient_id, other_id, score
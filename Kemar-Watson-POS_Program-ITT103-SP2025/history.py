@@ -0,0 +1,146 @@
+import bisect
+import json
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# (day, minute, appointment_id): sorts by appointment time, then ID
+Entry = Tuple[int, int, str]
+
+# Below this many recent appointments a linear scan beats keeping an ID index
+INDEX_THRESHOLD = 8
+
+
+class HistoryStore:
+    """Cold storage for older patient history entries, in an append-only file
+
+    Each archive run appends one JSON line per patient; only the offsets of
+    those lines are kept in memory, and a patient's entries are read back
+    when a query asks for them. The file is derived from the appointments
+    (which the storage log keeps), so it is started afresh when opened.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offsets: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        open(path, "wb").close()
+
+    def save(self, patient_id: str, entries: List[Entry]) -> None:
+        line = (json.dumps({"patient": patient_id, "entries": entries}, separators=(",", ":")) + "\n").encode()
+        with self._lock, open(self.path, "ab") as handle:
+            offset = handle.tell()
+            handle.write(line)
+            self._offsets.setdefault(patient_id, []).append(offset)
+
+    def load(self, patient_id: str) -> List[Entry]:
+        """Every archived entry of a patient, oldest first"""
+        entries: List[Entry] = []
+        with self._lock:
+            offsets = list(self._offsets.get(patient_id, ()))
+        if not offsets:
+            return entries
+        with open(self.path, "rb") as handle:
+            for offset in offsets:
+                handle.seek(offset)
+                entries.extend((day, minute, appointment_id)
+                               for day, minute, appointment_id in json.loads(handle.readline())["entries"])
+        entries.sort()
+        return entries
+
+
+class PatientHistory:
+    """A patient's appointment IDs in time order, with O(1) membership
+
+    Recent entries are kept in memory; `archive_before` moves older ones to
+    a HistoryStore and they are read back only when the full history is
+    asked for. The total count is maintained as entries are added, so it
+    never needs the archived part.
+    """
+
+    __slots__ = ("patient_id", "count", "archived", "archived_before", "_entries", "_index", "_store")
+
+    def __init__(self, patient_id: str):
+        self.patient_id = patient_id
+        self.count = 0
+        self.archived = 0
+        # Day number before which entries may have been archived
+        self.archived_before: Optional[int] = None
+        self._entries: List[Entry] = []
+        self._index: Optional[set] = None
+        self._store: Optional[HistoryStore] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, appointment_id: str) -> bool:
+        if self._index is not None:
+            if appointment_id in self._index:
+                return True
+        elif any(entry[2] == appointment_id for entry in self._entries):
+            return True
+        if not self.archived:
+            return False
+        return any(entry[2] == appointment_id for entry in self._store.load(self.patient_id))
+
+    def add(self, appointment_id: str, day: int, minute: int) -> bool:
+        """Record an appointment; False if it is already in the history"""
+        if self.archived_before is not None and day < self.archived_before:
+            # Could be an archived entry seen again (e.g. while replaying a log)
+            if appointment_id in self:
+                return False
+        elif appointment_id in self._hot():
+            return False
+        entry = (day, minute, appointment_id)
+        if not self._entries or entry >= self._entries[-1]:
+            self._entries.append(entry)
+        else:
+            bisect.insort(self._entries, entry)
+        if self._index is not None:
+            self._index.add(appointment_id)
+        elif len(self._entries) > INDEX_THRESHOLD:
+            self._index = {entry[2] for entry in self._entries}
+        self.count += 1
+        return True
+
+    def _hot(self):
+        """Membership test over the in-memory entries only"""
+        if self._index is not None:
+            return self._index
+        return [entry[2] for entry in self._entries]
+
+    def recent(self, limit: Optional[int] = None) -> List[str]:
+        """IDs of the in-memory entries, newest first"""
+        entries = self._entries if limit is None else self._entries[-limit:]
+        return [entry[2] for entry in reversed(entries)]
+
+    def entries(self, include_archived: bool = True) -> Iterator[Entry]:
+        """(day, minute, appointment_id) entries oldest first, reading the archived part only if asked for"""
+        if include_archived and self.archived:
+            yield from self._store.load(self.patient_id)
+        yield from list(self._entries)
+
+    def ids(self, include_archived: bool = True) -> Iterator[str]:
+        """Appointment IDs oldest first, reading the archived part only if asked for"""
+        for entry in self.entries(include_archived):
+            yield entry[2]
+
+    def archive_before(self, day: int, store: HistoryStore) -> int:
+        """Move entries dated before `day` to `store`; returns how many moved"""
+        if self._store is not None and self._store is not store:
+            raise ValueError("History is already archived to a different store")
+        cut = bisect.bisect_left(self._entries, (day,))
+        if cut:
+            old, self._entries = self._entries[:cut], self._entries[cut:]
+            store.save(self.patient_id, old)
+            self._store = store
+            self.archived += len(old)
+            if self._index is not None:
+                self._index.difference_update(entry[2] for entry in old)
+                if len(self._entries) <= INDEX_THRESHOLD:
+                    self._index = None
+        if self._store is not None:
+            self.archived_before = max(day, self.archived_before or day)
+        return cut
@@ -1,233 +1,1138 @@
-from datetime import datetime
-from typing import Dict, Optional
-from patient import Patient
-from doctor import Doctor
-from appointment import Appointment
-from bill import Bill
-
-class HospitalSystem:
-    """Main hospital management system class"""
-    
-    def __init__(self):
-        self.patients: Dict[str, Patient] = {}
-        self.doctors: Dict[str, Doctor] = {}
-        self.appointments: Dict[str, Appointment] = {}
-        self.bills: Dict[str, Bill] = {}
-        self.month= datetime.now().date().month
-        self.year = datetime.now().date().year
-        self.day = datetime.now().date().day
-    
-    def add_patient(self, name: str, age: int, gender: str) -> Optional[str]:
-        """Add a new patient to the system"""
-        try:
-            patient = Patient(name, age, gender)
-            if patient.validate():
-                self.patients[patient.patient_id] = patient
-                print(f"Patient registered successfully! Patient ID: {patient.patient_id}")
-                return patient.patient_id
-            else:
-                print("Invalid patient data. Please try again.")
-                return None
-        except Exception as e:
-            print(f"Error adding patient: {e}")
-            return None
-    
-    def add_doctor(self, name: str, age: int, gender: str, specialty: str) -> Optional[str]:
-        """Add a new doctor to the system"""
-        try:
-            doctor = Doctor(name, age, gender, specialty)
-            if doctor.validate():
-                self.doctors[doctor.doctor_id] = doctor
-                print(f"Doctor added successfully! Doctor ID: {doctor.doctor_id}")
-                return doctor.doctor_id
-            else:
-                print("Invalid doctor data. Please try again.")
-                return None
-        except Exception as e:
-            print(f"Error adding doctor: {e}")
-            return None
-    
-    def book_appointment(self, patient_id: str, doctor_id: str, date: str, time: str) -> Optional[str]:
-        """Book an appointment between patient and doctor"""
-        try:
-            # Validate patient and doctor exist
-            if patient_id not in self.patients:
-                print("Patient not found!")
-                return None
-            
-            if doctor_id not in self.doctors:
-                print("Doctor not found!")
-                return None
-            
-            patient = self.patients[patient_id]
-            doctor = self.doctors[doctor_id]
-            
-            # Check if doctor is available
-            if not doctor.is_available(date, time):
-                print("Doctor is not available at the specified time!")
-                return None
-            
-            # Check for scheduling conflicts
-            for appointment in self.appointments.values():
-                if (appointment.doctor.doctor_id == doctor_id and 
-                    appointment.date == date and 
-                    appointment.time == time and 
-                    appointment.status != "Cancelled"):
-                    print("This time slot is already booked!")
-                    return None
-            
-            # Create appointment
-            appointment = Appointment(patient, doctor, date, time)
-            self.appointments[appointment.appointment_id] = appointment
-            
-            # Add to patient's appointment list
-            patient.book_appointment(appointment)
-            
-            print(f"Appointment booked successfully! Appointment ID: {appointment.appointment_id}")
-            return appointment.appointment_id
-            
-        except Exception as e:
-            print(f"Error booking appointment: {e}")
-            return None
-    
-    def cancel_appointment(self, appointment_id: str) -> bool:
-        """Cancel an appointment"""
-        try:
-            if appointment_id in self.appointments:
-                appointment = self.appointments[appointment_id]
-                if appointment.cancel():
-                    print(f"Appointment {appointment_id} cancelled successfully!")
-                    return True
-                else:
-                    print("Unable to cancel appointment.")
-                    return False
-            else:
-                print("Appointment not found!")
-                return False
-        except Exception as e:
-            print(f"Error cancelling appointment: {e}")
-            return False
-    
-    def generate_bill(self, appointment_id: str) -> Optional[str]:
-        """Generate a bill for an appointment"""
-        try:
-            if appointment_id not in self.appointments:
-                print("Appointment not found!")
-                return None
-            
-            appointment = self.appointments[appointment_id]
-            bill = Bill(appointment)
-            self.bills[appointment_id] = bill
-            
-            print("Bill generated successfully!")
-            return appointment_id
-            
-        except Exception as e:
-            print(f"Error generating bill: {e}")
-            return None
-    
-    def add_service_to_bill(self, appointment_id: str, service_name: str, fee: float) -> bool:
-        """Add additional service to a bill"""
-        try:
-            if appointment_id in self.bills:
-                bill = self.bills[appointment_id]
-                if bill.add_service(service_name, fee):
-                    print(f"Service '{service_name}' added to bill successfully!")
-                    return True
-                else:
-                    print("Invalid service fee!")
-                    return False
-            else:
-                print("Bill not found! Generate bill first.")
-                return False
-        except Exception as e:
-            print(f"Error adding service: {e}")
-            return False
-    
-    def view_patient_details(self, patient_id: str) -> None:
-        """View patient details"""
-        try:
-            if patient_id in self.patients:
-                patient = self.patients[patient_id]
-                print(patient.view_profile())
-            else:
-                print("Patient not found!")
-        except Exception as e:
-            print(f"Error viewing patient details: {e}")
-    
-    def view_doctor_details(self, doctor_id: str) -> None:
-        """View doctor details"""
-        try:
-            if doctor_id in self.doctors:
-                doctor = self.doctors[doctor_id]
-                print(doctor.view_schedule())
-            else:
-                print("Doctor not found!")
-        except Exception as e:
-            print(f"Error viewing doctor details: {e}")
-    
-    def view_appointment(self, appointment_id: str) -> None:
-        """View appointment details"""
-        try:
-            if appointment_id in self.appointments:
-                appointment = self.appointments[appointment_id]
-                print(appointment.display())
-            else:
-                print("Appointment not found!")
-        except Exception as e:
-            print(f"Error viewing appointment: {e}")
-    
-    def view_bill(self, appointment_id: str) -> None:
-        """View bill/receipt"""
-        try:
-            if appointment_id in self.bills:
-                bill = self.bills[appointment_id]
-                print(bill.generate_receipt())
-            else:
-                print("Bill not found! Generate bill first.")
-        except Exception as e:
-            print(f"Error viewing bill: {e}")
-    
-    def list_all_patients(self) -> None:
-        """List all patients"""
-        if not self.patients:
-            print("No patients registered.")
-            return
-        
-        print("\n=== ALL PATIENTS ===")
-        for patient_id, patient in self.patients.items():
-            print(f"ID: {patient_id} | {patient.name} | Age: {patient.age} | Gender: {patient.gender}")
-    
-    def list_all_doctors(self) -> None:
-        """List all doctors"""
-        if not self.doctors:
-            print("No doctors registered.")
-            return
-        
-        print("\n=== ALL DOCTORS ===")
-        for doctor_id, doctor in self.doctors.items():
-            print(f"ID: {doctor_id} | {doctor.name} | Specialty: {doctor.specialty} | Gender: {doctor.gender}")
-    
-    def list_all_appointments(self) -> None:
-        """List all appointments"""
-        if not self.appointments:
-            print("No appointments scheduled.")
-            return
-        
-        print("\n=== ALL APPOINTMENTS ===")
-        for appointment_id, appointment in self.appointments.items():
-            print(f"ID: {appointment_id} | Patient: {appointment.patient.name} | Doctor: {appointment.doctor.name} | Date: {appointment.date} | Time: {appointment.time} | Status: {appointment.status}") 
-
-
-    def is_available(self, doctor_id: str, date: str, time: str) -> bool:
-        """Check if a doctor is available at a specific date and time"""
-        try:
-            if doctor_id in self.doctors:
-                doctor = self.doctors[doctor_id]
-                return doctor.is_available(date, time)
-            else:
-                print("Doctor not found!")
-                return False
-        except Exception as e:
-            print(f"Error checking availability: {e}")
-            return False
\ No newline at end of file
+import heapq
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from patient import Patient
+from doctor import Doctor
+from appointment import Appointment
+from bill import Bill
+from booking_index import BookingIndex
+from calendar_model import WeeklyTemplate, date_key, format_date, format_time, time_key
+from locking import LockStripes, NoLocks
+from indexes import BucketIndex, NameIndex
+from columnar import STATUSES, AppointmentColumns, status_name
+from ledger import Ledger, format_cents, to_cents
+from catalog import CONSULTATION, SERVICE, PriceCatalog, service_code, specialty_key
+from history import HistoryStore
+from metrics import NULL_METRICS, Metrics, timed
+from listing import (DEFAULT_PAGE_SIZE, InsertionOrder, appointment_filter, appointment_row, doctor_filter,
+                     doctor_row, patient_filter, patient_row)
+import bulk_io
+from storage import (WriteAheadLog, ADD_PATIENT, ADD_DOCTOR, BOOK_APPOINTMENT,
+                     CANCEL_APPOINTMENT, CONFIRM_APPOINTMENT, GENERATE_BILL, ADD_SERVICE, SET_TEMPLATE, SET_DAY_SLOTS,
+                     ADD_LEAVE, ADD_HOLIDAY, JOIN_WAITLIST, LEAVE_WAITLIST, SET_STATUS, ARCHIVE_APPOINTMENTS,
+                     SET_PRICE, GENERATE_BILLS, BOOK_APPOINTMENTS)
+from archive import AppointmentArchive
+from id_allocator import get_allocator
+from waitlist import Waitlist, WaitlistEntry
+from duplicates import DEFAULT_THRESHOLD, DuplicateIndex
+from scheduler import Placement, SlotRequest, assign, free_slots_by_specialty
+
+class HospitalSystem:
+    """Main hospital management system class"""
+    
+    def __init__(self, storage: Optional[WriteAheadLog] = None, thread_safe: bool = False,
+                 lock_granularity: str = "doctor", metrics: Optional[Metrics] = None,
+                 echo: Optional[Callable[[str], None]] = print):
+        # Where user-facing messages go; None keeps bulk and server use silent
+        self.echo = echo
+        # Counters, latencies and events of the operations; NULL_METRICS when switched off
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.patients: Dict[str, Patient] = {}
+        self.doctors: Dict[str, Doctor] = {}
+        self.appointments: Dict[str, Appointment] = {}
+        self.bills: Dict[str, Bill] = {}
+        # Revenue per day and per doctor, in cents
+        self.ledger = Ledger()
+        # Service prices by code and consultation fees by specialty, versioned by effective date
+        self.catalog = PriceCatalog()
+        self.booking_index = BookingIndex()
+        # Day numbers closed for every doctor, shared with each DoctorCalendar
+        self.holidays: Set[int] = set()
+        # Normalised specialty -> IDs of the doctors practising it
+        self.specialty_index: Dict[str, List[str]] = {}
+        # Secondary indexes behind the query methods
+        self.patient_name_index = NameIndex()
+        self.doctor_day_index = BucketIndex()
+        self.day_index = BucketIndex()
+        self.status_index = BucketIndex()
+        # Stable listing order for the iter_*/page_* methods
+        self.patient_order = InsertionOrder()
+        self.doctor_order = InsertionOrder()
+        self.appointment_order = InsertionOrder()
+        # Patients waiting for a freed slot, per doctor or specialty and day
+        self.waitlist = Waitlist()
+        # Month partitions of past appointments and bills; ID lookups fall back to it
+        self.archive: Optional[AppointmentArchive] = None
+        # Cold storage for older patient history, set by archive_patient_history
+        self.history_store: Optional[HistoryStore] = None
+        # Columnar copy of the appointments for reports, built on first use
+        self.columns: Optional[AppointmentColumns] = None
+        # Blocking index for spotting patients registered twice, built on first use
+        self.duplicates: Optional[DuplicateIndex] = None
+        self.month= datetime.now().date().month
+        self.year = datetime.now().date().year
+        self.day = datetime.now().date().day
+        if lock_granularity not in ("doctor", "slot"):
+            raise ValueError("lock_granularity must be 'doctor' or 'slot'")
+        # Bookings lock only their doctor (or slot), so different doctors proceed in parallel
+        self.lock_granularity = lock_granularity
+        self._locks = LockStripes() if thread_safe else NoLocks()
+        self._checkpoint_due = False
+        self.storage = None
+        if storage is not None:
+            storage.load(self)
+            self.storage = storage
+
+    def _slot_lock(self, doctor_id: str, day: int, minute: int):
+        """Lock guarding the check-then-insert for one slot"""
+        if self.lock_granularity == "slot":
+            return self._locks.lock_for((doctor_id, day, minute))
+        return self._locks.lock_for(doctor_id)
+
+    def _doctor_lock(self, doctor_id: str):
+        """Lock guarding every slot of a doctor, for schedule changes"""
+        if self.lock_granularity == "slot":
+            return self._locks.all()
+        return self._locks.lock_for(doctor_id)
+
+    def _appointment_lock(self, appointment: Appointment):
+        return self._slot_lock(appointment.doctor.doctor_id, appointment.date_key, appointment.time_key)
+
+    def _report(self, operation: str, outcome: str, message: str, **fields) -> None:
+        """Count an operation outcome, emit it as an event and show its message"""
+        self.metrics.event(operation, outcome, message=message, **fields)
+        self._say(message)
+
+    def _say(self, message: str) -> None:
+        if self.echo is not None:
+            self.echo(message)
+
+    def _log(self, record: list) -> None:
+        """Write a mutation to the storage log, if one is attached"""
+        if self.storage is not None and self.storage.append(record):
+            self._checkpoint_due = True
+
+    def _checkpoint_if_due(self) -> None:
+        """Snapshot the storage once enough records were logged
+
+        Must be called without holding a slot lock: the checkpoint takes all
+        of them so the snapshot is consistent. They are held only while the
+        records are copied; the snapshot is written in the background.
+        """
+        if self._checkpoint_due and self.storage is not None:
+            self._checkpoint_due = False
+            with self._locks.all():
+                self.storage.checkpoint(self, wait=False)
+
+    def close(self) -> None:
+        """Flush and close the attached storage"""
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+
+    def _register_patient(self, patient: Patient) -> None:
+        if patient.patient_id not in self.patients:
+            self.patient_name_index.add(patient.name, patient.patient_id)
+            self.patient_order.append(patient.patient_id)
+        self.patients[patient.patient_id] = patient
+        if self.duplicates is not None:
+            self.duplicates.add(patient)
+
+    def _register_doctor(self, doctor: Doctor) -> None:
+        doctor.calendar.holidays = self.holidays
+        if doctor.doctor_id not in self.doctors:
+            self.specialty_index.setdefault(doctor.specialty.strip().lower(), []).append(doctor.doctor_id)
+            self.doctor_order.append(doctor.doctor_id)
+        self.doctors[doctor.doctor_id] = doctor
+
+    def _register_appointment(self, appointment: Appointment) -> None:
+        """Store an appointment and update the indexes that reference it"""
+        appointment_id = appointment.appointment_id
+        if appointment_id not in self.appointments:
+            self.appointment_order.append(appointment_id)
+        self.appointments[appointment_id] = appointment
+        self.doctor_day_index.add((appointment.doctor.doctor_id, appointment.date_key), appointment_id)
+        self.day_index.add(appointment.date_key, appointment_id)
+        self.status_index.add(appointment.status, appointment_id)
+        if appointment.status != "Cancelled":
+            doctor = appointment.doctor
+            if self.booking_index.book(doctor.doctor_id, appointment.date_key,
+                                       appointment.time_key, appointment.appointment_id):
+                doctor.calendar.book(appointment.date_key, appointment.time_key)
+        appointment.patient.book_appointment(appointment)
+        if self.columns is not None:
+            self.columns.add(appointment)
+
+    def _release_appointment(self, appointment: Appointment) -> None:
+        """Update the indexes after an appointment was cancelled"""
+        self._status_changed(appointment)
+        doctor = appointment.doctor
+        if self.booking_index.release(doctor.doctor_id, appointment.date_key,
+                                      appointment.time_key, appointment.appointment_id):
+            doctor.calendar.release(appointment.date_key, appointment.time_key)
+
+    def _status_changed(self, appointment: Appointment) -> None:
+        """Move an appointment to the status bucket matching its status"""
+        for status in STATUSES:
+            if status != appointment.status:
+                self.status_index.discard(status, appointment.appointment_id)
+        self.status_index.add(appointment.status, appointment.appointment_id)
+        if self.columns is not None:
+            self.columns.set_status(appointment)
+
+    def _unregister_appointment(self, appointment_id: str) -> Optional[Appointment]:
+        """Remove an archived appointment and its bill from memory and every index"""
+        appointment = self.appointments.pop(appointment_id, None)
+        if appointment is None:
+            return None
+        doctor_id, day, minute = appointment.doctor.doctor_id, appointment.date_key, appointment.time_key
+        if self.bills.pop(appointment_id, None) is not None:
+            self.ledger.forget(appointment_id)
+        self.doctor_day_index.discard((doctor_id, day), appointment_id)
+        self.day_index.discard(day, appointment_id)
+        self.status_index.discard(appointment.status, appointment_id)
+        entry = self.booking_index.get(doctor_id, day, minute)
+        if entry is not None and entry[0] == appointment_id:
+            if entry[1] != "Cancelled":
+                appointment.doctor.calendar.release(day, minute)
+            self.booking_index.drop(doctor_id, day, minute, appointment_id)
+        if self.columns is not None:
+            self.columns.forget(appointment_id)
+        return appointment
+
+    def _register_bill(self, bill: Bill) -> None:
+        self.bills[bill.appointment.appointment_id] = bill
+        self.ledger.post(bill)
+        if self.columns is not None:
+            self.columns.set_bill(bill)
+
+    def _bill_changed(self, bill: Bill) -> None:
+        self.ledger.post(bill)
+        if self.columns is not None:
+            self.columns.set_bill(bill)
+    
+    @timed("add_patient")
+    def add_patient(self, name: str, age: int, gender: str, patient_id: Optional[str] = None,
+                    check_duplicates: bool = False) -> Optional[str]:
+        """Add a new patient to the system, with a new ID unless one is given
+
+        With check_duplicates, a registration that looks like an existing
+        patient is refused and the likely matches are reported instead.
+        """
+        try:
+            if patient_id is not None and patient_id in self.patients:
+                self._report("add_patient", "rejected", f"Patient ID {patient_id} already exists!")
+                return None
+            patient = Patient(name, age, gender, patient_id)
+            if patient.validate():
+                if check_duplicates:
+                    matches = self.find_duplicate_patients(name, age, gender)
+                    if matches:
+                        listed = ", ".join(f"{self.patients[match].name} ({match})" for match, _ in matches)
+                        self._report("add_patient", "duplicate", f"Possible duplicate of: {listed}",
+                                     matches=[match for match, _ in matches])
+                        return None
+                self._register_patient(patient)
+                self._log([ADD_PATIENT, patient.patient_id, name, age, gender])
+                self._checkpoint_if_due()
+                self._report("add_patient", "ok", f"Patient registered successfully! Patient ID: {patient.patient_id}", patient_id=patient.patient_id)
+                return patient.patient_id
+            else:
+                self._report("add_patient", "rejected", "Invalid patient data. Please try again.")
+                return None
+        except Exception as e:
+            self._report("add_patient", "error", f"Error adding patient: {e}")
+            return None
+    
+    @timed("add_doctor")
+    def add_doctor(self, name: str, age: int, gender: str, specialty: str,
+                   doctor_id: Optional[str] = None) -> Optional[str]:
+        """Add a new doctor to the system, with a new ID unless one is given"""
+        try:
+            if doctor_id is not None and doctor_id in self.doctors:
+                self._report("add_doctor", "rejected", f"Doctor ID {doctor_id} already exists!")
+                return None
+            doctor = Doctor(name, age, gender, specialty, doctor_id)
+            if doctor.validate():
+                self._register_doctor(doctor)
+                self._log([ADD_DOCTOR, doctor.doctor_id, name, age, gender, specialty])
+                self._checkpoint_if_due()
+                self._report("add_doctor", "ok", f"Doctor added successfully! Doctor ID: {doctor.doctor_id}", doctor_id=doctor.doctor_id)
+                return doctor.doctor_id
+            else:
+                self._report("add_doctor", "rejected", "Invalid doctor data. Please try again.")
+                return None
+        except Exception as e:
+            self._report("add_doctor", "error", f"Error adding doctor: {e}")
+            return None
+    
+    @timed("book_appointment")
+    def book_appointment(self, patient_id: str, doctor_id: str, date: str, time: str) -> Optional[str]:
+        """Book an appointment between patient and doctor"""
+        try:
+            # Validate patient and doctor exist
+            if patient_id not in self.patients:
+                self._report("book_appointment", "rejected", "Patient not found!")
+                return None
+            
+            if doctor_id not in self.doctors:
+                self._report("book_appointment", "rejected", "Doctor not found!")
+                return None
+            
+            patient = self.patients[patient_id]
+            doctor = self.doctors[doctor_id]
+            
+            try:
+                day, minute = date_key(date), time_key(time)
+            except ValueError:
+                self._report("book_appointment", "rejected", "Invalid date or time! Use YYYY-MM-DD and HH:MM.")
+                return None
+            
+            # Check if doctor is available
+            if not doctor.calendar.is_open(day, minute):
+                self._report("book_appointment", "rejected", "Doctor is not available at the specified time!")
+                return None
+            
+            with self._slot_lock(doctor_id, day, minute):
+                # Check for scheduling conflicts
+                if self.booking_index.is_booked(doctor_id, day, minute):
+                    self._report("book_appointment", "rejected", "This time slot is already booked!")
+                    return None
+                
+                # Create appointment
+                appointment = Appointment(patient, doctor, day, minute,
+                                          consultation_cents=self.catalog.consultation_cents(doctor.specialty, day))
+                self._register_appointment(appointment)
+                self._log([BOOK_APPOINTMENT, appointment.appointment_id, patient_id, doctor_id,
+                           appointment.date, appointment.time, appointment.consultation_cents])
+            self._checkpoint_if_due()
+            
+            self._report("book_appointment", "ok", f"Appointment booked successfully! Appointment ID: {appointment.appointment_id}", appointment_id=appointment.appointment_id)
+            return appointment.appointment_id
+            
+        except Exception as e:
+            self._report("book_appointment", "error", f"Error booking appointment: {e}")
+            return None
+    
+    @timed("confirm_appointment")
+    def confirm_appointment(self, appointment_id: str) -> bool:
+        """Confirm a scheduled appointment"""
+        try:
+            if appointment_id in self.appointments:
+                appointment = self.appointments[appointment_id]
+                with self._appointment_lock(appointment):
+                    confirmed = appointment.confirm()
+                    if confirmed:
+                        self._status_changed(appointment)
+                        self._log([CONFIRM_APPOINTMENT, appointment_id])
+                self._checkpoint_if_due()
+                if confirmed:
+                    self._report("confirm_appointment", "ok", f"Appointment {appointment_id} confirmed successfully!", appointment_id=appointment_id)
+                    return True
+                else:
+                    self._report("confirm_appointment", "rejected", "Unable to confirm appointment.")
+                    return False
+            else:
+                self._report("confirm_appointment", "rejected", "Appointment not found!")
+                return False
+        except Exception as e:
+            self._report("confirm_appointment", "error", f"Error confirming appointment: {e}")
+            return False
+    
+    @timed("cancel_appointment")
+    def cancel_appointment(self, appointment_id: str) -> bool:
+        """Cancel an appointment"""
+        try:
+            if appointment_id in self.appointments:
+                appointment = self.appointments[appointment_id]
+                with self._appointment_lock(appointment):
+                    cancelled = appointment.cancel()
+                    if cancelled:
+                        self._release_appointment(appointment)
+                        self._log([CANCEL_APPOINTMENT, appointment_id])
+                self._checkpoint_if_due()
+                if cancelled:
+                    self._report("cancel_appointment", "ok", f"Appointment {appointment_id} cancelled successfully!", appointment_id=appointment_id)
+                    self._backfill(appointment.doctor, appointment.date_key, appointment.time_key)
+                    return True
+                else:
+                    self._report("cancel_appointment", "rejected", "Unable to cancel appointment.")
+                    return False
+            else:
+                self._report("cancel_appointment", "rejected", "Appointment not found!")
+                return False
+        except Exception as e:
+            self._report("cancel_appointment", "error", f"Error cancelling appointment: {e}")
+            return False
+    
+    @timed("join_waitlist")
+    def join_waitlist(self, patient_id: str, start_date: str, end_date: str, doctor_id: Optional[str] = None,
+                      specialty: Optional[str] = None, priority: int = 0, auto_book: bool = True) -> Optional[str]:
+        """Wait for a slot with a doctor (or any doctor of a specialty) between two dates
+
+        When a matching slot is freed by a cancellation the patient is booked
+        into it, or with auto_book=False offered it (see accept_offer).
+        """
+        try:
+            if patient_id not in self.patients:
+                self._report("join_waitlist", "rejected", "Patient not found!")
+                return None
+            if doctor_id is not None and doctor_id not in self.doctors:
+                self._report("join_waitlist", "rejected", "Doctor not found!")
+                return None
+            entry = WaitlistEntry(patient_id, date_key(start_date), date_key(end_date), doctor_id, specialty,
+                                  int(priority), bool(auto_book))
+            error = entry.check()
+            if error is not None:
+                self._report("join_waitlist", "rejected", f"Invalid waitlist request: {error}")
+                return None
+            self.waitlist.add(entry)
+            self._log([JOIN_WAITLIST] + entry.to_record())
+            self._checkpoint_if_due()
+            self._report("join_waitlist", "ok", f"Patient added to the waitlist! Waitlist entry ID: {entry.entry_id}",
+                         entry_id=entry.entry_id)
+            return entry.entry_id
+        except Exception as e:
+            self._report("join_waitlist", "error", f"Error joining waitlist: {e}")
+            return None
+
+    def leave_waitlist(self, entry_id: str) -> bool:
+        """Take a patient off the waitlist"""
+        if self.waitlist.remove(entry_id) is None:
+            self._report("leave_waitlist", "rejected", "Waitlist entry not found!")
+            return False
+        self._log([LEAVE_WAITLIST, entry_id])
+        self._checkpoint_if_due()
+        self._report("leave_waitlist", "ok", f"Waitlist entry {entry_id} removed.", entry_id=entry_id)
+        return True
+
+    def _backfill(self, doctor: Doctor, day: int, minute: int) -> None:
+        """Hand a freed slot to the best matching waitlist entry, if any"""
+        if not self.waitlist.entries or not doctor.calendar.is_free(day, minute):
+            return
+        entry = self.waitlist.take_match(doctor.doctor_id, doctor.specialty, day)
+        if entry is None:
+            return
+        date, time = format_date(day), format_time(minute)
+        if entry.auto_book:
+            self._book_from_waitlist(entry.entry_id, doctor.doctor_id, date, time)
+        else:
+            self.waitlist.offers[entry.entry_id] = (doctor.doctor_id, day, minute)
+            self._report("waitlist", "offered",
+                         f"Slot {date} {time} with {doctor.name} offered to patient {entry.patient_id} "
+                         f"(waitlist entry {entry.entry_id}).",
+                         entry_id=entry.entry_id, doctor_id=doctor.doctor_id)
+
+    def _book_from_waitlist(self, entry_id: str, doctor_id: str, date: str, time: str) -> Optional[str]:
+        entry = self.waitlist.entries[entry_id]
+        appointment_id = self.book_appointment(entry.patient_id, doctor_id, date, time)
+        if appointment_id is None:
+            # Someone else took the slot first; keep waiting
+            self.waitlist.requeue(entry_id)
+            return None
+        self.waitlist.remove(entry_id)
+        self._log([LEAVE_WAITLIST, entry_id])
+        self._checkpoint_if_due()
+        self._report("waitlist", "booked", f"Waitlisted patient {entry.patient_id} booked into {date} {time} "
+                     f"(appointment {appointment_id}).", entry_id=entry_id, appointment_id=appointment_id)
+        return appointment_id
+
+    def accept_offer(self, entry_id: str) -> Optional[str]:
+        """Book the slot offered to a waitlist entry; returns the appointment ID"""
+        offer = self.waitlist.offers.get(entry_id)
+        if offer is None:
+            self._report("accept_offer", "rejected", "No open offer for that waitlist entry!")
+            return None
+        doctor_id, day, minute = offer
+        return self._book_from_waitlist(entry_id, doctor_id, format_date(day), format_time(minute))
+
+    def decline_offer(self, entry_id: str) -> bool:
+        """Turn down an offered slot: it goes to the next in line and the entry waits again"""
+        offer = self.waitlist.offers.get(entry_id)
+        if offer is None:
+            self._report("decline_offer", "rejected", "No open offer for that waitlist entry!")
+            return False
+        doctor_id, day, minute = offer
+        del self.waitlist.offers[entry_id]
+        doctor = self.doctors[doctor_id]
+        self._backfill(doctor, day, minute)
+        self.waitlist.requeue(entry_id)
+        self._report("decline_offer", "ok", f"Offer declined; waitlist entry {entry_id} is waiting again.",
+                     entry_id=entry_id)
+        return True
+
+    @timed("generate_bill")
+    def generate_bill(self, appointment_id: str) -> Optional[str]:
+        """Generate a bill for an appointment"""
+        try:
+            if appointment_id not in self.appointments:
+                self._report("generate_bill", "rejected", "Appointment not found!")
+                return None
+            
+            appointment = self.appointments[appointment_id]
+            with self._appointment_lock(appointment):
+                bill = Bill(appointment)
+                self._register_bill(bill)
+                self._log([GENERATE_BILL, appointment_id, bill.issued_at.isoformat()])
+            self._checkpoint_if_due()
+            
+            self._report("generate_bill", "ok", "Bill generated successfully!", appointment_id=appointment_id)
+            return appointment_id
+            
+        except Exception as e:
+            self._report("generate_bill", "error", f"Error generating bill: {e}")
+            return None
+    
+    @timed("add_service")
+    def add_service_to_bill(self, appointment_id: str, service_name: str, fee: Optional[float] = None) -> bool:
+        """Add additional service to a bill
+
+        Without a fee, `service_name` is a catalog code and the service is
+        charged at its price on the appointment date.
+        """
+        try:
+            if appointment_id in self.bills:
+                bill = self.bills[appointment_id]
+                if fee is None:
+                    priced = self.catalog.service(service_name, bill.appointment.date_key)
+                    if priced is None:
+                        self._report("add_service", "rejected", f"No price for service code '{service_name}'!")
+                        return False
+                    service_name, fee = priced[0], priced[1] / 100
+                with self._appointment_lock(bill.appointment):
+                    added = bill.add_service(service_name, fee)
+                    if added:
+                        self._bill_changed(bill)
+                        self._log([ADD_SERVICE, appointment_id, service_name, fee])
+                self._checkpoint_if_due()
+                if added:
+                    self._report("add_service", "ok", f"Service '{service_name}' added to bill successfully!", appointment_id=appointment_id)
+                    return True
+                else:
+                    self._report("add_service", "rejected", "Invalid service fee!")
+                    return False
+            else:
+                self._report("add_service", "rejected", "Bill not found! Generate bill first.")
+                return False
+        except Exception as e:
+            self._report("add_service", "error", f"Error adding service: {e}")
+            return False
+
+    @timed("bill_confirmed")
+    def bill_confirmed(self, date: Optional[str] = None, doctor_id: Optional[str] = None) -> int:
+        """Bill every confirmed, unbilled appointment on a date and/or of a doctor in one pass
+
+        All the bills share one issue time and one log record; a single
+        message reports the count. Returns the number of bills generated.
+        """
+        if date is None and doctor_id is None:
+            self._report("bill_confirmed", "rejected", "Give a date, a doctor or both!")
+            return 0
+        if doctor_id is not None and doctor_id not in self.doctors:
+            self._report("bill_confirmed", "rejected", "Doctor not found!")
+            return 0
+        try:
+            day = date_key(date) if date is not None else None
+        except ValueError:
+            self._report("bill_confirmed", "rejected", "Invalid date format! Use YYYY-MM-DD.")
+            return 0
+        if day is None:
+            ids = self.status_index.get("Confirmed")
+        elif doctor_id is None:
+            ids = self.day_index.get(day)
+        else:
+            ids = self.doctor_day_index.get((doctor_id, day))
+        issued_at = datetime.now().replace(microsecond=0)
+        billed = []
+        with self._locks.all():
+            bills = self.bills
+            for appointment in self._resolve_appointments(ids):
+                if (appointment.status != "Confirmed" or appointment.appointment_id in bills
+                        or (doctor_id is not None and appointment.doctor.doctor_id != doctor_id)):
+                    continue
+                self._register_bill(Bill(appointment, issued_at))
+                billed.append(appointment.appointment_id)
+            if billed:
+                self._log([GENERATE_BILLS, issued_at.isoformat(), billed])
+        self._checkpoint_if_due()
+        self._report("bill_confirmed", "ok", f"Generated {len(billed)} bills for confirmed appointments.",
+                     billed=len(billed))
+        return len(billed)
+
+    def set_service_price(self, code: str, name: str, price: float, effective_date: Optional[str] = None) -> bool:
+        """Add a service to the price list, or price it anew from a date (default today)"""
+        return self._set_price(SERVICE, service_code(code), name.strip(), price, effective_date)
+
+    def set_consultation_fee(self, specialty: str, price: float, effective_date: Optional[str] = None) -> bool:
+        """Consultation fee of a specialty for appointments from a date (default today)"""
+        return self._set_price(CONSULTATION, specialty_key(specialty), specialty.strip(), price, effective_date)
+
+    def _set_price(self, kind: str, key: str, name: str, price: float, effective_date: Optional[str]) -> bool:
+        try:
+            cents = to_cents(price)
+            day = date_key(effective_date) if effective_date else datetime.now().date().toordinal()
+        except (ValueError, ArithmeticError):
+            self._report("set_price", "rejected", "Invalid price or date!")
+            return False
+        if cents <= 0 or not key or not name:
+            self._report("set_price", "rejected", "A price needs a code or specialty, a name and a positive amount!")
+            return False
+        record = [kind, key, name, day, cents]
+        with self._locks.all():
+            self.catalog.apply(record)
+            self._log([SET_PRICE] + record)
+        self._checkpoint_if_due()
+        self._report("set_price", "ok", f"Price of {name} set to JMD$ {format_cents(cents)} from {format_date(day)}.",
+                     kind=kind, key=key)
+        return True
+    
+    def view_patient_details(self, patient_id: str) -> None:
+        """View patient details"""
+        try:
+            if patient_id in self.patients:
+                patient = self.patients[patient_id]
+                self._say(patient.view_profile())
+            else:
+                self._say("Patient not found!")
+        except Exception as e:
+            self._say(f"Error viewing patient details: {e}")
+    
+    def view_doctor_details(self, doctor_id: str) -> None:
+        """View doctor details"""
+        try:
+            if doctor_id in self.doctors:
+                doctor = self.doctors[doctor_id]
+                self._say(doctor.view_schedule())
+            else:
+                self._say("Doctor not found!")
+        except Exception as e:
+            self._say(f"Error viewing doctor details: {e}")
+    
+    def view_appointment(self, appointment_id: str) -> None:
+        """View appointment details"""
+        try:
+            appointment = self.find_appointment(appointment_id)
+            if appointment is not None:
+                self._say(appointment.display())
+            else:
+                self._say("Appointment not found!")
+        except Exception as e:
+            self._say(f"Error viewing appointment: {e}")
+    
+    def view_bill(self, appointment_id: str) -> None:
+        """View bill/receipt"""
+        try:
+            bill = self.find_bill(appointment_id)
+            if bill is not None:
+                self._say(bill.generate_receipt())
+            else:
+                self._say("Bill not found! Generate bill first.")
+        except Exception as e:
+            self._say(f"Error viewing bill: {e}")
+    
+    def list_all_patients(self) -> None:
+        """List all patients"""
+        if not self.patients:
+            self._say("No patients registered.")
+            return
+        
+        self._say("\n=== ALL PATIENTS ===")
+        for patient in self.iter_patients():
+            self._say(patient_row(patient))
+    
+    def list_all_doctors(self) -> None:
+        """List all doctors"""
+        if not self.doctors:
+            self._say("No doctors registered.")
+            return
+        
+        self._say("\n=== ALL DOCTORS ===")
+        for doctor in self.iter_doctors():
+            self._say(doctor_row(doctor))
+    
+    def list_all_appointments(self) -> None:
+        """List all appointments"""
+        if not self.appointments:
+            self._say("No appointments scheduled.")
+            return
+        
+        self._say("\n=== ALL APPOINTMENTS ===")
+        for appointment in self.iter_appointments():
+            self._say(appointment_row(appointment))
+
+    def iter_patients(self, gender: Optional[str] = None, min_age: Optional[int] = None,
+                      max_age: Optional[int] = None) -> Iterator[Patient]:
+        """Yield patients in registration order, optionally filtered"""
+        predicate = patient_filter(gender, min_age, max_age)
+        return (patient for _, patient in self.patient_order.scan(self.patients, 0, predicate))
+
+    def iter_doctors(self, specialty: Optional[str] = None) -> Iterator[Doctor]:
+        """Yield doctors in registration order, optionally of one specialty"""
+        predicate = doctor_filter(specialty)
+        return (doctor for _, doctor in self.doctor_order.scan(self.doctors, 0, predicate))
+
+    def iter_appointments(self, status: Optional[str] = None, doctor_id: Optional[str] = None,
+                          patient_id: Optional[str] = None, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> Iterator[Appointment]:
+        """Yield appointments in booking order, optionally filtered"""
+        predicate = appointment_filter(status, doctor_id, patient_id, start_date, end_date)
+        return (appointment for _, appointment in self.appointment_order.scan(self.appointments, 0, predicate))
+
+    def page_patients(self, cursor: Optional[int] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                      gender: Optional[str] = None, min_age: Optional[int] = None,
+                      max_age: Optional[int] = None) -> Tuple[List[Patient], Optional[int]]:
+        """One page of patients and the cursor for the next page (None when done)"""
+        return self.patient_order.page(self.patients, cursor, page_size,
+                                       patient_filter(gender, min_age, max_age))
+
+    def page_doctors(self, cursor: Optional[int] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                     specialty: Optional[str] = None) -> Tuple[List[Doctor], Optional[int]]:
+        """One page of doctors and the cursor for the next page (None when done)"""
+        return self.doctor_order.page(self.doctors, cursor, page_size, doctor_filter(specialty))
+
+    def page_appointments(self, cursor: Optional[int] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                          status: Optional[str] = None, doctor_id: Optional[str] = None,
+                          patient_id: Optional[str] = None, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> Tuple[List[Appointment], Optional[int]]:
+        """One page of appointments and the cursor for the next page (None when done)"""
+        predicate = appointment_filter(status, doctor_id, patient_id, start_date, end_date)
+        return self.appointment_order.page(self.appointments, cursor, page_size, predicate)
+
+    def is_available(self, doctor_id: str, date: str, time: str) -> bool:
+        """Check if a doctor is available at a specific date and time"""
+        try:
+            if doctor_id in self.doctors:
+                doctor = self.doctors[doctor_id]
+                return doctor.is_available(date, time)
+            else:
+                self._say("Doctor not found!")
+                return False
+        except Exception as e:
+            self._say(f"Error checking availability: {e}")
+            return False
+
+    def set_doctor_template(self, doctor_id: str, template: WeeklyTemplate) -> bool:
+        """Replace a doctor's weekly working slots"""
+        if doctor_id not in self.doctors:
+            self._say("Doctor not found!")
+            return False
+        doctor = self.doctors[doctor_id]
+        with self._doctor_lock(doctor_id):
+            doctor.calendar.set_template(template)
+            self._log([SET_TEMPLATE, doctor_id, template.to_dict()])
+        self._checkpoint_if_due()
+        return True
+
+    def set_doctor_day(self, doctor_id: str, date: str, times: List[str]) -> bool:
+        """Use a different set of slots for one doctor on one date"""
+        try:
+            if doctor_id not in self.doctors:
+                self._say("Doctor not found!")
+                return False
+            day = date_key(date)
+            minutes = sorted(time_key(time) for time in times)
+            doctor = self.doctors[doctor_id]
+            with self._doctor_lock(doctor_id):
+                doctor.calendar.set_day(day, minutes)
+                self._log([SET_DAY_SLOTS, doctor_id, format_date(day), minutes])
+            self._checkpoint_if_due()
+            return True
+        except ValueError as e:
+            self._say(f"Invalid date or time: {e}")
+            return False
+
+    def add_doctor_leave(self, doctor_id: str, start_date: str, end_date: str) -> bool:
+        """Mark a doctor as unavailable from start_date to end_date inclusive"""
+        try:
+            if doctor_id not in self.doctors:
+                self._say("Doctor not found!")
+                return False
+            start, end = date_key(start_date), date_key(end_date)
+            if end < start:
+                self._say("Leave must end on or after its start date!")
+                return False
+            with self._doctor_lock(doctor_id):
+                self.doctors[doctor_id].calendar.add_leave(range(start, end + 1))
+                self._log([ADD_LEAVE, doctor_id, format_date(start), format_date(end)])
+            self._checkpoint_if_due()
+            return True
+        except ValueError as e:
+            self._say(f"Invalid date: {e}")
+            return False
+
+    def add_holiday(self, date: str) -> bool:
+        """Close a date for every doctor"""
+        try:
+            day = date_key(date)
+        except ValueError as e:
+            self._say(f"Invalid date: {e}")
+            return False
+        with self._locks.all():
+            self.holidays.add(day)
+            self._log([ADD_HOLIDAY, format_date(day)])
+        self._checkpoint_if_due()
+        return True
+
+    def free_slots(self, doctor_id: str, start_date: str, end_date: str) -> List[Tuple[str, str]]:
+        """Free (date, time) slots of a doctor between two dates inclusive"""
+        if doctor_id not in self.doctors:
+            return []
+        calendar = self.doctors[doctor_id].calendar
+        return [(format_date(day), format_time(minute))
+                for day, minute in calendar.iter_free(date_key(start_date), date_key(end_date))]
+
+    def next_free_slot(self, doctor_id: str, date: str, time: str = "00:00") -> Optional[Tuple[str, str]]:
+        """Earliest free (date, time) slot of a doctor at or after the given moment"""
+        if doctor_id not in self.doctors:
+            return None
+        found = self.doctors[doctor_id].calendar.next_free(date_key(date), time_key(time))
+        if found is None:
+            return None
+        return format_date(found[0]), format_time(found[1])
+
+    @timed("find_earliest_slots")
+    def find_earliest_slots(self, specialty: str, start_date: str, end_date: str, count: int = 5,
+                            time: str = "00:00") -> List[Tuple[str, str, str]]:
+        """Earliest free (date, time, doctor_id) slots across doctors of a specialty
+
+        Each matching doctor contributes a lazy stream of free slots and the
+        streams are merged through a heap, so only the slots that are
+        returned (plus one look-ahead per doctor) are ever produced.
+        """
+        doctor_ids = self.specialty_index.get(specialty.strip().lower(), [])
+        start, end, from_minute = date_key(start_date), date_key(end_date), time_key(time)
+        heap = []
+        for doctor_id in doctor_ids:
+            stream = self.doctors[doctor_id].calendar.iter_free(start, end, from_minute)
+            first = next(stream, None)
+            if first is not None:
+                heap.append((first[0], first[1], doctor_id, stream))
+        heapq.heapify(heap)
+
+        slots = []
+        while heap and len(slots) < count:
+            day, minute, doctor_id, stream = heap[0]
+            slots.append((format_date(day), format_time(minute), doctor_id))
+            following = next(stream, None)
+            if following is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (following[0], following[1], doctor_id, stream))
+        return slots
+
+    @timed("schedule_batch")
+    def schedule_batch(self, requests: List[SlotRequest]) -> List[Optional[str]]:
+        """Book a batch of requests together, filling as many as possible
+
+        The assignment is solved as a minimum-cost flow over the free slots
+        of the requested specialties (see scheduler.assign), so it places
+        the most requests possible and, among those placements, prefers
+        higher priorities, preferred times and earlier days. The solve runs
+        on a copy of the availability without holding the locks; the
+        bookings are then made under every lock, in one log record, after
+        re-solving if a slot was taken meanwhile. Returns the appointment
+        ID of each request, or None if it could not be placed.
+        """
+        valid = []
+        for index, request in enumerate(requests):
+            if request.check() is None and request.patient_id in self.patients:
+                valid.append(index)
+        results: List[Optional[str]] = [None] * len(requests)
+        if not valid:
+            self._report("schedule_batch", "rejected", "No valid scheduling requests!")
+            return results
+        batch = [requests[index] for index in valid]
+        start = min(request.start_day for request in batch)
+        end = max(request.end_day for request in batch)
+        doctors = [self.doctors[doctor_id] for specialty in {request.specialty for request in batch}
+                   for doctor_id in self.specialty_index.get(specialty, ())]
+
+        placements = assign(batch, free_slots_by_specialty(doctors, start, end))
+        with self._locks.all():
+            if not all(self._slot_free(placement) for placement in placements if placement is not None):
+                placements = assign(batch, free_slots_by_specialty(doctors, start, end))
+            rows = []
+            for index, request, placement in zip(valid, batch, placements):
+                if placement is None:
+                    continue
+                doctor_id, day, minute = placement
+                doctor = self.doctors[doctor_id]
+                appointment = Appointment(self.patients[request.patient_id], doctor, day, minute,
+                                          consultation_cents=self.catalog.consultation_cents(doctor.specialty, day))
+                self._register_appointment(appointment)
+                rows.append([appointment.appointment_id, request.patient_id, doctor_id, appointment.date,
+                             appointment.time, appointment.consultation_cents])
+                results[index] = appointment.appointment_id
+            if rows:
+                self._log([BOOK_APPOINTMENTS, rows])
+        self._checkpoint_if_due()
+        self._report("schedule_batch", "ok", f"Scheduled {len(rows)} of {len(requests)} requests.",
+                     scheduled=len(rows), requested=len(requests))
+        return results
+
+    def _slot_free(self, placement: Placement) -> bool:
+        doctor_id, day, minute = placement
+        return self.doctors[doctor_id].calendar.is_free(day, minute)
+
+    def duplicate_index(self) -> DuplicateIndex:
+        """Duplicate-patient index, kept in sync once built"""
+        if self.duplicates is None:
+            duplicates = DuplicateIndex(self.patients)
+            for patient in list(self.patients.values()):
+                duplicates.add(patient)
+            self.duplicates = duplicates
+        return self.duplicates
+
+    def find_duplicate_patients(self, name: str, age: int, gender: str, limit: int = 5,
+                                threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, float]]:
+        """Registered patients likely to be the given person, as (patient_id, score) best first"""
+        return self.duplicate_index().find(name, age, gender, threshold, limit)
+
+    def duplicate_patient_pairs(self, threshold: float = DEFAULT_THRESHOLD) -> Iterator[Tuple[str, str, float]]:
+        """Likely duplicate pairs among all registered patients, each pair once"""
+        return self.duplicate_index().pairs(list(self.patients.values()), threshold)
+
+    def find_patients_by_name(self, prefix: str) -> Iterator[Patient]:
+        """Patients whose full name or any word of it starts with `prefix`"""
+        patients = self.patients
+        return (patients[patient_id] for patient_id in self.patient_name_index.search(prefix)
+                if patient_id in patients)
+
+    def appointments_for_doctor(self, doctor_id: str, date: str) -> Iterator[Appointment]:
+        """A doctor's appointments on one date, in booking order"""
+        ids = self.doctor_day_index.get((doctor_id, date_key(date)))
+        return self._resolve_appointments(ids)
+
+    def appointments_for_patient(self, patient_id: str, include_archived: bool = True) -> Iterator[Appointment]:
+        """A patient's appointments by date and time; archived history is read back only if included"""
+        if patient_id not in self.patients:
+            return iter(())
+        ids = self.patients[patient_id].history.ids(include_archived)
+        if self.archive is None:
+            return self._resolve_appointments(ids)
+        return (appointment for appointment in map(self.find_appointment, ids) if appointment is not None)
+
+    def attach_archive(self, archive: AppointmentArchive) -> None:
+        """Read archived appointments and bills from `archive`, and never reuse the IDs it holds"""
+        self.archive = archive
+        allocator = get_allocator()
+        for appointment_id in archive.highest_ids():
+            allocator.observe(appointment_id)
+
+    def find_appointment(self, appointment_id: str) -> Optional[Appointment]:
+        """An appointment by ID, read back from the archive if it was archived"""
+        appointment = self.appointments.get(appointment_id)
+        if appointment is not None or self.archive is None:
+            return appointment
+        record = self.archive.get(appointment_id)
+        if record is None:
+            return None
+        return self._from_archive(record)[0]
+
+    def find_bill(self, appointment_id: str) -> Optional[Bill]:
+        """A bill by appointment ID, read back from the archive if it was archived"""
+        bill = self.bills.get(appointment_id)
+        if bill is not None or self.archive is None:
+            return bill
+        record = self.archive.get(appointment_id)
+        if record is None:
+            return None
+        return self._from_archive(record)[1]
+
+    def _from_archive(self, record) -> Tuple[Optional[Appointment], Optional[Bill]]:
+        """Detached Appointment and Bill objects for an archived record"""
+        appointment_id, patient_id, doctor_id, day, minute, status, bill_fields = record
+        patient, doctor = self.patients.get(patient_id), self.doctors.get(doctor_id)
+        if patient is None or doctor is None:
+            return None, None
+        appointment = Appointment(patient, doctor, day, minute, appointment_id)
+        appointment.status = status
+        bill = None
+        if bill_fields is not None:
+            consultation_cents, services, issued_at = bill_fields
+            bill = Bill(appointment, datetime.fromisoformat(issued_at))
+            bill.consultation_cents = consultation_cents
+            bill.service_cents = dict(services)
+        return appointment, bill
+
+    def close_past_appointments(self, today: str) -> int:
+        """Give appointments dated before `today` a final status; returns how many changed
+
+        Confirmed or billed appointments become Completed, the rest No-Show.
+        """
+        day = date_key(today)
+        closed = 0
+        for status in ("Scheduled", "Confirmed"):
+            # Closing moves appointments out of this bucket, which its iterator allows for
+            for appointment in self._resolve_appointments(self.status_index.get(status)):
+                if appointment.date_key >= day:
+                    continue
+                with self._appointment_lock(appointment):
+                    attended = appointment.status == "Confirmed" or appointment.appointment_id in self.bills
+                    changed = appointment.complete() if attended else appointment.mark_no_show()
+                    if changed:
+                        self._status_changed(appointment)
+                        self._log([SET_STATUS, appointment.appointment_id, appointment.status])
+                        closed += 1
+                self._checkpoint_if_due()
+        self._report("close_appointments", "ok", f"Closed {closed} past appointments.", closed=closed)
+        return closed
+
+    def archive_appointments(self, before_date: str, archive: Optional[AppointmentArchive] = None) -> int:
+        """Move closed appointments dated before a date, with their bills, to the archive
+
+        Only Completed, No-Show and Cancelled appointments move; run
+        close_past_appointments first. Returns the number archived.
+        """
+        if archive is not None and archive is not self.archive:
+            self.attach_archive(archive)
+        if self.archive is None:
+            raise ValueError("No archive to move appointments to")
+        day = date_key(before_date)
+        with self._locks.all():
+            records = []
+            for status in ("Completed", "No-Show", "Cancelled"):
+                for appointment in self._resolve_appointments(self.status_index.get(status)):
+                    if appointment.date_key >= day:
+                        continue
+                    bill = self.bills.get(appointment.appointment_id)
+                    bill_fields = None if bill is None else [
+                        bill.consultation_cents, list(bill.service_cents.items()), bill.issued_at.isoformat()]
+                    records.append([appointment.appointment_id, appointment.patient.patient_id,
+                                    appointment.doctor.doctor_id, appointment.date_key, appointment.time_key,
+                                    appointment.status, bill_fields])
+            if records:
+                self.archive.write(records)
+                archived_ids = [record[0] for record in records]
+                self._log([ARCHIVE_APPOINTMENTS, archived_ids])
+                for appointment_id in archived_ids:
+                    self._unregister_appointment(appointment_id)
+                self.appointment_order.trim(self.appointments)
+        self._checkpoint_if_due()
+        self._report("archive_appointments", "ok", f"Archived {len(records)} appointments dated before {before_date}.",
+                     archived=len(records))
+        return len(records)
+
+    def archive_patient_history(self, before_date: str, store: Optional[HistoryStore] = None) -> int:
+        """Move history entries dated before a date out of memory into the history store
+
+        The first call needs a store (e.g. HistoryStore("hospital_data/history.jsonl"));
+        later calls reuse it. Returns the number of entries moved.
+        """
+        if store is not None:
+            self.history_store = store
+        if self.history_store is None:
+            raise ValueError("No history store to archive to")
+        day = date_key(before_date)
+        with self._locks.all():
+            moved = sum(patient.history.archive_before(day, self.history_store)
+                        for patient in self.patients.values())
+        self._report("archive_history", "ok", f"Archived {moved} history entries dated before {before_date}.",
+                     entries=moved)
+        return moved
+
+    def appointments_by_status(self, status: str) -> Iterator[Appointment]:
+        """Appointments currently in the given status"""
+        return self._resolve_appointments(self.status_index.get(status_name(status)))
+
+    def appointments_between(self, start_date: str, end_date: str) -> Iterator[Appointment]:
+        """Appointments dated between two dates inclusive, day by day"""
+        start, end = date_key(start_date), date_key(end_date)
+        for day in range(start, end + 1):
+            yield from self._resolve_appointments(self.day_index.get(day))
+
+    def _resolve_appointments(self, ids) -> Iterator[Appointment]:
+        appointments = self.appointments
+        return (appointments[appointment_id] for appointment_id in ids if appointment_id in appointments)
+
+    def appointment_columns(self, use_numpy: Optional[bool] = None) -> AppointmentColumns:
+        """Columnar store of all appointments, kept in sync once built"""
+        if self.columns is None or (use_numpy is not None and use_numpy != self.columns.use_numpy):
+            columns = AppointmentColumns(use_numpy)
+            for appointment in self.appointments.values():
+                columns.add(appointment)
+            for bill in self.bills.values():
+                columns.set_bill(bill)
+            self.columns = columns
+        return self.columns
+
+    def status_rates(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, float]:
+        """Share of appointments in each status (e.g. cancellation and no-show rates)"""
+        with self._locks.all():
+            counts = self.appointment_columns().status_counts(*self._day_range(start_date, end_date))
+        total = sum(counts.values())
+        return {status: (counts[status] / total if total else 0.0) for status in STATUSES}
+
+    def doctor_utilisation(self, start_date: str, end_date: str) -> Dict[str, float]:
+        """Booked share of each doctor's working slots between two dates"""
+        start, end = self._day_range(start_date, end_date)
+        with self._locks.all():
+            booked = self.appointment_columns().bookings_by_doctor(start, end)
+            utilisation = {}
+            for doctor_id, doctor in self.doctors.items():
+                slots = sum(len(doctor.calendar.slots_on(day)) for day in range(start, end + 1))
+                utilisation[doctor_id] = min(booked.get(doctor_id, 0) / slots, 1.0) if slots else 0.0
+        return utilisation
+
+    def daily_bookings_by_specialty(self, start_date: str, end_date: str) -> Dict[str, List[int]]:
+        """Bookings per specialty for each day between two dates"""
+        with self._locks.all():
+            return self.appointment_columns().daily_bookings_by_specialty(*self._day_range(start_date, end_date))
+
+    def revenue_by_doctor_month(self, start_date: str, end_date: str) -> Dict[str, Dict[str, int]]:
+        """Consultation cents per doctor per 'YYYY-MM' between two dates"""
+        with self._locks.all():
+            return self.appointment_columns().revenue_by_doctor_month(*self._day_range(start_date, end_date))
+
+    def revenue_between(self, start_date: str, end_date: str, doctor_id: Optional[str] = None) -> int:
+        """Billed cents for appointments dated between two dates, optionally for one doctor"""
+        return self.ledger.total_between(date_key(start_date), date_key(end_date), doctor_id)
+
+    def revenue_for_month(self, year: int, month: int, doctor_id: Optional[str] = None) -> int:
+        """Billed cents for appointments in one calendar month"""
+        first = datetime(year, month, 1).date()
+        last = datetime(year + month // 12, month % 12 + 1, 1).date().toordinal() - 1
+        return self.ledger.total_between(first.toordinal(), last, doctor_id)
+
+    def verify_ledger(self) -> List[str]:
+        """Compare the running revenue totals with a full recomputation from the bills"""
+        with self._locks.all():
+            return self.ledger.verify(list(self.bills.values()))
+
+    @staticmethod
+    def _day_range(start_date: Optional[str], end_date: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+        return (date_key(start_date) if start_date is not None else None,
+                date_key(end_date) if end_date is not None else None)
+
+    def import_patients(self, source, fmt: Optional[str] = None,
+                        chunk_size: int = bulk_io.DEFAULT_CHUNK_SIZE) -> bulk_io.ImportReport:
+        """Bulk-load patients from a CSV or JSON Lines file or stream"""
+        return bulk_io.import_patients(self, source, fmt, chunk_size)
+
+    def import_doctors(self, source, fmt: Optional[str] = None,
+                       chunk_size: int = bulk_io.DEFAULT_CHUNK_SIZE) -> bulk_io.ImportReport:
+        """Bulk-load doctors from a CSV or JSON Lines file or stream"""
+        return bulk_io.import_doctors(self, source, fmt, chunk_size)
+
+    def import_appointments(self, source, fmt: Optional[str] = None,
+                            chunk_size: int = bulk_io.DEFAULT_CHUNK_SIZE) -> bulk_io.ImportReport:
+        """Bulk-load appointments from a CSV or JSON Lines file or stream"""
+        return bulk_io.import_appointments(self, source, fmt, chunk_size)
+
+    def export_patients(self, destination, fmt: Optional[str] = None) -> int:
+        """Stream all patients to a CSV or JSON Lines file or stream"""
+        return bulk_io.export_patients(self, destination, fmt)
+
+    def export_doctors(self, destination, fmt: Optional[str] = None) -> int:
+        """Stream all doctors to a CSV or JSON Lines file or stream"""
+        return bulk_io.export_doctors(self, destination, fmt)
+
+    def export_appointments(self, destination, fmt: Optional[str] = None) -> int:
+        """Stream all appointments to a CSV or JSON Lines file or stream"""
+        return bulk_io.export_appointments(self, destination, fmt)
+
+    def export_receipts(self, destination, start_date: str, end_date: Optional[str] = None) -> int:
+        """Write the receipts of all bills for a date (or date range) to one file or stream"""
+        start = date_key(start_date)
+        end = date_key(end_date) if end_date is not None else start
+        return bulk_io.export_receipts(self, destination, start, end)
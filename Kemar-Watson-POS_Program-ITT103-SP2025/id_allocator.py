@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+# First number handed out per prefix, keeps IDs in the familiar widths
+DEFAULT_STARTS = {"P": 10000, "D": 1000, "A": 100000}
+
+
+def split_id(record_id: str) -> Tuple[str, int]:
+    """Split an ID such as 'P10004' into its prefix and number"""
+    for i, char in enumerate(record_id):
+        if char.isdigit():
+            return record_id[:i], int(record_id[i:])
+    raise ValueError(f"ID has no numeric part: {record_id}")
+
+
+class IdAllocator:
+    """Base class for ID allocation strategies"""
+
+    def next_id(self, prefix: str) -> str:
+        """Allocate a single ID with the given prefix"""
+        raise NotImplementedError
+
+    def reserve(self, prefix: str, count: int) -> List[str]:
+        """Allocate `count` IDs in one call"""
+        return [self.next_id(prefix) for _ in range(count)]
+
+    def observe(self, record_id: str) -> None:
+        """Record an ID that already exists so it is never handed out again"""
+        pass
+
+
+class SequenceAllocator(IdAllocator):
+    """Monotonic per-prefix counter for a single process"""
+
+    def __init__(self, starts: Dict[str, int] = None):
+        self._starts = dict(DEFAULT_STARTS if starts is None else starts)
+        self._next: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _take(self, prefix: str, count: int) -> int:
+        with self._lock:
+            start = self._next.get(prefix)
+            if start is None:
+                start = self._starts.get(prefix, 1)
+            self._next[prefix] = start + count
+            return start
+
+    def next_id(self, prefix: str) -> str:
+        return f"{prefix}{self._take(prefix, 1)}"
+
+    def reserve(self, prefix: str, count: int) -> List[str]:
+        start = self._take(prefix, count)
+        return [f"{prefix}{n}" for n in range(start, start + count)]
+
+    def observe(self, record_id: str) -> None:
+        prefix, number = split_id(record_id)
+        with self._lock:
+            current = self._next.get(prefix, self._starts.get(prefix, 1))
+            if number >= current:
+                self._next[prefix] = number + 1
+
+
+class TimeOrderedAllocator(IdAllocator):
+    """IDs that sort by creation time: milliseconds | node | sequence
+
+    Each process sharing a store should use its own node number (0-1023).
+    """
+
+    EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z
+    NODE_BITS = 10
+    SEQUENCE_BITS = 12
+
+    def __init__(self, node: int = 0):
+        if not 0 <= node < (1 << self.NODE_BITS):
+            raise ValueError(f"Node must be between 0 and {(1 << self.NODE_BITS) - 1}")
+        self.node = node
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def _next_number(self) -> int:
+        now_ms = int(time.time() * 1000) - self.EPOCH_MS
+        if now_ms <= self._last_ms:
+            # Same millisecond (or clock went back): keep counting forward
+            self._sequence += 1
+            if self._sequence >> self.SEQUENCE_BITS:
+                self._last_ms += 1
+                self._sequence = 0
+        else:
+            self._last_ms = now_ms
+            self._sequence = 0
+        return ((self._last_ms << (self.NODE_BITS + self.SEQUENCE_BITS))
+                | (self.node << self.SEQUENCE_BITS) | self._sequence)
+
+    def next_id(self, prefix: str) -> str:
+        with self._lock:
+            return f"{prefix}{self._next_number()}"
+
+    def reserve(self, prefix: str, count: int) -> List[str]:
+        ids: List[str] = []
+        shift = self.NODE_BITS + self.SEQUENCE_BITS
+        node_bits = self.node << self.SEQUENCE_BITS
+        with self._lock:
+            while len(ids) < count:
+                # Fill the rest of the current millisecond's sequence space at once
+                first = self._next_number()
+                take = min(count - len(ids), (1 << self.SEQUENCE_BITS) - self._sequence)
+                base = (self._last_ms << shift) | node_bits
+                ids.extend(f"{prefix}{n}" for n in range(first, base + self._sequence + take))
+                self._sequence += take - 1
+        return ids
+
+
+class MemoryBlockStore:
+    """Block counter shared by threads of one process"""
+
+    def __init__(self, starts: Dict[str, int] = None):
+        self._starts = dict(DEFAULT_STARTS if starts is None else starts)
+        self._next: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def take(self, prefix: str, count: int) -> int:
+        """Reserve `count` numbers and return the first one"""
+        with self._lock:
+            start = self._next.get(prefix, self._starts.get(prefix, 1))
+            self._next[prefix] = start + count
+            return start
+
+    def bump(self, prefix: str, number: int) -> None:
+        """Make sure `number` is never handed out"""
+        with self._lock:
+            if number >= self._next.get(prefix, self._starts.get(prefix, 1)):
+                self._next[prefix] = number + 1
+
+
+class FileBlockStore:
+    """Block counter kept in a JSON file, shared by every process that opens it
+
+    Updates are serialized with an exclusive file lock, so processes never
+    receive overlapping blocks.
+    """
+
+    def __init__(self, path: str, starts: Dict[str, int] = None):
+        if fcntl is None:
+            raise RuntimeError("FileBlockStore needs POSIX file locking (fcntl)")
+        self.path = path
+        self._starts = dict(DEFAULT_STARTS if starts is None else starts)
+        self._lock = threading.Lock()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        os.close(fd)
+
+    def _update(self, prefix: str, advance) -> int:
+        with self._lock, open(self.path, "r+") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                raw = handle.read()
+                counters = json.loads(raw) if raw.strip() else {}
+                current = counters.get(prefix, self._starts.get(prefix, 1))
+                counters[prefix] = advance(current)
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(counters))
+                handle.flush()
+                os.fsync(handle.fileno())
+                return current
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def take(self, prefix: str, count: int) -> int:
+        """Reserve `count` numbers and return the first one"""
+        return self._update(prefix, lambda current: current + count)
+
+    def bump(self, prefix: str, number: int) -> None:
+        """Make sure `number` is never handed out"""
+        self._update(prefix, lambda current: max(current, number + 1))
+
+
+class BlockAllocator(IdAllocator):
+    """Hands out IDs from blocks reserved in a shared store
+
+    Only one store round-trip is needed per `block_size` IDs, and bulk
+    reservations larger than a block go straight to the store.
+    """
+
+    def __init__(self, store=None, block_size: int = 1000):
+        if block_size <= 0:
+            raise ValueError("Block size must be positive")
+        self.store = store if store is not None else MemoryBlockStore()
+        self.block_size = block_size
+        self._blocks: Dict[str, List[int]] = {}  # prefix -> [next, end)
+        self._lock = threading.Lock()
+
+    def next_id(self, prefix: str) -> str:
+        with self._lock:
+            block = self._blocks.get(prefix)
+            if block is None or block[0] >= block[1]:
+                start = self.store.take(prefix, self.block_size)
+                block = self._blocks[prefix] = [start, start + self.block_size]
+            number = block[0]
+            block[0] += 1
+        return f"{prefix}{number}"
+
+    def reserve(self, prefix: str, count: int) -> List[str]:
+        ids: List[str] = []
+        with self._lock:
+            block = self._blocks.get(prefix)
+            if block is not None and block[0] < block[1]:
+                take = min(count, block[1] - block[0])
+                ids.extend(f"{prefix}{n}" for n in range(block[0], block[0] + take))
+                block[0] += take
+            remaining = count - len(ids)
+            if remaining:
+                start = self.store.take(prefix, remaining)
+                ids.extend(f"{prefix}{n}" for n in range(start, start + remaining))
+        return ids
+
+    def observe(self, record_id: str) -> None:
+        prefix, number = split_id(record_id)
+        with self._lock:
+            block = self._blocks.get(prefix)
+            if block is not None and block[0] <= number < block[1]:
+                block[0] = number + 1
+        self.store.bump(prefix, number)
+
+
+_allocator: IdAllocator = SequenceAllocator()
+
+
+def get_allocator() -> IdAllocator:
+    """Get the allocator used for new patient, doctor and appointment IDs"""
+    return _allocator
+
+
+def set_allocator(allocator: IdAllocator) -> IdAllocator:
+    """Replace the active allocator and return the previous one"""
+    global _allocator
+    previous = _allocator
+    _allocator = allocator
+    return previous
@@ -0,0 +1,135 @@
+import bisect
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+
+class NameIndex:
+    """Sorted index of names for exact and prefix lookups
+
+    Every word of a name is indexed as well as the full name, so 'smi'
+    finds 'John Smith'. New names are buffered and merged into the sorted
+    list on the next lookup, which keeps registration O(1) even during
+    bulk imports.
+    """
+
+    def __init__(self):
+        self._sorted: List[Tuple[str, str]] = []
+        self._pending: List[Tuple[str, str]] = []
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return " ".join(name.lower().split())
+
+    @classmethod
+    def keys_for(cls, name: str) -> List[str]:
+        full = cls.normalize(name)
+        words = full.split()
+        return [full] + words[1:]
+
+    def add(self, name: str, record_id: str) -> None:
+        for key in self.keys_for(name):
+            self._pending.append((key, record_id))
+
+    def remove(self, name: str, record_id: str) -> None:
+        self._merge()
+        for key in self.keys_for(name):
+            position = bisect.bisect_left(self._sorted, (key, record_id))
+            if position < len(self._sorted) and self._sorted[position] == (key, record_id):
+                del self._sorted[position]
+
+    def _merge(self) -> None:
+        if self._pending:
+            # Timsort merges the already sorted run with the new entries in linear time
+            self._sorted.extend(self._pending)
+            self._pending = []
+            self._sorted.sort()
+
+    def search(self, prefix: str) -> Iterator[str]:
+        """Yield IDs whose name (or a word of it) starts with `prefix`, without repeats"""
+        self._merge()
+        prefix = self.normalize(prefix)
+        if not prefix:
+            return
+        entries = self._sorted
+        position = bisect.bisect_left(entries, (prefix, ""))
+        seen = set()
+        while position < len(entries) and entries[position][0].startswith(prefix):
+            record_id = entries[position][1]
+            if record_id not in seen:
+                seen.add(record_id)
+                yield record_id
+            position += 1
+
+
+class _Bucket:
+    """IDs in insertion order; a removed ID leaves None in its slot until the list is compacted"""
+
+    __slots__ = ("ids", "positions")
+
+    def __init__(self):
+        self.ids: List[Optional[str]] = []
+        self.positions: Dict[str, int] = {}
+
+
+# Buckets shorter than this are never compacted
+COMPACT_MIN = 32
+# IDs copied at a time while iterating a bucket
+WALK_CHUNK = 256
+
+
+class BucketIndex:
+    """Map from a key to the insertion-ordered set of appointment IDs under it"""
+
+    def __init__(self):
+        self._buckets: Dict[Hashable, _Bucket] = {}
+
+    def add(self, key: Hashable, record_id: str) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+        if record_id not in bucket.positions:
+            bucket.positions[record_id] = len(bucket.ids)
+            bucket.ids.append(record_id)
+
+    def discard(self, key: Hashable, record_id: str) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return
+        position = bucket.positions.pop(record_id, None)
+        if position is None:
+            return
+        if not bucket.positions:
+            del self._buckets[key]
+            return
+        bucket.ids[position] = None
+        if len(bucket.ids) > COMPACT_MIN and len(bucket.positions) * 2 < len(bucket.ids):
+            # A new list, so iterators already walking the old one are undisturbed
+            ids = [record_id for record_id in bucket.ids if record_id is not None]
+            bucket.positions = {record_id: position for position, record_id in enumerate(ids)}
+            bucket.ids = ids
+
+    def get(self, key: Hashable) -> Iterator[str]:
+        """IDs under `key` in insertion order, read lazily without copying the bucket
+
+        Callers may book, cancel or change statuses while iterating: an ID
+        removed before it is reached is skipped, IDs added meanwhile may or
+        may not be reached, and one removed and added back may be seen twice.
+        """
+        bucket = self._buckets.get(key)
+        return iter(()) if bucket is None else self._walk(bucket)
+
+    @staticmethod
+    def _walk(bucket: _Bucket) -> Iterator[str]:
+        ids = bucket.ids
+        position = 0
+        # A small slice at a time: cheap to copy, and IDs appended meanwhile are still reached
+        while position < len(ids):
+            chunk = ids[position:position + WALK_CHUNK]
+            position += len(chunk)
+            for record_id in chunk:
+                # Checked as each ID is reached, so one removed since the slice was taken is skipped
+                if record_id is not None and record_id in bucket.positions:
+                    yield record_id
+
+    def count(self, key: Hashable) -> int:
+        bucket = self._buckets.get(key)
+        return 0 if bucket is None else len(bucket.positions)
@@ -0,0 +1,116 @@
+import threading
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# All money is held as integer cents; floats only appear at the edges (user input)
+
+
+def to_cents(amount) -> int:
+    """Convert an amount in dollars (int, float, str or Decimal) to whole cents"""
+    if isinstance(amount, int):
+        return amount * 100
+    # str() first so 0.1 becomes Decimal('0.1'), not its binary approximation
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def format_cents(cents: int) -> str:
+    """'1,234.50' for 123450 cents"""
+    sign = "-" if cents < 0 else ""
+    whole, part = divmod(abs(cents), 100)
+    return f"{sign}{whole:,}.{part:02d}"
+
+
+class Ledger:
+    """Running revenue totals per day and per doctor, updated one bill at a time
+
+    Each bill's last posted total is remembered, so posting a changed bill
+    only applies the difference. Month-end and date-range queries add up
+    per-day totals and never touch individual bills. Archived bills are
+    forgotten individually but stay in the totals.
+    """
+
+    def __init__(self):
+        # appointment_id -> (doctor_id, day, total cents) as last posted
+        self._posted: Dict[str, Tuple[str, int, int]] = {}
+        self._by_day: Dict[int, int] = {}
+        self._by_doctor: Dict[str, int] = {}
+        self._by_doctor_day: Dict[Tuple[str, int], int] = {}
+        # (doctor_id, day) -> cents of forgotten (archived) bills, still part of the totals above
+        self.archived: Dict[Tuple[str, int], int] = {}
+        # Bills of different doctors are posted under different locks but share day totals
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._posted)
+
+    @staticmethod
+    def _add(totals: Dict, key, cents: int) -> None:
+        value = totals.get(key, 0) + cents
+        if value:
+            totals[key] = value
+        else:
+            totals.pop(key, None)
+
+    def _apply(self, doctor_id: str, day: int, cents: int) -> None:
+        self._add(self._by_day, day, cents)
+        self._add(self._by_doctor, doctor_id, cents)
+        self._add(self._by_doctor_day, (doctor_id, day), cents)
+
+    def post(self, bill) -> None:
+        """Record a new bill or the current total of a changed one"""
+        appointment = bill.appointment
+        entry = (appointment.doctor.doctor_id, appointment.date_key, bill.total_cents)
+        with self._lock:
+            previous = self._posted.get(appointment.appointment_id)
+            if previous is not None:
+                self._apply(previous[0], previous[1], -previous[2])
+            self._posted[appointment.appointment_id] = entry
+            self._apply(*entry)
+
+    def remove(self, appointment_id: str) -> None:
+        with self._lock:
+            previous = self._posted.pop(appointment_id, None)
+            if previous is not None:
+                self._apply(previous[0], previous[1], -previous[2])
+
+    def forget(self, appointment_id: str) -> None:
+        """Drop an archived bill's entry while keeping its amount in the totals"""
+        with self._lock:
+            previous = self._posted.pop(appointment_id, None)
+            if previous is not None:
+                self._add(self.archived, (previous[0], previous[1]), previous[2])
+
+    def add_archived(self, doctor_id: str, day: int, cents: int) -> None:
+        """Restore the totals of bills forgotten before a snapshot"""
+        with self._lock:
+            self._add(self.archived, (doctor_id, day), cents)
+            self._apply(doctor_id, day, cents)
+
+    def day_total(self, day: int) -> int:
+        return self._by_day.get(day, 0)
+
+    def total_between(self, start_day: int, end_day: int, doctor_id: Optional[str] = None) -> int:
+        """Cents billed for appointments dated in [start_day, end_day], optionally for one doctor"""
+        if doctor_id is None:
+            by_day = self._by_day
+            return sum(by_day.get(day, 0) for day in range(start_day, end_day + 1))
+        by_doctor_day = self._by_doctor_day
+        return sum(by_doctor_day.get((doctor_id, day), 0) for day in range(start_day, end_day + 1))
+
+    def doctor_total(self, doctor_id: str) -> int:
+        return self._by_doctor.get(doctor_id, 0)
+
+    def verify(self, bills: Iterable) -> List[str]:
+        """Recompute every aggregate from the bills; returns the mismatches found (empty when consistent)"""
+        expected = Ledger()
+        for bill in bills:
+            expected.post(bill)
+        for (doctor_id, day), cents in list(self.archived.items()):
+            expected._apply(doctor_id, day, cents)
+        problems = []
+        for name in ("_posted", "_by_day", "_by_doctor", "_by_doctor_day"):
+            actual, wanted = getattr(self, name), getattr(expected, name)
+            for key in actual.keys() | wanted.keys():
+                if actual.get(key) != wanted.get(key):
+                    problems.append(f"{name.strip('_')}[{key!r}]: {actual.get(key)} != {wanted.get(key)}")
+        return problems
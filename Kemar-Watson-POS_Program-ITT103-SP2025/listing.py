@@ -0,0 +1,126 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from calendar_model import date_key
+from columnar import status_name
+
+Record = TypeVar("Record")
+
+DEFAULT_PAGE_SIZE = 20
+
+
+class InsertionOrder:
+    """Append-only list of record IDs in the order they were first registered
+
+    A cursor is a position in this list, so it stays valid while records
+    are added, and removed records are skipped instead of shifting pages.
+    """
+
+    def __init__(self):
+        self._ids: List[str] = []
+        # Position of _ids[0]; grows as removed records are trimmed off the front
+        self._base = 0
+
+    def append(self, record_id: str) -> None:
+        self._ids.append(record_id)
+
+    def __len__(self) -> int:
+        return self._base + len(self._ids)
+
+    def ids(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """IDs at positions [start, stop), e.g. those registered since a position was noted"""
+        stop = len(self) if stop is None else stop
+        return self._ids[max(start - self._base, 0):max(stop - self._base, 0)]
+
+    def trim(self, records: Dict[str, Record]) -> int:
+        """Drop the leading IDs whose records were removed; cursors stay valid"""
+        ids = self._ids
+        cut = 0
+        while cut < len(ids) and ids[cut] not in records:
+            cut += 1
+        if cut:
+            del ids[:cut]
+            self._base += cut
+        return cut
+
+    def scan(self, records: Dict[str, Record], start: int = 0,
+             predicate: Optional[Callable[[Record], bool]] = None) -> Iterator[Tuple[int, Record]]:
+        """Yield (position, record) from `start` onwards, skipping removed and filtered-out records"""
+        ids = self._ids
+        base = self._base
+        position = max(start - base, 0)
+        # Re-read the length each step so records added while paging are still reached
+        while position < len(ids):
+            record = records.get(ids[position])
+            if record is not None and (predicate is None or predicate(record)):
+                yield base + position, record
+            position += 1
+
+    def page(self, records: Dict[str, Record], cursor: Optional[int] = None,
+             page_size: int = DEFAULT_PAGE_SIZE,
+             predicate: Optional[Callable[[Record], bool]] = None) -> Tuple[List[Record], Optional[int]]:
+        """One page of records and the cursor of the next page (None after the last page)"""
+        return paginate(self.scan(records, cursor or 0, predicate), page_size)
+
+
+def paginate(scanned: Iterable[Tuple[int, Record]], page_size: int) -> Tuple[List[Record], Optional[int]]:
+    """First `page_size` records of (position, record) pairs, and the position the next page starts at"""
+    if page_size <= 0:
+        raise ValueError("Page size must be positive")
+    rows: List[Record] = []
+    for position, record in scanned:
+        if len(rows) == page_size:
+            return rows, position
+        rows.append(record)
+    return rows, None
+
+
+def all_of(*conditions: Optional[Callable[[Record], bool]]) -> Optional[Callable[[Record], bool]]:
+    """Combine the given filters (None entries ignored) into one predicate"""
+    conditions = [condition for condition in conditions if condition is not None]
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return lambda record: all(condition(record) for condition in conditions)
+
+
+def patient_filter(gender: Optional[str], min_age: Optional[int], max_age: Optional[int]):
+    return all_of(
+        None if gender is None else (lambda patient: patient.gender.lower() == gender.lower()),
+        None if min_age is None else (lambda patient: patient.age >= min_age),
+        None if max_age is None else (lambda patient: patient.age <= max_age))
+
+
+def doctor_filter(specialty: Optional[str]):
+    if specialty is None:
+        return None
+    wanted = specialty.strip().lower()
+    return lambda doctor: doctor.specialty.strip().lower() == wanted
+
+
+def appointment_filter(status: Optional[str], doctor_id: Optional[str], patient_id: Optional[str],
+                       start_date: Optional[str], end_date: Optional[str]):
+    status = status_name(status) if status is not None else None
+    start = date_key(start_date) if start_date is not None else None
+    end = date_key(end_date) if end_date is not None else None
+    return all_of(
+        None if status is None else (lambda appointment: appointment.status == status),
+        None if doctor_id is None else (lambda appointment: appointment.doctor.doctor_id == doctor_id),
+        None if patient_id is None else (lambda appointment: appointment.patient.patient_id == patient_id),
+        None if start is None else (lambda appointment: appointment.date_key >= start),
+        None if end is None else (lambda appointment: appointment.date_key <= end))
+
+
+def patient_row(patient) -> str:
+    return f"ID: {patient.patient_id} | {patient.name} | Age: {patient.age} | Gender: {patient.gender}"
+
+
+def doctor_row(doctor) -> str:
+    return f"ID: {doctor.doctor_id} | {doctor.name} | Specialty: {doctor.specialty} | Gender: {doctor.gender}"
+
+
+def appointment_row(appointment) -> str:
+    # Names are looked up here, so only rows that are actually shown pay for them
+    return (f"ID: {appointment.appointment_id} | Patient: {appointment.patient.name} | "
+            f"Doctor: {appointment.doctor.name} | Date: {appointment.date} | Time: {appointment.time} | "
+            f"Status: {appointment.status}")
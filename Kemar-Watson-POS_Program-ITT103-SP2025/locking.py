@@ -0,0 +1,43 @@
+import contextlib
+import threading
+from typing import Hashable
+
+_NO_LOCK = contextlib.nullcontext()
+
+
+class LockStripes:
+    """Fixed pool of locks that keys hash onto
+
+    Memory stays bounded no matter how many doctors or slots exist, and two
+    keys only contend when they land on the same stripe.
+    """
+
+    def __init__(self, stripes: int = 1024):
+        if stripes <= 0:
+            raise ValueError("Number of stripes must be positive")
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def lock_for(self, key: Hashable) -> threading.Lock:
+        """Get the lock guarding `key`"""
+        return self._locks[hash(key) % len(self._locks)]
+
+    @contextlib.contextmanager
+    def all(self):
+        """Hold every stripe, e.g. to capture a consistent snapshot"""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+class NoLocks:
+    """Stand-in for LockStripes when the system is used from one thread"""
+
+    def lock_for(self, key: Hashable):
+        return _NO_LOCK
+
+    def all(self):
+        return _NO_LOCK
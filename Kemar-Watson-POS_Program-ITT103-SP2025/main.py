@@ -1,233 +1,376 @@
-import re
-from hospital_system import HospitalSystem
-
-def display_menu() -> None:
-    print("\n" + "="*60)
-    print("\t\tUCC HOSPITAL MANAGEMENT SYSTEM")
-    print("="*60)
-    print("1.  Patient Management")
-    print("2.  Doctor Management")
-    print("3.  Appointment Management")
-    print("4.  Billing System")
-    print("5.  View Records")
-    print("6.  Exit")
-    print("="*60)
-
-def patient_menu(hospital: HospitalSystem) -> None:
-    while True:
-        print("\n--- PATIENT MANAGEMENT ---")
-        print("1. Register New Patient")
-        print("2. View Patient Details")
-        print("3. List All Patients")
-        print("4. Back to Main Menu")
-        choice = input("\nEnter your choice (1-4): ").strip()
-        if choice == "1":
-            try:
-                name = input("Enter patient name: ").strip()
-                while not re.match("^[A-Z][a-z]+ [A-Z][a-z]+$", name):
-                    print ("Error! Make sure you only use letters in your name")
-                    name = input("Please patient name: ")
-                age = int(input("Enter patient age: "))
-                while age <= 0 or age > 150:
-                    print ("Age must be between 1 and 150")
-                    age = int(input("Please enter patient age: "))
-                gender = input("Enter patient gender (male/female/other): ").strip().lower()
-                while not (gender in ['male', 'female', 'other']):
-                    print ("Gender must be male, female, or other")
-                    gender = input("Enter patient gender (male/female/other): ").strip().lower()
-                hospital.add_patient(name, age, gender)
-            except ValueError:
-                print("Invalid age! Please enter a valid number.")
-            except Exception as e:
-                print(f"Error: {e}")
-        elif choice == "2":
-            patient_id = input("Enter patient ID: ").strip().upper()
-            hospital.view_patient_details(patient_id)
-        elif choice == "3":
-            hospital.list_all_patients()
-        elif choice == "4":
-            break
-        else:
-            print("Invalid choice! Please try again.")
-
-def doctor_menu(hospital: HospitalSystem) -> None:
-    while True:
-        print("\n--- DOCTOR MANAGEMENT ---")
-        print("1. Add New Doctor")
-        print("2. View Doctor Details")
-        print("3. List All Doctors")
-        print("4. Back to Main Menu")
-        choice = input("\nEnter your choice (1-4): ").strip()
-        if choice == "1":
-            try:
-                name = input("Enter doctor name: ").strip()
-                while not re.match("^[A-Z][a-z]+ [A-Z][a-z]+$", name):
-                    print ("Error! Make sure you only use letters in your name")
-                    name = input("Please doctor name: ")
-                age = int(input("Enter doctor age: "))
-                while age <= 0 or age > 150:
-                    print ("Age must be between 1 and 150")
-                    age = int(input("Please enter doctor age: "))
-                gender = input("Enter doctor gender (male/female/other): ").strip().lower()
-                while not (gender in ['male', 'female', 'other']):
-                    print ("Gender must be male, female, or other")
-                    gender = input("Enter doctor gender (male/female/other): ").strip().lower()
-                specialty = input("Enter doctor specialty: ").strip()
-                hospital.add_doctor(name, age, gender, specialty)
-            except ValueError:
-                print("Invalid age! Please enter a valid number.")
-            except Exception as e:
-                print(f"Error: {e}")
-        elif choice == "2":
-            doctor_id = input("Enter doctor ID: ").strip().upper()
-            hospital.view_doctor_details(doctor_id)
-        elif choice == "3":
-            hospital.list_all_doctors()
-        elif choice == "4":
-            break
-        else:
-            print("Invalid choice! Please try again.")
-
-def appointment_menu(hospital: HospitalSystem) -> None:
-    while True:
-        print("\n--- APPOINTMENT MANAGEMENT ---")
-        print("1. Book Appointment")
-        print("2. Cancel Appointment")
-        print("3. View Appointment")
-        print("4. List All Appointments")
-        print("5. Back to Main Menu")
-        choice = input("\nEnter your choice (1-5): ").strip()
-        if choice == "1":
-            try:
-                patient_id = input("Enter patient ID: ").strip()
-                while patient_id not in hospital.patients:
-                    print("Patient not found!")
-                    patient_id = input("Enter patient ID: ").strip()
-                doctor_id = input("Enter doctor ID: ").strip()
-                while doctor_id not in hospital.doctors:
-                    print("Doctor not found!")
-                    doctor_id = input("Enter doctor ID: ").strip()
-                print("Available slots:")
-                print("Please enter the date and time for the appointment.")
-                year = input("Enter appointment year (YYYY): ").strip()
-                while not year.isdigit() or len(year) != 4 or int(year) < hospital.year:
-                    print("Invalid year! Please enter a valid year (YYYY). Year must be greater than or equal to the current year.")
-                    year = input("Enter appointment year (YYYY): ").strip()
-                month= input("Enter appointment month (1-12): ").strip()
-                while not month.isdigit() or int(month) < hospital.month or int(month) > 12:
-                    print("Invalid month! Please enter a valid month (1-12). Month must be greater than or equal to the current month.")
-                    month = input("Enter appointment month (1-12): ").strip()
-                day = input("Enter appointment day (1-31): ").strip()
-                while not day.isdigit() or (int(day) < hospital.day and int(month) <= hospital.month) or int(day) > 31:
-                    print("Invalid day! Please enter a valid day (1-31). Day must be greater than or equal to the current day.")
-                    day = input("Enter appointment day (1-31): ").strip()
-                print("Available slots:")
-                hospital.view_doctor_details(doctor_id)
-                date = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-                time = input("Enter appointment time (HH:MM): ").strip()
-                while not re.match(r"^(0[0-9]|1[0-9]|2[0-3]):[0-5][0-9]$", time) :
-                    print("Invalid time format! Please enter time in HH:MM format.")
-                    time = input("Enter appointment time (HH:MM): ").strip()
-                    while not hospital.is_available(doctor_id, date, time):
-                        print("Doctor is not available at this time. Please choose another time.")
-                        time = input("Enter appointment time (HH:MM): ").strip()
-                hospital.book_appointment(patient_id, doctor_id, date, time)
-            except Exception as e:
-                print(f"Error: {e}")
-        elif choice == "2":
-            appointment_id = input("Enter appointment ID: ").strip()
-            hospital.cancel_appointment(appointment_id)
-        elif choice == "3":
-            appointment_id = input("Enter appointment ID: ").strip()
-            hospital.view_appointment(appointment_id)
-        elif choice == "4":
-            hospital.list_all_appointments()
-        elif choice == "5":
-            break
-        else:
-            print("Invalid choice! Please try again.")
-
-def billing_menu(hospital: HospitalSystem) -> None:
-    while True:
-        print("\n--- BILLING SYSTEM ---")
-        print("1. Generate Bill")
-        print("2. Add Service to Bill")
-        print("3. View Bill/Receipt")
-        print("4. Back to Main Menu")
-        choice = input("\nEnter your choice (1-4): ").strip()
-        if choice == "1":
-            appointment_id = input("Enter appointment ID: ").strip()
-            hospital.generate_bill(appointment_id)
-        elif choice == "2":
-            try:
-                appointment_id = input("Enter appointment ID: ").strip()
-                service_name = input("Enter service name: ").strip()
-                fee = float(input("Enter service fee: "))
-                hospital.add_service_to_bill(appointment_id, service_name, fee)
-            except ValueError:
-                print("Invalid fee! Please enter a valid number.")
-            except Exception as e:
-                print(f"Error: {e}")
-        elif choice == "3":
-            appointment_id = input("Enter appointment ID: ").strip().upper()
-            hospital.view_bill(appointment_id)
-        elif choice == "4":
-            break
-        else:
-            print("Invalid choice! Please try again.")
-
-def view_records_menu(hospital: HospitalSystem) -> None:
-    while True:
-        print("\n--- VIEW RECORDS ---")
-        print("1. List All Patients")
-        print("2. List All Doctors")
-        print("3. List All Appointments")
-        print("4. Back to Main Menu")
-        choice = input("\nEnter your choice (1-4): ").strip()
-        if choice == "1":
-            hospital.list_all_patients()
-        elif choice == "2":
-            hospital.list_all_doctors()
-        elif choice == "3":
-            hospital.list_all_appointments()
-        elif choice == "4":
-            break
-        else:
-            print("Invalid choice! Please try again.")
-
-def main():
-    hospital = HospitalSystem()
-    print("Welcome to UCC Hospital Management System!")
-    print("Loading Sample Data...")
-    try:
-        hospital.add_patient("John Smith", 35, "male")
-        hospital.add_patient("Mary Johnson", 28, "female")
-        hospital.add_patient("Robert Davis", 45, "male")
-        hospital.add_doctor("Dr. Sarah Wilson", 40, "female", "Cardiology")
-        hospital.add_doctor("Dr. Michael Brown", 38, "male", "Pediatrics")
-        hospital.add_doctor("Dr. Lisa Garcia", 35, "female", "Neurology")
-        print("Sample data loaded successfully!")
-    except Exception as e:
-        print(f"Error loading sample data: {e}")
-    while True:
-        display_menu()
-        choice = input("\nEnter your choice (1-6): ").strip()
-        if choice == "1":
-            patient_menu(hospital)
-        elif choice == "2":
-            doctor_menu(hospital)
-        elif choice == "3":
-            appointment_menu(hospital)
-        elif choice == "4":
-            billing_menu(hospital)
-        elif choice == "5":
-            view_records_menu(hospital)
-        elif choice == "6":
-            print("\nThank you for using UCC Hospital Management System!")
-            print("Goodbye!")
-            break
-        else:
-            print("Invalid choice! Please try again.")
-
-if __name__ == "__main__":
+import argparse
+import atexit
+import os
+import re
+import sys
+from archive import AppointmentArchive
+from batch import run_script
+from metrics import FileExporter, Metrics
+from hospital_system import HospitalSystem
+from listing import appointment_row, doctor_row, patient_row
+from storage import WriteAheadLog
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hospital_data")
+
+def display_menu() -> None:
+    print("\n" + "="*60)
+    print("\t\tUCC HOSPITAL MANAGEMENT SYSTEM")
+    print("="*60)
+    print("1.  Patient Management")
+    print("2.  Doctor Management")
+    print("3.  Appointment Management")
+    print("4.  Billing System")
+    print("5.  View Records")
+    print("6.  Exit")
+    print("="*60)
+
+def patient_menu(hospital: HospitalSystem) -> None:
+    while True:
+        print("\n--- PATIENT MANAGEMENT ---")
+        print("1. Register New Patient")
+        print("2. View Patient Details")
+        print("3. List All Patients")
+        print("4. Search Patients by Name")
+        print("5. Back to Main Menu")
+        choice = input("\nEnter your choice (1-5): ").strip()
+        if choice == "1":
+            try:
+                name = input("Enter patient name: ").strip()
+                while not re.match("^[A-Z][a-z]+ [A-Z][a-z]+$", name):
+                    print ("Error! Make sure you only use letters in your name")
+                    name = input("Please patient name: ")
+                age = int(input("Enter patient age: "))
+                while age <= 0 or age > 150:
+                    print ("Age must be between 1 and 150")
+                    age = int(input("Please enter patient age: "))
+                gender = input("Enter patient gender (male/female/other): ").strip().lower()
+                while not (gender in ['male', 'female', 'other']):
+                    print ("Gender must be male, female, or other")
+                    gender = input("Enter patient gender (male/female/other): ").strip().lower()
+                matches = hospital.find_duplicate_patients(name, age, gender)
+                if matches:
+                    print("This patient may already be registered:")
+                    for patient_id, score in matches:
+                        patient = hospital.patients[patient_id]
+                        print(f"ID: {patient.patient_id} | {patient.name} | Age: {patient.age} | "
+                              f"Gender: {patient.gender} | Match: {score:.0%}")
+                    if input("Register as a new patient anyway? (y/n): ").strip().lower() != "y":
+                        continue
+                hospital.add_patient(name, age, gender)
+            except ValueError:
+                print("Invalid age! Please enter a valid number.")
+            except Exception as e:
+                print(f"Error: {e}")
+        elif choice == "2":
+            patient_id = input("Enter patient ID: ").strip().upper()
+            hospital.view_patient_details(patient_id)
+        elif choice == "3":
+            hospital.list_all_patients()
+        elif choice == "4":
+            prefix = input("Enter name or start of name: ").strip()
+            found = False
+            for patient in hospital.find_patients_by_name(prefix):
+                found = True
+                print(f"ID: {patient.patient_id} | {patient.name} | Age: {patient.age} | Gender: {patient.gender}")
+            if not found:
+                print("No matching patients.")
+        elif choice == "5":
+            break
+        else:
+            print("Invalid choice! Please try again.")
+
+def doctor_menu(hospital: HospitalSystem) -> None:
+    while True:
+        print("\n--- DOCTOR MANAGEMENT ---")
+        print("1. Add New Doctor")
+        print("2. View Doctor Details")
+        print("3. List All Doctors")
+        print("4. Back to Main Menu")
+        choice = input("\nEnter your choice (1-4): ").strip()
+        if choice == "1":
+            try:
+                name = input("Enter doctor name: ").strip()
+                while not re.match("^[A-Z][a-z]+ [A-Z][a-z]+$", name):
+                    print ("Error! Make sure you only use letters in your name")
+                    name = input("Please doctor name: ")
+                age = int(input("Enter doctor age: "))
+                while age <= 0 or age > 150:
+                    print ("Age must be between 1 and 150")
+                    age = int(input("Please enter doctor age: "))
+                gender = input("Enter doctor gender (male/female/other): ").strip().lower()
+                while not (gender in ['male', 'female', 'other']):
+                    print ("Gender must be male, female, or other")
+                    gender = input("Enter doctor gender (male/female/other): ").strip().lower()
+                specialty = input("Enter doctor specialty: ").strip()
+                hospital.add_doctor(name, age, gender, specialty)
+            except ValueError:
+                print("Invalid age! Please enter a valid number.")
+            except Exception as e:
+                print(f"Error: {e}")
+        elif choice == "2":
+            doctor_id = input("Enter doctor ID: ").strip().upper()
+            hospital.view_doctor_details(doctor_id)
+        elif choice == "3":
+            hospital.list_all_doctors()
+        elif choice == "4":
+            break
+        else:
+            print("Invalid choice! Please try again.")
+
+def appointment_menu(hospital: HospitalSystem) -> None:
+    while True:
+        print("\n--- APPOINTMENT MANAGEMENT ---")
+        print("1. Book Appointment")
+        print("2. Cancel Appointment")
+        print("3. View Appointment")
+        print("4. List All Appointments")
+        print("5. Find Earliest Available Slot")
+        print("6. Join Waitlist")
+        print("7. Respond to Waitlist Offer")
+        print("8. Back to Main Menu")
+        choice = input("\nEnter your choice (1-8): ").strip()
+        if choice == "1":
+            try:
+                patient_id = input("Enter patient ID: ").strip()
+                while patient_id not in hospital.patients:
+                    print("Patient not found!")
+                    patient_id = input("Enter patient ID: ").strip()
+                doctor_id = input("Enter doctor ID: ").strip()
+                while doctor_id not in hospital.doctors:
+                    print("Doctor not found!")
+                    doctor_id = input("Enter doctor ID: ").strip()
+                print("Available slots:")
+                print("Please enter the date and time for the appointment.")
+                year = input("Enter appointment year (YYYY): ").strip()
+                while not year.isdigit() or len(year) != 4 or int(year) < hospital.year:
+                    print("Invalid year! Please enter a valid year (YYYY). Year must be greater than or equal to the current year.")
+                    year = input("Enter appointment year (YYYY): ").strip()
+                month= input("Enter appointment month (1-12): ").strip()
+                while not month.isdigit() or int(month) < hospital.month or int(month) > 12:
+                    print("Invalid month! Please enter a valid month (1-12). Month must be greater than or equal to the current month.")
+                    month = input("Enter appointment month (1-12): ").strip()
+                day = input("Enter appointment day (1-31): ").strip()
+                while not day.isdigit() or (int(day) < hospital.day and int(month) <= hospital.month) or int(day) > 31:
+                    print("Invalid day! Please enter a valid day (1-31). Day must be greater than or equal to the current day.")
+                    day = input("Enter appointment day (1-31): ").strip()
+                date = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+                try:
+                    free = hospital.free_slots(doctor_id, date, date)
+                except ValueError:
+                    print("Invalid date! Please check the day of the month.")
+                    continue
+                print("Available slots:")
+                if free:
+                    print(", ".join(slot_time for _, slot_time in free))
+                else:
+                    print("No free slots on this date.")
+                time = input("Enter appointment time (HH:MM): ").strip()
+                while not re.match(r"^(0[0-9]|1[0-9]|2[0-3]):[0-5][0-9]$", time) :
+                    print("Invalid time format! Please enter time in HH:MM format.")
+                    time = input("Enter appointment time (HH:MM): ").strip()
+                    while not hospital.is_available(doctor_id, date, time):
+                        print("Doctor is not available at this time. Please choose another time.")
+                        time = input("Enter appointment time (HH:MM): ").strip()
+                hospital.book_appointment(patient_id, doctor_id, date, time)
+            except Exception as e:
+                print(f"Error: {e}")
+        elif choice == "2":
+            appointment_id = input("Enter appointment ID: ").strip()
+            hospital.cancel_appointment(appointment_id)
+        elif choice == "3":
+            appointment_id = input("Enter appointment ID: ").strip()
+            hospital.view_appointment(appointment_id)
+        elif choice == "4":
+            hospital.list_all_appointments()
+        elif choice == "5":
+            specialty = input("Enter specialty: ").strip()
+            start_date = input("Earliest date (YYYY-MM-DD): ").strip()
+            end_date = input("Latest date (YYYY-MM-DD): ").strip()
+            try:
+                slots = hospital.find_earliest_slots(specialty, start_date, end_date)
+            except ValueError:
+                print("Invalid date! Please use YYYY-MM-DD.")
+                continue
+            if not slots:
+                print("No free slots found for that specialty and date range.")
+            for slot_date, slot_time, doctor_id in slots:
+                print(f"{slot_date} {slot_time} | {hospital.doctors[doctor_id].name} (ID: {doctor_id})")
+        elif choice == "6":
+            patient_id = input("Enter patient ID: ").strip()
+            doctor_id = input("Enter doctor ID (leave blank to wait for any doctor of a specialty): ").strip()
+            specialty = None if doctor_id else input("Enter specialty: ").strip()
+            start_date = input("Earliest date (YYYY-MM-DD): ").strip()
+            end_date = input("Latest date (YYYY-MM-DD): ").strip()
+            auto_book = input("Book automatically when a slot frees up? (y/n): ").strip().lower() != "n"
+            hospital.join_waitlist(patient_id, start_date, end_date, doctor_id or None, specialty,
+                                   auto_book=auto_book)
+        elif choice == "7":
+            entry_id = input("Enter waitlist entry ID: ").strip()
+            if input("Accept the offered slot? (y/n): ").strip().lower() == "y":
+                hospital.accept_offer(entry_id)
+            else:
+                hospital.decline_offer(entry_id)
+        elif choice == "8":
+            break
+        else:
+            print("Invalid choice! Please try again.")
+
+def billing_menu(hospital: HospitalSystem) -> None:
+    while True:
+        print("\n--- BILLING SYSTEM ---")
+        print("1. Generate Bill")
+        print("2. Add Service to Bill")
+        print("3. View Bill/Receipt")
+        print("4. Print Receipts for a Date")
+        print("5. Bill All Confirmed Appointments")
+        print("6. Back to Main Menu")
+        choice = input("\nEnter your choice (1-6): ").strip()
+        if choice == "1":
+            appointment_id = input("Enter appointment ID: ").strip()
+            hospital.generate_bill(appointment_id)
+        elif choice == "2":
+            try:
+                appointment_id = input("Enter appointment ID: ").strip()
+                service_name = input("Enter service code or name: ").strip()
+                fee = input("Enter service fee (blank to use the price list): ").strip()
+                hospital.add_service_to_bill(appointment_id, service_name, float(fee) if fee else None)
+            except ValueError:
+                print("Invalid fee! Please enter a valid number.")
+            except Exception as e:
+                print(f"Error: {e}")
+        elif choice == "3":
+            appointment_id = input("Enter appointment ID: ").strip().upper()
+            hospital.view_bill(appointment_id)
+        elif choice == "4":
+            try:
+                date = input("Enter date (YYYY-MM-DD): ").strip()
+                end_date = input("Enter end date for a range (blank for one day): ").strip() or None
+                filename = input("Enter output file name: ").strip()
+                count = hospital.export_receipts(filename, date, end_date)
+                print(f"{count} receipt(s) written to {filename}")
+            except ValueError:
+                print("Invalid date format! Please use YYYY-MM-DD.")
+            except OSError as e:
+                print(f"Error writing receipts: {e}")
+        elif choice == "5":
+            date = input("Enter date (YYYY-MM-DD, blank for any): ").strip() or None
+            doctor_id = input("Enter doctor ID (blank for all doctors): ").strip().upper() or None
+            hospital.bill_confirmed(date, doctor_id)
+        elif choice == "6":
+            break
+        else:
+            print("Invalid choice! Please try again.")
+
+def page_through(title: str, fetch, format_row) -> None:
+    """Show records one page at a time; only the rows on screen are formatted"""
+    rows, cursor = fetch(None)
+    if not rows:
+        print("No records found.")
+        return
+    print(f"\n=== {title} ===")
+    while True:
+        for row in rows:
+            print(format_row(row))
+        if cursor is None:
+            break
+        if input("-- Press Enter for more, or 'q' to stop: ").strip().lower() == "q":
+            break
+        rows, cursor = fetch(cursor)
+
+def view_records_menu(hospital: HospitalSystem) -> None:
+    while True:
+        print("\n--- VIEW RECORDS ---")
+        print("1. List All Patients")
+        print("2. List All Doctors")
+        print("3. List All Appointments")
+        print("4. Back to Main Menu")
+        choice = input("\nEnter your choice (1-4): ").strip()
+        if choice == "1":
+            page_through("ALL PATIENTS", lambda cursor: hospital.page_patients(cursor), patient_row)
+        elif choice == "2":
+            specialty = input("Filter by specialty (blank for all): ").strip() or None
+            page_through("ALL DOCTORS", lambda cursor: hospital.page_doctors(cursor, specialty=specialty),
+                         doctor_row)
+        elif choice == "3":
+            status = input("Filter by status - Scheduled/Confirmed/Cancelled (blank for all): ").strip() or None
+            page_through("ALL APPOINTMENTS",
+                         lambda cursor: hospital.page_appointments(cursor, status=status), appointment_row)
+        elif choice == "4":
+            break
+        else:
+            print("Invalid choice! Please try again.")
+
+def run_batch(hospital: HospitalSystem, options) -> int:
+    """Run a command file (or stdin) and print a summary; returns the exit status"""
+    source = sys.stdin if options.batch == "-" else open(options.batch, encoding="utf-8")
+    # Block-buffered output, so per-record lines do not cost a write each
+    out = open(sys.stdout.fileno(), "w", buffering=1 << 16, encoding="utf-8", closefd=False)
+    try:
+        summary = run_script(hospital, source, out, quiet=options.quiet, stop_on_error=options.stop_on_error)
+        out.write(f"{summary}\n")
+    finally:
+        out.flush()
+        if source is not sys.stdin:
+            source.close()
+    return 1 if summary.failed else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="UCC Hospital Management System")
+    parser.add_argument("--batch", metavar="FILE", help="run the operations in FILE ('-' for stdin) and exit")
+    parser.add_argument("--quiet", action="store_true", help="in batch mode, only report failures")
+    parser.add_argument("--stop-on-error", action="store_true", help="in batch mode, stop at the first failure")
+    parser.add_argument("--data", default=DATA_DIR, help="directory of the saved records")
+    parser.add_argument("--memory", action="store_true", help="do not load or save records")
+    parser.add_argument("--archive", metavar="DIR",
+                        help="archive of past appointments to look up (default: DATA/archive, if present)")
+    parser.add_argument("--metrics", metavar="FILE", help="write operation counters and latencies to FILE")
+    options = parser.parse_args(argv)
+
+    metrics = Metrics() if options.metrics else None
+    hospital = HospitalSystem(None if options.memory else WriteAheadLog(options.data), metrics=metrics)
+    atexit.register(hospital.close)
+    archive_dir = options.archive or os.path.join(options.data, "archive")
+    if options.archive or os.path.isdir(archive_dir):
+        hospital.attach_archive(AppointmentArchive(archive_dir))
+    if metrics is not None:
+        atexit.register(FileExporter(metrics, options.metrics).start().stop)
+    if options.batch:
+        sys.exit(run_batch(hospital, options))
+    print("Welcome to UCC Hospital Management System!")
+    if hospital.patients or hospital.doctors:
+        print(f"Loaded {len(hospital.patients)} patients, {len(hospital.doctors)} doctors "
+              f"and {len(hospital.appointments)} appointments from storage.")
+    else:
+        print("Loading Sample Data...")
+        try:
+            hospital.add_patient("John Smith", 35, "male")
+            hospital.add_patient("Mary Johnson", 28, "female")
+            hospital.add_patient("Robert Davis", 45, "male")
+            hospital.add_doctor("Dr. Sarah Wilson", 40, "female", "Cardiology")
+            hospital.add_doctor("Dr. Michael Brown", 38, "male", "Pediatrics")
+            hospital.add_doctor("Dr. Lisa Garcia", 35, "female", "Neurology")
+            print("Sample data loaded successfully!")
+        except Exception as e:
+            print(f"Error loading sample data: {e}")
+    while True:
+        display_menu()
+        choice = input("\nEnter your choice (1-6): ").strip()
+        if choice == "1":
+            patient_menu(hospital)
+        elif choice == "2":
+            doctor_menu(hospital)
+        elif choice == "3":
+            appointment_menu(hospital)
+        elif choice == "4":
+            billing_menu(hospital)
+        elif choice == "5":
+            view_records_menu(hospital)
+        elif choice == "6":
+            print("\nThank you for using UCC Hospital Management System!")
+            print("Goodbye!")
+            break
+        else:
+            print("Invalid choice! Please try again.")
+
+if __name__ == "__main__":
     main() 
\ No newline at end of file
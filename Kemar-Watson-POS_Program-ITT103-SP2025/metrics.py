@@ -0,0 +1,178 @@
+import collections
+import functools
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Deque, Dict, Iterable, List, Optional
+
+Event = Dict[str, object]
+
+# Latency buckets are powers of two in microseconds: bucket i holds [2**(i-1), 2**i) us
+BUCKETS = 40
+
+
+class Histogram:
+    """Latency distribution with log2 microsecond buckets"""
+
+    __slots__ = ("count", "total", "minimum", "maximum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = float("inf")
+        self.maximum = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds < self.minimum:
+            self.minimum = seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (seconds) of the bucket holding the given fraction of observations"""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                return min((1 << index) / 1e6, self.maximum)
+        return self.maximum
+
+    def to_dict(self) -> Dict:
+        return {"count": self.count, "mean_us": self.total / self.count * 1e6 if self.count else 0.0,
+                "min_us": self.minimum * 1e6 if self.count else 0.0, "max_us": self.maximum * 1e6,
+                "p50_us": self.percentile(0.5) * 1e6, "p99_us": self.percentile(0.99) * 1e6}
+
+
+class Metrics:
+    """Counters, per-operation latency histograms and sampled structured events
+
+    Every outcome is counted; only a `sample_rate` share of the events is
+    kept in `recent` and passed to the sinks, so a busy system can keep
+    events on without paying for each one.
+    """
+
+    enabled = True
+
+    def __init__(self, sample_rate: float = 1.0, recent: int = 1000,
+                 sinks: Iterable[Callable[[Event], None]] = ()):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.sample_rate = sample_rate
+        # (operation, outcome) or (name,) -> count; keys are joined with '.' in snapshots
+        self.counters: Dict[tuple, int] = collections.Counter()
+        self.histograms: Dict[str, Histogram] = {}
+        self.recent: Deque[Event] = collections.deque(maxlen=recent)
+        self.sinks: List[Callable[[Event], None]] = list(sinks)
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[(name,)] += amount
+
+    def observe(self, operation: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(operation)
+            if histogram is None:
+                histogram = self.histograms[operation] = Histogram()
+            histogram.observe(seconds)
+
+    def event(self, operation: str, outcome: str, **fields) -> None:
+        """Count `operation.outcome` and, if sampled, record the event with its fields"""
+        with self._lock:
+            self.counters[(operation, outcome)] += 1
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        event = {"time": time.time(), "operation": operation, "outcome": outcome}
+        event.update(fields)
+        self.recent.append(event)
+        for sink in self.sinks:
+            sink(event)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"time": time.time(), "uptime_s": time.time() - self.started,
+                    "counters": {".".join(key): count for key, count in self.counters.items()},
+                    "latency": {name: histogram.to_dict() for name, histogram in self.histograms.items()}}
+
+    def export(self, path: str) -> None:
+        """Write a JSON snapshot to `path`, replacing it atomically"""
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(self.snapshot(), handle, indent=2, sort_keys=True)
+        os.replace(temporary, path)
+
+
+class NullMetrics:
+    """Metrics switched off: every call returns at once"""
+
+    enabled = False
+
+    def count(self, name: str, amount: int = 1) -> None:
+        pass
+
+    def observe(self, operation: str, seconds: float) -> None:
+        pass
+
+    def event(self, operation: str, outcome: str, **fields) -> None:
+        pass
+
+    def snapshot(self) -> Dict:
+        return {}
+
+
+NULL_METRICS = NullMetrics()
+
+
+def timed(operation: str):
+    """Record the latency of a HospitalSystem method in `self.metrics` under `operation`"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = self.metrics
+            if not metrics.enabled:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                metrics.observe(operation, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class FileExporter:
+    """Background thread writing a metrics snapshot to a file every `interval` seconds"""
+
+    def __init__(self, metrics: Metrics, path: str, interval: float = 10.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FileExporter":
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.metrics.export(self.path)
+
+    def stop(self) -> None:
+        """Stop the thread and write a final snapshot"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.metrics.export(self.path)
@@ -1,33 +1,37 @@
-import random
-from person import Person
-
-class Patient(Person):
-    """Patient class inheriting from Person"""
-    
-    def __init__(self, name: str, age: int, gender: str):
-        super().__init__(name, age, gender)
-        self.patient_id = self._generate_id()
-        self.appointment_list = []
-    
-    def _generate_id(self) -> str:
-        """Generate unique patient ID"""
-        return f"P{random.randint(10000, 99999)}"
-    
-    def book_appointment(self, appointment) -> bool:
-        """Book an appointment for the patient"""
-        try:
-            if appointment not in self.appointment_list:
-                self.appointment_list.append(appointment)
-                return True
-            return False
-        except Exception as e:
-            print(f"Error booking appointment: {e}")
-            return False
-    
-    def view_profile(self) -> str:
-        """View patient profile"""
-        profile = f"\n=== PATIENT PROFILE ===\n"
-        profile += f"Patient ID: {self.patient_id}\n"
-        profile += f"{super().display()}\n"
-        profile += f"Total Appointments: {len(self.appointment_list)}\n"
+from typing import Optional
+from history import PatientHistory
+from id_allocator import get_allocator
+from person import Person
+
+class Patient(Person):
+    """Patient class inheriting from Person"""
+
+    __slots__ = ("patient_id", "history")
+    
+    def __init__(self, name: str, age: int, gender: str, patient_id: Optional[str] = None):
+        super().__init__(name, age, gender)
+        self.patient_id = patient_id or self._generate_id()
+        # IDs rather than objects, so cancelled or archived appointments are not kept alive
+        self.history = PatientHistory(self.patient_id)
+    
+    def _generate_id(self) -> str:
+        """Generate unique patient ID"""
+        return get_allocator().next_id("P")
+    
+    def book_appointment(self, appointment) -> bool:
+        """Book an appointment for the patient"""
+        try:
+            return self.history.add(appointment.appointment_id, appointment.date_key, appointment.time_key)
+        except Exception as e:
+            print(f"Error booking appointment: {e}")
+            return False
+    
+    def view_profile(self) -> str:
+        """View patient profile"""
+        profile = f"\n=== PATIENT PROFILE ===\n"
+        profile += f"Patient ID: {self.patient_id}\n"
+        profile += f"{super().display()}\n"
+        profile += f"Total Appointments: {self.history.count}\n"
+        if self.history.archived:
+            profile += f"Archived Appointments: {self.history.archived}\n"
         return profile 
\ No newline at end of file
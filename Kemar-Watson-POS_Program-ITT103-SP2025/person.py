@@ -1,33 +1,45 @@
-from abc import abstractmethod
-
-
-class Person:
-    """Base class for all persons in the hospital system"""
-    
-    def __init__(self, name: str, age: int, gender: str):
-        self.name = name
-        self.age = age
-        self.gender = gender
-
-    @abstractmethod
-    def _generate_id(self) -> str:
-        """Generate unique ID for the person"""
-        pass
-    
-    def validate(self) -> bool:
-        """Validate person data"""
-        try:
-            if not self.name or len(self.name.strip()) == 0:
-                raise ValueError("Name cannot be empty")
-            if self.age <= 0 or self.age > 150:
-                raise ValueError("Age must be between 1 and 150")
-            if self.gender.lower() not in ['male', 'female', 'other']:
-                raise ValueError("Gender must be male, female, or other")
-            return True
-        except Exception as e:
-            print(f"Validation error: {e}")
-            return False
-    
-    def display(self) -> str:
-        """Display person information"""
+from abc import abstractmethod
+from typing import Optional
+
+
+class Person:
+    """Base class for all persons in the hospital system"""
+
+    # Fixed attribute slots instead of a per-instance __dict__ keep records small
+    __slots__ = ("name", "age", "gender")
+    
+    def __init__(self, name: str, age: int, gender: str):
+        self.name = name
+        self.age = age
+        self.gender = gender
+
+    @abstractmethod
+    def _generate_id(self) -> str:
+        """Generate unique ID for the person"""
+        pass
+    
+    @staticmethod
+    def check_fields(name: str, age: int, gender: str) -> Optional[str]:
+        """Return the reason the fields are invalid, or None if they are valid"""
+        try:
+            if not name or len(name.strip()) == 0:
+                return "Name cannot be empty"
+            if age <= 0 or age > 150:
+                return "Age must be between 1 and 150"
+            if gender.lower() not in ['male', 'female', 'other']:
+                return "Gender must be male, female, or other"
+            return None
+        except Exception as e:
+            return str(e)
+
+    def validate(self) -> bool:
+        """Validate person data"""
+        error = self.check_fields(self.name, self.age, self.gender)
+        if error is not None:
+            print(f"Validation error: {error}")
+            return False
+        return True
+    
+    def display(self) -> str:
+        """Display person information"""
         return f"Name: {self.name}, Age: {self.age}, Gender: {self.gender}" 
\ No newline at end of file
@@ -0,0 +1,507 @@
+import datetime
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from calendar_model import date_key, format_date, format_time
+from columnar import STATUS_CODES, STATUSES, AppointmentColumns, status_name
+from listing import DEFAULT_PAGE_SIZE, doctor_filter, paginate, patient_filter
+
+FORMAT = "hospital-snapshot/2"
+HEADER_SIZE = 4096
+CURRENT = "CURRENT"
+
+# Kinds of line in the records region
+PATIENT, DOCTOR, APPOINTMENT, BILL = "p", "d", "a", "b"
+
+# Column name -> array typecode, in file order
+COLUMNS = (("number", "q"), ("doctor", "i"), ("patient", "i"), ("date", "i"), ("time", "h"),
+           ("status", "b"), ("fee", "i"), ("bill", "q"))
+
+
+class PatientRecord(NamedTuple):
+    patient_id: str
+    name: str
+    age: int
+    gender: str
+
+
+class DoctorRecord(NamedTuple):
+    doctor_id: str
+    name: str
+    age: int
+    gender: str
+    specialty: str
+
+
+class BillRecord(NamedTuple):
+    appointment_id: str
+    consultation_cents: int
+    service_cents: Dict[str, int]
+    issued_at: str
+
+    @property
+    def total_cents(self) -> int:
+        return self.consultation_cents + sum(self.service_cents.values())
+
+
+class AppointmentRecord:
+    """An appointment row of a snapshot, with the attributes the listing rows and commands read"""
+
+    __slots__ = ("appointment_id", "patient", "doctor", "date_key", "time_key", "status")
+
+    def __init__(self, appointment_id: str, patient: PatientRecord, doctor: DoctorRecord, day: int, minute: int,
+                 status: str):
+        self.appointment_id = appointment_id
+        self.patient = patient
+        self.doctor = doctor
+        self.date_key = day
+        self.time_key = minute
+        self.status = status
+
+    @property
+    def date(self) -> str:
+        return format_date(self.date_key)
+
+    @property
+    def time(self) -> str:
+        return format_time(self.time_key)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _bill_entry(bill) -> list:
+    return [BILL, bill.appointment.appointment_id, bill.consultation_cents, list(bill.service_cents.items()),
+            bill.issued_at.isoformat()]
+
+
+def _file_name(version: int) -> str:
+    return f"snapshot-{version:08d}.bin"
+
+
+class SnapshotPublisher:
+    """Publishes read-only images of a hospital's appointments, patients, doctors and bills
+
+    A snapshot file holds a JSON header, one fixed-width section per
+    appointment column (sized with room to grow), an append-only dictionary
+    of the codes the columns use, and an append-only records region: one
+    line per patient and doctor, per appointment row (its ID) and per bill
+    version. Only copying the data happens under the hospital's locks, and
+    patients and doctors, which never change once registered, are read
+    after they are released; files are written afterwards, so bookings
+    carry on while a snapshot is built. An incremental publish copies the
+    new rows, the rows whose status or bill changed and the records added
+    since the previous version, then writes them into a copy of that
+    version; published files are never modified, so readers keep a
+    consistent image until they reopen.
+    """
+
+    def __init__(self, hospital, directory: str, keep: int = 3):
+        self.hospital = hospital
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        # Keep numbering after versions left by an earlier run; the first publish is always full
+        self.version = max((int(name[9:17]) for name in os.listdir(directory)
+                            if name.startswith("snapshot-") and name.endswith(".bin")), default=0)
+        self._header: Optional[dict] = None
+        self._columns: Optional[AppointmentColumns] = None
+        self._lock = threading.Lock()
+
+    def publish(self, full: bool = False) -> dict:
+        """Write the next version and point CURRENT at it; returns timing and size figures"""
+        with self._lock:
+            started = time.perf_counter()
+            with self.hospital._locks.all():
+                columns = self.hospital.appointment_columns()
+                previous = self._header
+                incremental = (not full and previous is not None and columns is self._columns
+                               and len(columns) <= previous["capacity"])
+                if incremental:
+                    capture = self._capture_changes(columns, previous)
+                else:
+                    capture = self._capture_all(columns)
+                # Start tracking in-place changes from this image on
+                columns.take_changes()
+                self._columns = columns
+            captured = time.perf_counter()
+
+            version = self.version + 1
+            path = os.path.join(self.directory, _file_name(version))
+            if incremental:
+                header = self._write_changes(path, previous, capture)
+                if header is None:
+                    # The dictionary or the records outgrew their region; rebuild from a full copy
+                    with self.hospital._locks.all():
+                        capture = self._capture_all(columns)
+                        columns.take_changes()
+                    incremental = False
+            if not incremental:
+                header = self._write_all(path, capture)
+            header["version"] = version
+            header["created"] = datetime.datetime.now().isoformat(timespec="seconds")
+            header["parent"] = previous["version"] if incremental else None
+            self._write_header(path + ".tmp", header)
+            os.replace(path + ".tmp", path)
+            with open(os.path.join(self.directory, CURRENT + ".tmp"), "w", encoding="utf-8") as handle:
+                handle.write(_file_name(version))
+            os.replace(os.path.join(self.directory, CURRENT + ".tmp"), os.path.join(self.directory, CURRENT))
+            self.version, self._header = version, header
+            self._prune()
+            return {"version": version, "path": path, "rows": header["rows"], "incremental": incremental,
+                    "capture_seconds": captured - started, "total_seconds": time.perf_counter() - started}
+
+    @staticmethod
+    def _dictionary(columns: AppointmentColumns, doctors: int, patients: int, specialties: int) -> List[list]:
+        entries: List[list] = [["S", name] for name in columns.specialties[specialties:]]
+        entries.extend(["D", doctor_id, columns.doctor_specialty[code]]
+                       for code, doctor_id in enumerate(columns.doctor_ids[doctors:], doctors))
+        entries.extend(["P", patient_id] for patient_id in columns.patient_ids[patients:])
+        return entries
+
+    @staticmethod
+    def _counts(columns: AppointmentColumns) -> Dict[str, int]:
+        return {"doctors": len(columns.doctor_ids), "patients": len(columns.patient_ids),
+                "specialties": len(columns.specialties)}
+
+    def _registered(self) -> Dict[str, int]:
+        return {"patients": len(self.hospital.patient_order), "doctors": len(self.hospital.doctor_order)}
+
+    def _capture_all(self, columns: AppointmentColumns) -> dict:
+        return {"arrays": {name: getattr(columns, name)[:] for name, _ in COLUMNS},
+                "dictionary": self._dictionary(columns, 0, 0, 0), "counts": self._counts(columns),
+                "ids": columns.ids[:], "bills": [_bill_entry(bill) for bill in self.hospital.bills.values()],
+                "since": {"patients": 0, "doctors": 0}, "registered": self._registered()}
+
+    def _capture_changes(self, columns: AppointmentColumns, previous: dict) -> dict:
+        start = previous["rows"]
+        counts = previous["counts"]
+        changes = sorted(columns.take_changes())
+        changed = [row for row in changes if row < start]
+        # A bill changing marks its row, new rows included; archived rows have no bill left to copy
+        bills, ids = self.hospital.bills, columns.ids
+        bill_entries = [_bill_entry(bills[ids[row]]) for row in changes if ids[row] in bills]
+        return {"start": start,
+                "tails": {name: getattr(columns, name)[start:] for name, _ in COLUMNS},
+                "changed": [(row, columns.status[row], columns.bill[row]) for row in changed],
+                "dictionary": self._dictionary(columns, counts["doctors"], counts["patients"],
+                                               counts["specialties"]),
+                "counts": self._counts(columns),
+                "ids": ids[start:], "bills": bill_entries,
+                "since": previous["registered"], "registered": self._registered()}
+
+    def _records(self, capture: dict) -> List[list]:
+        """Lines for the records region; reads patients and doctors, so call it without the locks"""
+        hospital = self.hospital
+        since, registered = capture["since"], capture["registered"]
+        patients, doctors = hospital.patients, hospital.doctors
+        entries: List[list] = []
+        for patient_id in hospital.patient_order.ids(since["patients"], registered["patients"]):
+            patient = patients[patient_id]
+            entries.append([PATIENT, patient_id, patient.name, patient.age, patient.gender])
+        for doctor_id in hospital.doctor_order.ids(since["doctors"], registered["doctors"]):
+            doctor = doctors[doctor_id]
+            entries.append([DOCTOR, doctor_id, doctor.name, doctor.age, doctor.gender, doctor.specialty])
+        entries.extend([APPOINTMENT, appointment_id] for appointment_id in capture["ids"])
+        entries.extend(capture["bills"])
+        return entries
+
+    @staticmethod
+    def _encode(entries: List[list]) -> bytes:
+        return "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries).encode("utf-8")
+
+    @staticmethod
+    def _region(data: bytes) -> int:
+        """Capacity of a new append-only region holding `data`"""
+        return len(data) + max(len(data) // 2, 1 << 16)
+
+    def _write_all(self, path: str, capture: dict) -> dict:
+        rows = len(capture["arrays"]["date"])
+        capacity = rows + max(rows // 2, 1024)
+        dictionary = self._encode(capture["dictionary"])
+        offset = HEADER_SIZE
+        sections = {}
+        for name, typecode in COLUMNS:
+            offset = _align(offset)
+            sections[name] = [offset, typecode]
+            offset += capacity * array(typecode).itemsize
+        dictionary_offset = _align(offset)
+        dictionary_capacity = self._region(dictionary)
+        records = self._encode(self._records(capture))
+        records_offset = _align(dictionary_offset + dictionary_capacity)
+        records_capacity = self._region(records)
+        with open(path + ".tmp", "wb") as handle:
+            for name, (section, _) in sections.items():
+                handle.seek(section)
+                handle.write(capture["arrays"][name].tobytes())
+            handle.seek(dictionary_offset)
+            handle.write(dictionary)
+            handle.seek(records_offset)
+            handle.write(records)
+            handle.truncate(records_offset + records_capacity)
+        return {"format": FORMAT, "rows": rows, "capacity": capacity, "columns": sections,
+                "dictionary": [dictionary_offset, len(dictionary), dictionary_capacity],
+                "records": [records_offset, len(records), records_capacity],
+                "counts": capture["counts"], "registered": capture["registered"]}
+
+    def _write_changes(self, path: str, previous: dict, capture: dict) -> Optional[dict]:
+        dictionary = self._encode(capture["dictionary"])
+        dictionary_offset, used, dictionary_capacity = previous["dictionary"]
+        records = self._encode(self._records(capture))
+        records_offset, records_used, records_capacity = previous["records"]
+        if used + len(dictionary) > dictionary_capacity or records_used + len(records) > records_capacity:
+            return None
+        shutil.copyfile(os.path.join(self.directory, _file_name(previous["version"])), path + ".tmp")
+        with open(path + ".tmp", "r+b") as handle, mmap.mmap(handle.fileno(), 0) as image:
+            start = capture["start"]
+            for name, typecode in COLUMNS:
+                tail = capture["tails"][name]
+                offset = previous["columns"][name][0] + start * tail.itemsize
+                image[offset:offset + len(tail) * tail.itemsize] = tail.tobytes()
+            capacity = previous["capacity"]
+            offset = previous["columns"]["status"][0]
+            status = memoryview(image)[offset:offset + capacity].cast("b")
+            offset = previous["columns"]["bill"][0]
+            bill = memoryview(image)[offset:offset + capacity * 8].cast("q")
+            try:
+                for row, row_status, row_bill in capture["changed"]:
+                    status[row] = row_status
+                    bill[row] = row_bill
+            finally:
+                status.release()
+                bill.release()
+            image[dictionary_offset + used:dictionary_offset + used + len(dictionary)] = dictionary
+            image[records_offset + records_used:records_offset + records_used + len(records)] = records
+        header = dict(previous)
+        header["rows"] = start + len(capture["tails"]["date"])
+        header["dictionary"] = [dictionary_offset, used + len(dictionary), dictionary_capacity]
+        header["records"] = [records_offset, records_used + len(records), records_capacity]
+        header["counts"] = capture["counts"]
+        header["registered"] = capture["registered"]
+        return header
+
+    @staticmethod
+    def _write_header(path: str, header: dict) -> None:
+        encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        if len(encoded) >= HEADER_SIZE:
+            raise ValueError("Snapshot header does not fit in its block")
+        with open(path, "r+b") as handle:
+            handle.write(encoded.ljust(HEADER_SIZE, b" "))
+
+    def _prune(self) -> None:
+        published = sorted(name for name in os.listdir(self.directory)
+                           if name.startswith("snapshot-") and name.endswith(".bin"))
+        for name in published[:-self.keep]:
+            # Readers that still map an old version keep it alive until they close it
+            os.remove(os.path.join(self.directory, name))
+
+
+class Snapshot:
+    """A published snapshot mapped read-only
+
+    Columns are zero-copy views of the file, so reports attach at once.
+    The records region (patients, doctors, appointment IDs and bills) is
+    parsed on the first call that needs it. Listings follow the live
+    system's order and filters, except that appointments archived after
+    they were published stay listed with their final status, as they stay
+    in the reports; the line items of their bills may be gone.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = json.loads(self._map[:HEADER_SIZE])
+        if self.header.get("format") != FORMAT:
+            raise ValueError(f"Not a snapshot file: {path}")
+        self.version: int = self.header["version"]
+        self.rows: int = self.header["rows"]
+        self._views: Dict[str, memoryview] = {}
+        self._entries: Optional[Dict[str, list]] = None
+        # (patients, doctors, appointment IDs by row, bills), once parsed
+        self._parsed: Optional[Tuple[Dict[str, PatientRecord], Dict[str, DoctorRecord], List[str],
+                                     Dict[str, BillRecord]]] = None
+        self._patient_list: Optional[List[PatientRecord]] = None
+        self._doctor_list: Optional[List[DoctorRecord]] = None
+        self._row_of: Optional[Dict[str, int]] = None
+        # Column codes of doctor and patient IDs, for filtering
+        self._codes: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None
+
+    @classmethod
+    def latest(cls, directory: str) -> "Snapshot":
+        """Open the version CURRENT points at"""
+        with open(os.path.join(directory, CURRENT), encoding="utf-8") as handle:
+            return cls(os.path.join(directory, handle.read().strip()))
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> memoryview:
+        """The first `rows` values of a column, read straight from the mapping"""
+        view = self._views.get(name)
+        if view is None:
+            offset, typecode = self.header["columns"][name]
+            size = array(typecode).itemsize
+            view = self._views[name] = memoryview(self._map)[offset:offset + self.rows * size].cast(typecode)
+        return view
+
+    def dictionary(self) -> Dict[str, list]:
+        if self._entries is None:
+            offset, used, _ = self.header["dictionary"]
+            entries: Dict[str, list] = {"S": [], "D": [], "P": []}
+            for line in self._map[offset:offset + used].splitlines():
+                entry = json.loads(line)
+                entries[entry[0]].append(entry[1:])
+            self._entries = entries
+        return self._entries
+
+    def columns(self, use_numpy: Optional[bool] = None) -> AppointmentColumns:
+        """The snapshot as AppointmentColumns, so the hospital's reports run against it"""
+        columns = AppointmentColumns(use_numpy)
+        for name, _ in COLUMNS:
+            setattr(columns, name, self.column(name))
+        entries = self.dictionary()
+        columns.specialties = [name for name, in entries["S"]]
+        columns.doctor_ids = [doctor_id for doctor_id, _ in entries["D"]]
+        columns.doctor_specialty = array("i", [specialty for _, specialty in entries["D"]])
+        columns.patient_ids = [patient_id for patient_id, in entries["P"]]
+        return columns
+
+    def _records(self):
+        if self._parsed is None:
+            offset, used, _ = self.header["records"]
+            patients: Dict[str, PatientRecord] = {}
+            doctors: Dict[str, DoctorRecord] = {}
+            ids: List[str] = []
+            bills: Dict[str, BillRecord] = {}
+            for line in self._map[offset:offset + used].splitlines():
+                entry = json.loads(line)
+                kind = entry[0]
+                if kind == APPOINTMENT:
+                    ids.append(entry[1])
+                elif kind == BILL:
+                    # A changed bill is appended again; the last version wins
+                    bills[entry[1]] = BillRecord(entry[1], entry[2], dict(entry[3]), entry[4])
+                elif kind == PATIENT:
+                    patients[entry[1]] = PatientRecord(*entry[1:])
+                else:
+                    doctors[entry[1]] = DoctorRecord(*entry[1:])
+            self._parsed = patients, doctors, ids, bills
+        return self._parsed
+
+    def patient(self, patient_id: str) -> Optional[PatientRecord]:
+        return self._records()[0].get(patient_id)
+
+    def doctor(self, doctor_id: str) -> Optional[DoctorRecord]:
+        return self._records()[1].get(doctor_id)
+
+    def bill(self, appointment_id: str) -> Optional[BillRecord]:
+        return self._records()[3].get(appointment_id)
+
+    def appointment(self, appointment_id: str) -> Optional[AppointmentRecord]:
+        if self._row_of is None:
+            self._row_of = {appointment_id: row for row, appointment_id in enumerate(self._records()[2])}
+        row = self._row_of.get(appointment_id)
+        return None if row is None else self._appointment_at(row)
+
+    def _appointment_at(self, row: int) -> AppointmentRecord:
+        patients, doctors, ids, _ = self._records()
+        entries = self.dictionary()
+        return AppointmentRecord(ids[row], patients[entries["P"][self.column("patient")[row]][0]],
+                                 doctors[entries["D"][self.column("doctor")[row]][0]],
+                                 self.column("date")[row], self.column("time")[row],
+                                 STATUSES[self.column("status")[row]])
+
+    def _patients(self) -> List[PatientRecord]:
+        if self._patient_list is None:
+            self._patient_list = list(self._records()[0].values())
+        return self._patient_list
+
+    def _doctors(self) -> List[DoctorRecord]:
+        if self._doctor_list is None:
+            self._doctor_list = list(self._records()[1].values())
+        return self._doctor_list
+
+    @staticmethod
+    def _scan(records: list, start: int, predicate) -> Iterator[Tuple[int, tuple]]:
+        for position in range(start, len(records)):
+            if predicate is None or predicate(records[position]):
+                yield position, records[position]
+
+    def iter_patients(self, gender: Optional[str] = None, min_age: Optional[int] = None,
+                      max_age: Optional[int] = None) -> Iterator[PatientRecord]:
+        """Patients in registration order, optionally filtered, as HospitalSystem.iter_patients"""
+        scanned = self._scan(self._patients(), 0, patient_filter(gender, min_age, max_age))
+        return (patient for _, patient in scanned)
+
+    def page_patients(self, cursor: Optional[int] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                      gender: Optional[str] = None, min_age: Optional[int] = None,
+                      max_age: Optional[int] = None) -> Tuple[List[PatientRecord], Optional[int]]:
+        return paginate(self._scan(self._patients(), cursor or 0, patient_filter(gender, min_age, max_age)),
+                        page_size)
+
+    def iter_doctors(self, specialty: Optional[str] = None) -> Iterator[DoctorRecord]:
+        return (doctor for _, doctor in self._scan(self._doctors(), 0, doctor_filter(specialty)))
+
+    def page_doctors(self, cursor: Optional[int] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                     specialty: Optional[str] = None) -> Tuple[List[DoctorRecord], Optional[int]]:
+        return paginate(self._scan(self._doctors(), cursor or 0, doctor_filter(specialty)), page_size)
+
+    def _scan_appointments(self, start: int, status: Optional[str], doctor_id: Optional[str],
+                           patient_id: Optional[str], start_date: Optional[str],
+                           end_date: Optional[str]) -> Iterator[Tuple[int, AppointmentRecord]]:
+        """(row, record) of the matching rows from `start`, filtering on the columns before building records"""
+        if self._codes is None:
+            entries = self.dictionary()
+            self._codes = ({entry[0]: code for code, entry in enumerate(entries["D"])},
+                           {entry[0]: code for code, entry in enumerate(entries["P"])})
+        wanted = []
+        if status is not None:
+            wanted.append((self.column("status"), STATUS_CODES.get(status_name(status))))
+        if doctor_id is not None:
+            wanted.append((self.column("doctor"), self._codes[0].get(doctor_id)))
+        if patient_id is not None:
+            wanted.append((self.column("patient"), self._codes[1].get(patient_id)))
+        if any(code is None for _, code in wanted):
+            return
+        low = date_key(start_date) if start_date is not None else None
+        high = date_key(end_date) if end_date is not None else None
+        date = self.column("date")
+        for row in range(start, self.rows):
+            if all(column[row] == code for column, code in wanted) and \
+                    (low is None or date[row] >= low) and (high is None or date[row] <= high):
+                yield row, self._appointment_at(row)
+
+    def iter_appointments(self, status: Optional[str] = None, doctor_id: Optional[str] = None,
+                          patient_id: Optional[str] = None, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> Iterator[AppointmentRecord]:
+        """Appointments in booking order, optionally filtered, as HospitalSystem.iter_appointments"""
+        scanned = self._scan_appointments(0, status, doctor_id, patient_id, start_date, end_date)
+        return (appointment for _, appointment in scanned)
+
+    def page_appointments(self, cursor: Optional[int] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                          status: Optional[str] = None, doctor_id: Optional[str] = None,
+                          patient_id: Optional[str] = None, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> Tuple[List[AppointmentRecord], Optional[int]]:
+        return paginate(self._scan_appointments(cursor or 0, status, doctor_id, patient_id, start_date, end_date),
+                        page_size)
+
+    def close(self) -> None:
+        """Release the mapping; columns handed out earlier must not be used afterwards"""
+        for view in self._views.values():
+            view.release()
+        self._views.clear()
+        self._map.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
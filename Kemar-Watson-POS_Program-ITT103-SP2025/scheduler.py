@@ -0,0 +1,258 @@
+import heapq
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from calendar_model import date_key, time_key
+
+# Slot of a placed request: (doctor_id, day, minute)
+Placement = Tuple[str, int, int]
+
+# Longest date window of one request, as for waitlist entries
+MAX_WINDOW_DAYS = 31
+# Costs of a placement; a slot outside the preferred times costs more than any shift of day,
+# and every step of priority more than any placement, so higher priorities are placed first
+OFF_PREFERENCE_COST = MAX_WINDOW_DAYS
+PRIORITY_STEP = 2 * MAX_WINDOW_DAYS
+MAX_PRIORITY = 9
+
+INFINITY = float("inf")
+
+
+class SlotRequest:
+    """A patient to be booked with any doctor of a specialty within a date window
+
+    `times` lists preferred (start, end) minute ranges; slots outside them
+    are still used, but only when no preferred slot is left.
+    """
+
+    __slots__ = ("patient_id", "specialty", "start_day", "end_day", "times", "priority")
+
+    def __init__(self, patient_id: str, specialty: str, start_day: int, end_day: int,
+                 times: Sequence[Tuple[int, int]] = (), priority: int = 0):
+        self.patient_id = patient_id
+        self.specialty = specialty.strip().lower()
+        self.start_day = start_day
+        self.end_day = end_day
+        self.times = tuple(sorted(times))
+        self.priority = priority
+
+    @classmethod
+    def parse(cls, patient_id: str, specialty: str, start_date: str, end_date: Optional[str] = None,
+              times: Iterable[str] = (), priority: int = 0) -> "SlotRequest":
+        """From dates and 'HH:MM-HH:MM' preferred time ranges"""
+        ranges = []
+        for text in times:
+            start, end = text.split("-")
+            ranges.append((time_key(start.strip()), time_key(end.strip())))
+        start_day = date_key(start_date)
+        return cls(patient_id, specialty, start_day, date_key(end_date) if end_date else start_day, ranges,
+                   int(priority))
+
+    def check(self) -> Optional[str]:
+        """Return the reason the request is invalid, or None if it is valid"""
+        if not self.specialty:
+            return "Give a specialty"
+        if self.end_day < self.start_day:
+            return "The end date is before the start date"
+        if self.end_day - self.start_day >= MAX_WINDOW_DAYS:
+            return f"The date window may cover at most {MAX_WINDOW_DAYS} days"
+        if not 0 <= self.priority <= MAX_PRIORITY:
+            return f"Priority must be between 0 and {MAX_PRIORITY}"
+        return None
+
+    def prefers(self, minute: int) -> bool:
+        return not self.times or any(start <= minute < end for start, end in self.times)
+
+    def cost(self, day: int, minute: int) -> int:
+        return (day - self.start_day) + (0 if self.prefers(minute) else OFF_PREFERENCE_COST)
+
+    def key(self) -> tuple:
+        """Requests with equal keys are interchangeable to the solver"""
+        return self.specialty, self.start_day, self.end_day, self.times, self.priority
+
+
+class MinCostFlow:
+    """Minimum-cost maximum flow with integer capacities and non-negative costs
+
+    Primal-dual method: Dijkstra with potentials finds the shortest path
+    length, then Dinic's blocking flow pushes as much as possible along
+    every path of that length before the next search. The solver's costs
+    are small integers, so there are few distinct lengths and few rounds.
+    """
+
+    def __init__(self, nodes: int):
+        self.nodes = nodes
+        self.adjacent: List[List[int]] = [[] for _ in range(nodes)]
+        # Edge e and its residual twin e ^ 1
+        self.head: List[int] = []
+        self.capacity: List[int] = []
+        self.cost: List[int] = []
+
+    def add_edge(self, source: int, target: int, capacity: int, cost: int) -> int:
+        edge = len(self.head)
+        self.head += (target, source)
+        self.capacity += (capacity, 0)
+        self.cost += (cost, -cost)
+        self.adjacent[source].append(edge)
+        self.adjacent[target].append(edge + 1)
+        return edge
+
+    def flow(self, edge: int) -> int:
+        return self.capacity[edge ^ 1]
+
+    def solve(self, source: int, sink: int) -> Tuple[int, int]:
+        """Push the maximum flow at minimum cost; returns (flow, cost)"""
+        head, capacity, cost, adjacent = self.head, self.capacity, self.cost, self.adjacent
+        potential = [0] * self.nodes
+        total_flow = total_cost = 0
+        while True:
+            distance = [INFINITY] * self.nodes
+            distance[source] = 0
+            queue = [(0, source)]
+            while queue:
+                d, node = heapq.heappop(queue)
+                if d > distance[node]:
+                    continue
+                base = d + potential[node]
+                for edge in adjacent[node]:
+                    if capacity[edge]:
+                        target = head[edge]
+                        candidate = base + cost[edge] - potential[target]
+                        if candidate < distance[target]:
+                            distance[target] = candidate
+                            heapq.heappush(queue, (candidate, target))
+            if distance[sink] == INFINITY:
+                return total_flow, total_cost
+            for node in range(self.nodes):
+                if distance[node] != INFINITY:
+                    potential[node] += distance[node]
+            pushed = self._blocking_flows(source, sink, potential)
+            total_flow += pushed
+            total_cost += pushed * (potential[sink] - potential[source])
+
+    def _blocking_flows(self, source: int, sink: int, potential: List[int]) -> int:
+        """Max flow over the edges of zero reduced cost (Dinic)"""
+        head, capacity, cost, adjacent = self.head, self.capacity, self.cost, self.adjacent
+        pushed = 0
+        while True:
+            level = [-1] * self.nodes
+            level[source] = 0
+            queue = deque([source])
+            while queue:
+                node = queue.popleft()
+                for edge in adjacent[node]:
+                    target = head[edge]
+                    if (capacity[edge] and level[target] < 0
+                            and cost[edge] + potential[node] - potential[target] == 0):
+                        level[target] = level[node] + 1
+                        queue.append(target)
+            if level[sink] < 0:
+                return pushed
+            position = [0] * self.nodes
+            while True:
+                amount = self._augment(source, sink, level, position, potential)
+                if not amount:
+                    break
+                pushed += amount
+
+    def _augment(self, source: int, sink: int, level: List[int], position: List[int],
+                 potential: List[int]) -> int:
+        """Push flow along one level-increasing path, found depth first without recursion"""
+        head, capacity, cost, adjacent = self.head, self.capacity, self.cost, self.adjacent
+        path: List[int] = []
+        node = source
+        while True:
+            if node == sink:
+                amount = min(capacity[edge] for edge in path)
+                for edge in path:
+                    capacity[edge] -= amount
+                    capacity[edge ^ 1] += amount
+                return amount
+            edges = adjacent[node]
+            while position[node] < len(edges):
+                edge = edges[position[node]]
+                target = head[edge]
+                if (capacity[edge] and level[target] == level[node] + 1
+                        and cost[edge] + potential[node] - potential[target] == 0):
+                    break
+                position[node] += 1
+            else:
+                # Dead end: never try this node again in this round
+                if not path:
+                    return 0
+                level[node] = -1
+                edge = path.pop()
+                node = head[edge ^ 1]
+                position[node] += 1
+                continue
+            path.append(edge)
+            node = target
+
+
+def assign(requests: Sequence[SlotRequest],
+           free: Dict[str, Dict[Tuple[int, int], List[str]]]) -> List[Optional[Placement]]:
+    """Place as many requests as possible into free slots, then as cheaply as possible
+
+    `free` maps a specialty to the doctors free at each (day, minute).
+    Interchangeable requests are grouped, and so are the doctors of a
+    specialty free at the same moment, so the flow network has one node
+    per request group and one per (specialty, day, minute) rather than
+    one per request and per slot. Returns a placement (or None) per request.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for index, request in enumerate(requests):
+        groups.setdefault(request.key(), []).append(index)
+    moments: Dict[Tuple[str, int, int], int] = {}
+    for specialty, slots in free.items():
+        for (day, minute), doctors in slots.items():
+            if doctors:
+                moments[(specialty, day, minute)] = len(moments)
+
+    # Nodes: source, sink, request groups, then moments
+    source, sink = 0, 1
+    first_moment = 2 + len(groups)
+    network = MinCostFlow(first_moment + len(moments))
+    for (specialty, day, minute), node in moments.items():
+        network.add_edge(first_moment + node, sink, len(free[specialty][(day, minute)]), 0)
+    # Minutes with free doctors per (specialty, day), so group edges skip empty days quickly
+    minutes_on: Dict[Tuple[str, int], List[int]] = {}
+    for specialty, day, minute in moments:
+        minutes_on.setdefault((specialty, day), []).append(minute)
+    group_edges: List[Tuple[List[int], List[Tuple[int, Tuple[str, int, int]]]]] = []
+    for group_node, (key, members) in enumerate(groups.items(), 2):
+        specialty, start_day, end_day, _, priority = key
+        request = requests[members[0]]
+        network.add_edge(source, group_node, len(members), (MAX_PRIORITY - priority) * PRIORITY_STEP)
+        edges = []
+        for day in range(start_day, end_day + 1):
+            for minute in minutes_on.get((specialty, day), ()):
+                moment = (specialty, day, minute)
+                edge = network.add_edge(group_node, first_moment + moments[moment], len(members),
+                                        request.cost(day, minute))
+                edges.append((edge, moment))
+        group_edges.append((members, edges))
+    network.solve(source, sink)
+
+    placements: List[Optional[Placement]] = [None] * len(requests)
+    taken: Dict[Tuple[str, int, int], int] = {}
+    for members, edges in group_edges:
+        waiting = iter(members)
+        for edge, moment in edges:
+            for _ in range(network.flow(edge)):
+                specialty, day, minute = moment
+                used = taken.get(moment, 0)
+                taken[moment] = used + 1
+                placements[next(waiting)] = (free[specialty][(day, minute)][used], day, minute)
+    return placements
+
+
+def free_slots_by_specialty(doctors: Iterable, start_day: int, end_day: int) -> Dict[str, Dict[Tuple[int, int], List[str]]]:
+    """Doctors free at each (day, minute) of a date range, per normalised specialty"""
+    free: Dict[str, Dict[Tuple[int, int], List[str]]] = {}
+    for doctor in doctors:
+        slots = free.setdefault(doctor.specialty.strip().lower(), {})
+        calendar = doctor.calendar
+        for day in range(start_day, end_day + 1):
+            for minute in calendar.free_on(day):
+                slots.setdefault((day, minute), []).append(doctor.doctor_id)
+    return free
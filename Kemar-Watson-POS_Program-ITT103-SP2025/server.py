@@ -0,0 +1,193 @@
+"""Network front end: many clients sharing one HospitalSystem
+
+Protocol: newline-delimited JSON over TCP. Each request line is an object
+
+    {"id": 7, "op": "book_appointment", "args": {"patient_id": "P10000", ...}}
+
+or a JSON array of such objects (a batch), and gets one response line: an
+object (or array of objects, in order) such as
+
+    {"id": 7, "ok": true, "result": "A100000", "message": "Appointment booked successfully! ..."}
+
+The operations are the ones in commands.OPERATIONS. They run one at a
+time on the event loop thread, so a slow one holds up every connection
+while it runs; see HospitalServer for which those are.
+
+Usage: python server.py [--host HOST] [--port PORT] [--data DIR | --memory] [--metrics FILE]
+                        [--archive DIR [--keep-days N]]
+"""
+import argparse
+import asyncio
+import json
+import os
+from typing import List, Optional
+
+from archive import AppointmentArchive, LifecycleJob
+from commands import execute
+from hospital_system import HospitalSystem
+from metrics import FileExporter, Metrics
+from storage import WriteAheadLog
+
+DEFAULT_PORT = 8765
+MAX_LINE = 1 << 20
+MAX_CONNECTIONS = 10000
+
+
+def _encode(response) -> bytes:
+    return json.dumps(response, separators=(",", ":")).encode() + b"\n"
+
+
+class HospitalServer:
+    """asyncio server running requests against one HospitalSystem
+
+    Operations run directly on the event loop thread, so the system needs
+    no locking and every request sees the effects of the ones before it.
+    schedule_batch (the solver) and the hourly close-and-archive run of
+    --archive are O(n) and hold up every connection while they run, so keep
+    scheduling batches small. The storage checkpoint an operation triggers
+    every checkpoint_every log records only copies the records on the loop;
+    the snapshot is pickled and fsynced on the log's worker thread.
+
+    All complete lines that arrive together are handled in one go and
+    answered with a single write. When a client stops reading its
+    responses, the server stops reading its requests until the transport's
+    write buffer drains.
+    """
+
+    def __init__(self, hospital: HospitalSystem, max_connections: int = MAX_CONNECTIONS,
+                 max_line: int = MAX_LINE):
+        self.hospital = hospital
+        self.max_connections = max_connections
+        self.max_line = max_line
+        self.connections = 0
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def handle_line(self, line: bytes) -> bytes:
+        """Response line for one request line"""
+        try:
+            request = json.loads(line)
+        except (ValueError, RecursionError):
+            return _encode({"ok": False, "error": "Invalid JSON"})
+        if isinstance(request, list):
+            return _encode([self._handle(item) for item in request])
+        return _encode(self._handle(request))
+
+    def _handle(self, request) -> dict:
+        self.requests += 1
+        if not isinstance(request, dict) or not isinstance(request.get("op"), str):
+            return {"ok": False, "error": "Request must be an object with an 'op'"}
+        args = request.get("args") or {}
+        if not isinstance(args, dict):
+            response = {"ok": False, "error": "'args' must be an object"}
+        else:
+            response = execute(self.hospital, request["op"], args)
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> int:
+        """Start listening; returns the bound port (useful with port 0)"""
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: _Connection(self), host, port, backlog=4096)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+class _Connection(asyncio.Protocol):
+    def __init__(self, server: HospitalServer):
+        self.server = server
+        self.transport = None
+        self.buffer = b""
+        self.counted = False
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+        if self.server.connections >= self.server.max_connections:
+            transport.write(_encode({"ok": False, "error": "Server busy, try again later"}))
+            transport.close()
+            return
+        self.server.connections += 1
+        self.counted = True
+
+    def connection_lost(self, exc) -> None:
+        if self.counted:
+            self.server.connections -= 1
+            self.counted = False
+
+    def data_received(self, data: bytes) -> None:
+        lines: List[bytes] = (self.buffer + data).split(b"\n")
+        self.buffer = lines.pop()
+        if len(self.buffer) > self.server.max_line:
+            self.transport.write(_encode({"ok": False, "error": "Request line too long"}))
+            self.transport.close()
+            return
+        handle = self.server.handle_line
+        responses = [handle(line) for line in lines if line.strip()]
+        if responses:
+            self.transport.write(b"".join(responses))
+
+    # Flow control: stop reading requests while responses are backing up
+    def pause_writing(self) -> None:
+        self.transport.pause_reading()
+
+    def resume_writing(self) -> None:
+        self.transport.resume_reading()
+
+
+async def run_lifecycle(job: LifecycleJob) -> None:
+    """Close and archive past appointments on the event loop thread, once per job interval"""
+    while True:
+        job.run_once()
+        await asyncio.sleep(job.interval)
+
+
+async def serve(hospital: HospitalSystem, host: str, port: int, lifecycle: Optional[LifecycleJob] = None) -> None:
+    server = HospitalServer(hospital)
+    bound = await server.start(host, port)
+    print(f"Listening on {host}:{bound}", flush=True)
+    if lifecycle is not None:
+        asyncio.get_running_loop().create_task(run_lifecycle(lifecycle))
+    await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the hospital system over a JSON line protocol")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "hospital_data"),
+                        help="directory of the write-ahead log and snapshots")
+    parser.add_argument("--memory", action="store_true", help="keep everything in memory, nothing is saved")
+    parser.add_argument("--metrics", metavar="FILE", help="write a metrics snapshot to FILE every few seconds")
+    parser.add_argument("--sample-rate", type=float, default=0.01, help="share of events kept (default 0.01)")
+    parser.add_argument("--archive", metavar="DIR", help="close past appointments and archive old ones to DIR hourly")
+    parser.add_argument("--keep-days", type=int, default=30, help="days of past appointments kept in memory")
+    options = parser.parse_args()
+
+    metrics = Metrics(sample_rate=options.sample_rate) if options.metrics else None
+    exporter = FileExporter(metrics, options.metrics, interval=5.0).start() if metrics else None
+    hospital = HospitalSystem(None if options.memory else WriteAheadLog(options.data), metrics=metrics, echo=None)
+    lifecycle = None
+    if options.archive:
+        hospital.attach_archive(AppointmentArchive(options.archive))
+        lifecycle = LifecycleJob(hospital, hospital.archive, keep_days=options.keep_days)
+    try:
+        asyncio.run(serve(hospital, options.host, options.port, lifecycle))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        hospital.close()
+        if exporter is not None:
+            exporter.stop()
+
+
+if __name__ == "__main__":
+    main()
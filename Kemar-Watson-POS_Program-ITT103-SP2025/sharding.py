@@ -0,0 +1,296 @@
+"""HospitalSystem split across worker processes
+
+Doctors are partitioned across shards, by doctor ID or by specialty, and
+each doctor's appointments and bills live on the doctor's shard. Patients
+are small and needed by every booking, so they are replicated to all
+shards. The coordinator routes each operation of commands.OPERATIONS to
+the shard that owns its doctor or appointment; a patient's history and
+other cross-shard queries go to every shard in parallel and the results
+are merged.
+
+IDs stay unique across processes because the coordinator and every
+worker allocate from blocks of one shared FileBlockStore.
+"""
+import heapq
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from commands import execute
+from hospital_system import HospitalSystem
+from id_allocator import BlockAllocator, FileBlockStore, set_allocator
+from storage import WriteAheadLog
+
+Request = Tuple[str, Dict]
+Response = Dict
+
+# Record kinds a shard can be asked about ("owns"), for IDs the coordinator has not routed yet
+_OWNED = {"doctor": lambda hospital: hospital.doctors,
+          "appointment": lambda hospital: hospital.appointments,
+          "waitlist": lambda hospital: hospital.waitlist.entries}
+
+
+def _worker(connection, store_path: str, directory: Optional[str]) -> None:
+    """Shard process: run each batch of requests received and send back the responses"""
+    set_allocator(BlockAllocator(FileBlockStore(store_path)))
+    hospital = HospitalSystem(storage=WriteAheadLog(directory) if directory else None, echo=None)
+    try:
+        while True:
+            requests = connection.recv()
+            if requests is None:
+                break
+            responses = []
+            for name, args in requests:
+                if name == "owns":
+                    records = _OWNED[args["kind"]](hospital)
+                    responses.append({"ok": True, "result": args["record_id"] in records})
+                else:
+                    responses.append(execute(hospital, name, args))
+            connection.send(responses)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        hospital.close()
+        connection.close()
+
+
+def shard_key(value: str, shards: int) -> int:
+    """Stable shard number for a string, the same in every process and run"""
+    return zlib.crc32(value.encode()) % shards
+
+
+class _Part:
+    """One request as sent to one or more shards, with how to combine the responses"""
+
+    __slots__ = ("shards", "name", "args", "merge")
+
+    def __init__(self, shards: List[int], name: str, args: Dict, merge: Callable[[List[Response]], Response]):
+        self.shards = shards
+        self.name = name
+        self.args = args
+        self.merge = merge
+
+
+class ShardedHospital:
+    """Coordinator routing commands.OPERATIONS requests to shard processes
+
+    Requests passed together to `execute_many` are sent to their shards in
+    one message per shard, so the shards work on them in parallel; each
+    shard runs its requests in the order given. A request can only be
+    routed by IDs that exist before the call, so e.g. billing an
+    appointment booked in the same batch needs a second call.
+    """
+
+    def __init__(self, workers: int = 4, shard_by: str = "doctor", data_dir: Optional[str] = None,
+                 block_size: int = 1000):
+        if workers < 1:
+            raise ValueError("At least one worker is needed")
+        if shard_by not in ("doctor", "specialty"):
+            raise ValueError("shard_by must be 'doctor' or 'specialty'")
+        self.shard_by = shard_by
+        self._scratch = None
+        if data_dir is None:
+            self._scratch = data_dir = tempfile.mkdtemp(prefix="hospital-shards-")
+            shard_dirs = [None] * workers
+        else:
+            os.makedirs(data_dir, exist_ok=True)
+            shard_dirs = [os.path.join(data_dir, f"shard-{i}") for i in range(workers)]
+        store_path = os.path.join(data_dir, "ids.json")
+        self._allocator = BlockAllocator(FileBlockStore(store_path), block_size)
+        self._connections = []
+        self._processes = []
+        for shard, directory in enumerate(shard_dirs):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker, args=(child, store_path, directory),
+                                              name=f"hospital-shard-{shard}", daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        # Routing learned from responses; IDs missing here are located by asking every shard
+        self.doctor_shard: Dict[str, int] = {}
+        self.appointment_shard: Dict[str, int] = {}
+        self.waitlist_shard: Dict[str, int] = {}
+        self._next_read = 0
+
+    @property
+    def shards(self) -> int:
+        return len(self._connections)
+
+    def __enter__(self) -> "ShardedHospital":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the shard processes after they finish their work and flush their storage"""
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+        for process, connection in zip(self._processes, self._connections):
+            process.join()
+            connection.close()
+        self._connections, self._processes = [], []
+        if self._scratch is not None:
+            shutil.rmtree(self._scratch, ignore_errors=True)
+            self._scratch = None
+
+    def _exchange(self, batches: Dict[int, List[Request]]) -> Dict[int, List[Response]]:
+        """Send each shard its batch, then collect every reply; the shards run concurrently"""
+        for shard, batch in batches.items():
+            self._connections[shard].send(batch)
+        return {shard: self._connections[shard].recv() for shard in batches}
+
+    def _locate(self, kind: str, record_id: str) -> Optional[int]:
+        routes = {"doctor": self.doctor_shard, "appointment": self.appointment_shard,
+                  "waitlist": self.waitlist_shard}[kind]
+        shard = routes.get(record_id)
+        if shard is None:
+            replies = self._exchange({s: [("owns", {"kind": kind, "record_id": record_id})]
+                                      for s in range(self.shards)})
+            shard = next((s for s, (reply,) in replies.items() if reply["result"]), None)
+            if shard is not None:
+                routes[record_id] = shard
+        return shard
+
+    def _any_shard(self) -> int:
+        self._next_read = (self._next_read + 1) % self.shards
+        return self._next_read
+
+    def _plan(self, name: str, args: Dict) -> _Part:
+        """Decide which shards a request goes to and how their responses combine"""
+        every = list(range(self.shards))
+        first = lambda responses: responses[0]
+        if name == "add_patient":
+            args = dict(args, patient_id=args.get("patient_id") or self._allocator.next_id("P"))
+            return _Part(every, name, args, first)
+        if name in ("set_service_price", "set_consultation_fee"):
+            # Every shard prices its own bookings and bills, so each keeps the whole catalog
+            return _Part(every, name, args, first)
+        if name == "schedule_batch":
+            # The solver needs every doctor of a specialty, so the whole batch must sit on one shard
+            shards = {shard_key(str(request.get("specialty", "")).strip().lower(), self.shards)
+                      for request in args.get("requests", ())}
+            if self.shard_by != "specialty" or len(shards) > 1:
+                return _Part([], name, args, lambda responses: {
+                    "ok": False, "error": "schedule_batch needs shard_by='specialty' and one shard's specialties"})
+            return _Part(list(shards) or [0], name, args, first)
+        if name == "bill_confirmed" and not args.get("doctor_id"):
+            return _Part(every, name, args, _merge_count)
+        if name == "add_doctor":
+            doctor_id = args.get("doctor_id") or self._allocator.next_id("D")
+            key = doctor_id if self.shard_by == "doctor" else str(args.get("specialty", "")).strip().lower()
+            shard = shard_key(key, self.shards)
+
+            def learn_doctor(responses):
+                if responses[0]["ok"]:
+                    self.doctor_shard[doctor_id] = shard
+                return responses[0]
+            return _Part([shard], name, dict(args, doctor_id=doctor_id), learn_doctor)
+        if name == "book_appointment":
+            shard = self._locate("doctor", args.get("doctor_id", ""))
+
+            def learn_appointment(responses):
+                if responses[0]["ok"]:
+                    self.appointment_shard[responses[0]["result"]] = shard
+                return responses[0]
+            return _Part([shard if shard is not None else 0], name, args, learn_appointment)
+        if name == "join_waitlist":
+            # A waitlist entry lives with the doctors it may be booked with
+            if args.get("doctor_id"):
+                shard = self._locate("doctor", args["doctor_id"])
+            elif self.shard_by == "specialty":
+                shard = shard_key(str(args.get("specialty", "")).strip().lower(), self.shards)
+            else:
+                return _Part([], name, args, lambda responses: {
+                    "ok": False, "error": "Waiting for any doctor of a specialty needs shard_by='specialty'"})
+            shard = shard if shard is not None else 0
+
+            def learn_entry(responses):
+                if responses[0]["ok"]:
+                    self.waitlist_shard[responses[0]["result"]] = shard
+                return responses[0]
+            return _Part([shard], name, args, learn_entry)
+        if "entry_id" in args:
+            shard = self._locate("waitlist", args["entry_id"])
+            return _Part([shard if shard is not None else 0], name, args, first)
+        if "appointment_id" in args:
+            shard = self._locate("appointment", args["appointment_id"])
+            return _Part([shard if shard is not None else 0], name, args, first)
+        if "doctor_id" in args:
+            shard = self._locate("doctor", args["doctor_id"])
+            return _Part([shard if shard is not None else 0], name, args, first)
+        if name == "get_patient":
+            return _Part(every, name, args, _merge_patient)
+        if name == "appointments_for_patient":
+            return _Part(every, name, args, _merge_history)
+        if name == "find_earliest_slots":
+            if self.shard_by == "specialty":
+                return _Part([shard_key(str(args.get("specialty", "")).strip().lower(), self.shards)],
+                             name, args, first)
+            count = int(args.get("count", 5))
+            return _Part(every, name, args, lambda responses: _merge_slots(responses, count))
+        if name == "list_appointments":
+            return _Part([], name, args, lambda responses: {
+                "ok": False, "error": "list_appointments is not available on a sharded system"})
+        # Patient searches and anything else every shard can answer alike
+        return _Part([self._any_shard()], name, args, first)
+
+    def execute_many(self, requests: List[Request]) -> List[Response]:
+        """Run (operation, args) requests, fanning out to the shards in parallel"""
+        parts = [self._plan(name, args or {}) for name, args in requests]
+        batches: Dict[int, List[Request]] = {}
+        for part in parts:
+            for shard in part.shards:
+                batches.setdefault(shard, []).append((part.name, part.args))
+        replies = self._exchange(batches)
+        positions = dict.fromkeys(replies, 0)
+        responses = []
+        for part in parts:
+            shard_responses = []
+            for shard in part.shards:
+                shard_responses.append(replies[shard][positions[shard]])
+                positions[shard] += 1
+            responses.append(part.merge(shard_responses))
+        return responses
+
+    def execute(self, name: str, args: Optional[Dict] = None) -> Response:
+        """Run one operation, like commands.execute on a single HospitalSystem"""
+        return self.execute_many([(name, args or {})])[0]
+
+    def appointments_for_patient(self, patient_id: str) -> List[Dict]:
+        """A patient's appointments from every shard, ordered by date and time"""
+        return self.execute("appointments_for_patient", {"patient_id": patient_id})["result"]
+
+
+def _merge_patient(responses: List[Response]) -> Response:
+    # Every shard has the patient; each counts only its own appointments
+    merged = dict(responses[0])
+    if merged["ok"]:
+        merged["result"] = dict(merged["result"],
+                                appointments=sum(response["result"]["appointments"] for response in responses))
+    return merged
+
+
+def _merge_count(responses: List[Response]) -> Response:
+    failed = next((response for response in responses if not response["ok"]), None)
+    if failed is not None:
+        return failed
+    return {"ok": True, "result": sum(response["result"] for response in responses)}
+
+
+def _merge_history(responses: List[Response]) -> Response:
+    rows = [row for response in responses for row in response["result"] or ()]
+    rows.sort(key=lambda row: (row["date"], row["time"], row["appointment_id"]))
+    return {"ok": True, "result": rows}
+
+
+def _merge_slots(responses: List[Response], count: int) -> Response:
+    slots = heapq.merge(*(response["result"] or () for response in responses))
+    return {"ok": True, "result": [slot for slot, _ in zip(slots, range(count))]}
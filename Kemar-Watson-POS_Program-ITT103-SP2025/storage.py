@@ -0,0 +1,390 @@
+import datetime
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from patient import Patient
+from doctor import Doctor
+from appointment import Appointment
+from bill import Bill
+from waitlist import WaitlistEntry
+from id_allocator import get_allocator, split_id
+from calendar_model import DEFAULT_TEMPLATE, WeeklyTemplate, date_key
+
+# Log record tags
+ADD_PATIENT = "P"
+ADD_DOCTOR = "D"
+BOOK_APPOINTMENT = "A"
+CANCEL_APPOINTMENT = "C"
+CONFIRM_APPOINTMENT = "F"
+GENERATE_BILL = "B"
+ADD_SERVICE = "S"
+SET_TEMPLATE = "T"
+SET_DAY_SLOTS = "Y"
+ADD_LEAVE = "L"
+ADD_HOLIDAY = "H"
+JOIN_WAITLIST = "W"
+LEAVE_WAITLIST = "X"
+SET_STATUS = "U"
+ARCHIVE_APPOINTMENTS = "R"
+SET_PRICE = "K"
+GENERATE_BILLS = "G"
+BOOK_APPOINTMENTS = "M"
+
+SNAPSHOT_FILE = "snapshot.pickle"
+LOG_PREFIX = "wal."
+LOG_SUFFIX = ".log"
+
+
+class WriteAheadLog:
+    """Append-only log of HospitalSystem mutations with compacted snapshots
+
+    Records are buffered and written by a background thread that fsyncs a
+    whole batch at once (group commit). With sync="commit" each append waits
+    until its batch is on disk; with sync="batch" appends return immediately
+    and at most `flush_interval` seconds of writes can be lost in a crash.
+    Snapshots are pickled and fsynced on a worker thread of their own.
+    """
+
+    def __init__(self, directory: str, sync: str = "batch", flush_interval: float = 0.01,
+                 checkpoint_every: Optional[int] = 100000):
+        if sync not in ("batch", "commit"):
+            raise ValueError("sync must be 'batch' or 'commit'")
+        self.directory = directory
+        self.sync = sync
+        self.flush_interval = flush_interval
+        self.checkpoint_every = checkpoint_every
+        os.makedirs(directory, exist_ok=True)
+
+        generations = self._log_generations()
+        self.generation = generations[-1] if generations else 0
+        self._file = open(self._log_path(self.generation), "a", encoding="utf-8")
+
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._appended = 0
+        self._durable = 0
+        self._since_checkpoint = 0
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+        self._flusher.start()
+        # One worker, so snapshots are written in the order they were captured
+        self._snapshots = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wal-snapshot")
+        self._snapshot: Optional[Future] = None
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"{LOG_PREFIX}{generation:08d}{LOG_SUFFIX}")
+
+    def _log_generations(self) -> List[int]:
+        generations = []
+        for name in os.listdir(self.directory):
+            if name.startswith(LOG_PREFIX) and name.endswith(LOG_SUFFIX):
+                generations.append(int(name[len(LOG_PREFIX):-len(LOG_SUFFIX)]))
+        return sorted(generations)
+
+    def append(self, record: list) -> bool:
+        """Append a record; returns True when a checkpoint is due"""
+        line = json.dumps(record, separators=(",", ":"))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-ahead log is closed")
+            self._buffer.append(line)
+            self._appended += 1
+            self._since_checkpoint += 1
+            sequence = self._appended
+            self._cond.notify_all()
+            if self.sync == "commit":
+                while self._durable < sequence:
+                    self._cond.wait()
+        return bool(self.checkpoint_every) and self._since_checkpoint >= self.checkpoint_every
+
+    def _write_batch(self) -> None:
+        """Write and fsync everything buffered so far (caller holds _io_lock)"""
+        with self._cond:
+            lines, self._buffer = self._buffer, []
+            sequence = self._appended
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        with self._cond:
+            self._durable = max(self._durable, sequence)
+            self._cond.notify_all()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if not self._buffer and self._closed:
+                    return
+            with self._io_lock:
+                self._write_batch()
+            if self.sync == "batch" and self.flush_interval:
+                # Let the next group of records accumulate before the next fsync
+                time.sleep(self.flush_interval)
+
+    def flush(self) -> None:
+        """Block until every record appended so far is durable"""
+        with self._io_lock:
+            self._write_batch()
+
+    def checkpoint(self, hospital, wait: bool = True) -> None:
+        """Write a compacted snapshot of `hospital` and drop the logs it covers
+
+        Only capturing the state needs `hospital` to hold still. With
+        wait=False this returns once it is captured and the snapshot is
+        written in the background; close() waits for it.
+        """
+        with self._io_lock:
+            self._write_batch()
+            self._file.close()
+            self.generation += 1
+            self._file = open(self._log_path(self.generation), "a", encoding="utf-8")
+            with self._cond:
+                self._since_checkpoint = 0
+            state = capture_state(hospital)
+            generation = self.generation
+
+        self._snapshot = self._snapshots.submit(self._write_snapshot, generation, state)
+        if wait:
+            self._snapshot.result()
+
+    def _write_snapshot(self, generation: int, state: dict) -> None:
+        # The logs before `generation` are only removed once the snapshot replacing them is on disk
+        temp_path = os.path.join(self.directory, SNAPSHOT_FILE + ".tmp")
+        with open(temp_path, "wb") as handle:
+            pickle.dump((generation, state), handle, protocol=pickle.HIGHEST_PROTOCOL)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, os.path.join(self.directory, SNAPSHOT_FILE))
+
+        for old in self._log_generations():
+            if old < generation:
+                os.remove(self._log_path(old))
+
+    def load(self, hospital) -> int:
+        """Restore `hospital` from the snapshot and replay the logs after it
+
+        Returns the number of log records replayed.
+        """
+        snapshot_generation = 0
+        snapshot_path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "rb") as handle:
+                snapshot_generation, state = pickle.load(handle)
+            restore_state(hospital, state)
+
+        replayed = 0
+        for generation in self._log_generations():
+            if generation < snapshot_generation:
+                continue
+            path = self._log_path(generation)
+            valid = 0
+            with open(path, "rb") as handle:
+                for line in handle:
+                    if not line.endswith(b"\n"):
+                        break  # torn write at the end of the log
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    apply_record(hospital, record)
+                    replayed += 1
+                    valid += len(line)
+            if generation == self.generation and valid < os.path.getsize(path):
+                # Cut the torn line off, or the next records would be appended onto it
+                with self._io_lock:
+                    self._file.flush()
+                    os.truncate(path, valid)
+        _observe_ids(hospital)
+        return replayed
+
+    def close(self) -> None:
+        """Flush outstanding records, finish the last snapshot and stop the worker threads"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._flusher.join()
+        with self._io_lock:
+            self._write_batch()
+            self._file.close()
+        self._snapshots.shutdown(wait=True)
+        if self._snapshot is not None:
+            # Raises if the last snapshot could not be written; the logs it would have replaced are kept
+            self._snapshot.result()
+
+
+def capture_state(hospital) -> dict:
+    """Compact, picklable image of the hospital's records"""
+    # list() copies in one step, so registrations on other threads cannot
+    # change the dicts while they are being walked
+    return {
+        "patients": [(p.patient_id, p.name, p.age, p.gender) for p in list(hospital.patients.values())],
+        "doctors": [(d.doctor_id, d.name, d.age, d.gender, d.specialty)
+                    for d in list(hospital.doctors.values())],
+        "calendars": [(d.doctor_id,
+                       None if d.calendar.template is DEFAULT_TEMPLATE else d.calendar.template.to_dict(),
+                       sorted(d.calendar.leave), dict(d.calendar.overrides))
+                      for d in list(hospital.doctors.values())
+                      if d.calendar.template is not DEFAULT_TEMPLATE or d.calendar.leave or d.calendar.overrides],
+        "holidays": sorted(hospital.holidays),
+        "appointments": [(a.appointment_id, a.patient.patient_id, a.doctor.doctor_id, a.date_key, a.time_key,
+                          a.status, a.consultation_cents)
+                         for a in hospital.appointments.values()],
+        "archived_history": list(_archived_history(hospital)),
+        "bill_cents": [(appointment_id, b.consultation_cents, list(b.service_cents.items()), b.issued_at.isoformat())
+                       for appointment_id, b in hospital.bills.items()],
+        "waitlist": [entry.to_record() for entry in list(hospital.waitlist.entries.values())],
+        "catalog": list(hospital.catalog.records()),
+        "ledger_archived": [(doctor_id, day, cents) for (doctor_id, day), cents in hospital.ledger.archived.items()],
+    }
+
+
+def _archived_history(hospital):
+    """(patient_id, entries) of the history entries whose appointments were archived"""
+    appointments = hospital.appointments
+    for patient in list(hospital.patients.values()):
+        history = patient.history
+        if history.count == 0:
+            continue
+        entries = [list(entry) for entry in history.entries() if entry[2] not in appointments]
+        if entries:
+            yield patient.patient_id, entries
+
+
+def restore_state(hospital, state: dict) -> None:
+    """Rebuild records from a snapshot image"""
+    for patient_id, name, age, gender in state["patients"]:
+        hospital._register_patient(Patient(name, age, gender, patient_id))
+    for doctor_id, name, age, gender, specialty in state["doctors"]:
+        hospital._register_doctor(Doctor(name, age, gender, specialty, doctor_id))
+    patients = hospital.patients
+    doctors = hospital.doctors
+    for record in state.get("catalog", ()):
+        hospital.catalog.apply(record)
+    hospital.holidays.update(state.get("holidays", ()))
+    for doctor_id, template, leave, overrides in state.get("calendars", ()):
+        calendar = doctors[doctor_id].calendar
+        if template is not None:
+            calendar.template = WeeklyTemplate(template)
+        calendar.leave.update(leave)
+        calendar.overrides.update(overrides)
+    for appointment_id, patient_id, doctor_id, date, time_, status, consultation_cents in state["appointments"]:
+        appointment = Appointment(patients[patient_id], doctors[doctor_id], date, time_, appointment_id,
+                                  consultation_cents)
+        appointment.status = sys.intern(status)
+        hospital._register_appointment(appointment)
+    # History entries of archived appointments, which are no longer among the appointments above
+    for patient_id, entries in state.get("archived_history", ()):
+        history = patients[patient_id].history
+        for day, minute, appointment_id in entries:
+            history.add(appointment_id, day, minute)
+    for appointment_id, consultation_cents, services, issued in state["bill_cents"]:
+        bill = Bill(hospital.appointments[appointment_id], datetime.datetime.fromisoformat(issued))
+        bill.consultation_cents = consultation_cents
+        bill.service_cents = dict(services)
+        hospital._register_bill(bill)
+    for doctor_id, day, cents in state.get("ledger_archived", ()):
+        hospital.ledger.add_archived(doctor_id, day, cents)
+    for record in state.get("waitlist", ()):
+        hospital.waitlist.add(WaitlistEntry.from_record(record))
+
+
+def apply_record(hospital, record: list) -> None:
+    """Re-apply one logged mutation"""
+    tag = record[0]
+    if tag == ADD_PATIENT:
+        _, patient_id, name, age, gender = record
+        hospital._register_patient(Patient(name, age, gender, patient_id))
+    elif tag == ADD_DOCTOR:
+        _, doctor_id, name, age, gender, specialty = record
+        hospital._register_doctor(Doctor(name, age, gender, specialty, doctor_id))
+    elif tag == BOOK_APPOINTMENT:
+        _, appointment_id, patient_id, doctor_id, date, time_, consultation_cents = record
+        appointment = Appointment(hospital.patients[patient_id], hospital.doctors[doctor_id], date, time_,
+                                  appointment_id, consultation_cents)
+        hospital._register_appointment(appointment)
+    elif tag == BOOK_APPOINTMENTS:
+        for appointment_id, patient_id, doctor_id, date, time_, fee in record[1]:
+            appointment = Appointment(hospital.patients[patient_id], hospital.doctors[doctor_id],
+                                      date, time_, appointment_id, fee)
+            hospital._register_appointment(appointment)
+    elif tag == CANCEL_APPOINTMENT:
+        appointment = hospital.appointments[record[1]]
+        if appointment.cancel():
+            hospital._release_appointment(appointment)
+    elif tag == CONFIRM_APPOINTMENT:
+        appointment = hospital.appointments[record[1]]
+        if appointment.confirm():
+            hospital._status_changed(appointment)
+    elif tag == GENERATE_BILL:
+        _, appointment_id, issued = record
+        hospital._register_bill(Bill(hospital.appointments[appointment_id], datetime.datetime.fromisoformat(issued)))
+    elif tag == GENERATE_BILLS:
+        _, issued, appointment_ids = record
+        issued_at = datetime.datetime.fromisoformat(issued)
+        for appointment_id in appointment_ids:
+            hospital._register_bill(Bill(hospital.appointments[appointment_id], issued_at))
+    elif tag == SET_PRICE:
+        hospital.catalog.apply(record[1:])
+    elif tag == ADD_SERVICE:
+        _, appointment_id, service_name, fee = record
+        bill = hospital.bills[appointment_id]
+        if bill.add_service(service_name, fee):
+            hospital._bill_changed(bill)
+    elif tag == SET_TEMPLATE:
+        _, doctor_id, days = record
+        template = WeeklyTemplate({int(weekday): slots for weekday, slots in days.items()})
+        hospital.doctors[doctor_id].calendar.set_template(template)
+    elif tag == SET_DAY_SLOTS:
+        _, doctor_id, date, minutes = record
+        hospital.doctors[doctor_id].calendar.set_day(date_key(date), minutes)
+    elif tag == ADD_LEAVE:
+        _, doctor_id, start, end = record
+        hospital.doctors[doctor_id].calendar.add_leave(range(date_key(start), date_key(end) + 1))
+    elif tag == ADD_HOLIDAY:
+        hospital.holidays.add(date_key(record[1]))
+    elif tag == SET_STATUS:
+        _, appointment_id, status = record
+        appointment = hospital.appointments[appointment_id]
+        appointment.status = sys.intern(status)
+        hospital._status_changed(appointment)
+    elif tag == ARCHIVE_APPOINTMENTS:
+        # Some may already be gone if a snapshot was taken after the archive run
+        for appointment_id in record[1]:
+            hospital._unregister_appointment(appointment_id)
+    elif tag == JOIN_WAITLIST:
+        hospital.waitlist.add(WaitlistEntry.from_record(record[1:]))
+    elif tag == LEAVE_WAITLIST:
+        hospital.waitlist.remove(record[1])
+    else:
+        raise ValueError(f"Unknown log record: {record!r}")
+
+
+def _observe_ids(hospital) -> None:
+    """Advance the ID allocator past every restored ID
+
+    Patient histories also hold the IDs of archived appointments, which
+    must not be handed out again either.
+    """
+    allocator = get_allocator()
+    history_ids = (appointment_id for patient in hospital.patients.values()
+                   for appointment_id in patient.history.ids(include_archived=False))
+    for collection in (hospital.patients, hospital.doctors, hospital.appointments, hospital.waitlist.entries,
+                       history_ids):
+        highest = {}
+        for record_id in collection:
+            prefix, number = split_id(record_id)
+            if number > highest.get(prefix, (-1, None))[0]:
+                highest[prefix] = (number, record_id)
+        for _, record_id in highest.values():
+            allocator.observe(record_id)
@@ -0,0 +1,136 @@
+"""Bulk import and export of patients, doctors and appointments
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import id_allocator
+from bulk_io import (CSV, JSONL, export_appointments, export_doctors, export_patients, import_appointments,
+                     import_doctors, import_patients)
+from columnar import STATUSES
+from hospital_system import HospitalSystem
+from id_allocator import SequenceAllocator
+from storage import WriteAheadLog
+
+
+class ImportTests(unittest.TestCase):
+
+    def setUp(self):
+        id_allocator._allocator = SequenceAllocator()
+        self.hospital = HospitalSystem(echo=None)
+
+    def test_malformed_ids_reject_their_row_only(self):
+        source = io.StringIO("patient_id,name,age,gender\n"
+                             "P20000,John Smith,35,male\n"
+                             "ABC,No Digits,40,female\n"
+                             "D1234,Wrong Prefix,50,male\n"
+                             "P12X,Bad Number,22,other\n"
+                             ",Jane Doe,29,female\n")
+        report = import_patients(self.hospital, source, CSV)
+        self.assertEqual(report.imported, 2)
+        self.assertEqual([number for number, _ in report.rejects], [2, 3, 4])
+        self.assertIn("ABC", report.rejects[0][1])
+        self.assertEqual(sorted(self.hospital.patients), ["P20000", "P20001"])
+
+    def test_explicit_ids_are_never_handed_out_or_overwritten(self):
+        existing = self.hospital.add_patient("John Smith", 35, "male")
+        source = io.StringIO("patient_id,name,age,gender\n"
+                             ",Jane Doe,29,female\n"
+                             "P10001,Legacy Record,60,male\n"
+                             f"{existing},Overwrite Attempt,44,female\n")
+        report = import_patients(self.hospital, source, CSV)
+        self.assertEqual(report.imported, 2)
+        self.assertEqual(report.rejects, [(3, f"Duplicate ID {existing}")])
+        self.assertEqual(self.hospital.patients["P10001"].name, "Legacy Record")
+        self.assertEqual(self.hospital.patients[existing].name, "John Smith")
+        self.assertEqual(len(self.hospital.patients), 3)
+
+
+class RoundTripTests(unittest.TestCase):
+
+    def setUp(self):
+        id_allocator._allocator = SequenceAllocator()
+        self.data = tempfile.mkdtemp(prefix="bulk-data-")
+
+    def tearDown(self):
+        shutil.rmtree(self.data, ignore_errors=True)
+
+    @staticmethod
+    def source() -> HospitalSystem:
+        """A system holding an appointment in every status"""
+        hospital = HospitalSystem(echo=None)
+        patient_id = hospital.add_patient("John Smith", 35, "male")
+        doctor_id = hospital.add_doctor("Dr. Sarah Wilson", 40, "female", "Cardiology")
+        booked = [hospital.book_appointment(patient_id, doctor_id, "2025-03-03", time)
+                  for time in ("09:00", "10:00", "11:00", "14:00")]
+        later = hospital.book_appointment(patient_id, doctor_id, "2025-03-10", "09:00")
+        hospital.confirm_appointment(booked[0])
+        hospital.cancel_appointment(booked[1])
+        hospital.confirm_appointment(booked[2])
+        # booked[2] was confirmed and becomes Completed, booked[3] becomes No-Show
+        hospital.close_past_appointments("2025-03-04")
+        hospital.confirm_appointment(later)
+        hospital.book_appointment(patient_id, doctor_id, "2025-03-10", "10:00")
+        return hospital
+
+    def round_trip(self, fmt: str) -> None:
+        source = self.source()
+        statuses = {a.appointment_id: a.status for a in source.appointments.values()}
+        self.assertEqual(sorted(set(statuses.values())), sorted(STATUSES))
+        files = {}
+        for name, export in (("patients", export_patients), ("doctors", export_doctors),
+                             ("appointments", export_appointments)):
+            files[name] = io.StringIO()
+            export(source, files[name], fmt)
+            files[name].seek(0)
+
+        target = HospitalSystem(WriteAheadLog(self.data, checkpoint_every=None), echo=None)
+        import_patients(target, files["patients"], fmt)
+        import_doctors(target, files["doctors"], fmt)
+        report = import_appointments(target, files["appointments"], fmt)
+        self.assertEqual((report.imported, report.rejected), (len(statuses), 0), report.rejects)
+        self.assertEqual({a.appointment_id: a.status for a in target.appointments.values()}, statuses)
+        target.close()
+
+        restored = HospitalSystem(WriteAheadLog(self.data), echo=None)
+        try:
+            self.assertEqual({a.appointment_id: a.status for a in restored.appointments.values()}, statuses)
+        finally:
+            restored.close()
+
+    def test_every_status_survives_csv(self):
+        self.round_trip(CSV)
+
+    def test_every_status_survives_jsonl(self):
+        self.round_trip(JSONL)
+
+    def test_status_case_is_not_changed(self):
+        hospital = self.source()
+        patient_id, doctor_id = next(iter(hospital.patients)), next(iter(hospital.doctors))
+        source = io.StringIO("patient_id,doctor_id,date,time,status\n"
+                             f"{patient_id},{doctor_id},2025-03-11,09:00,No-Show\n"
+                             f"{patient_id},{doctor_id},2025-03-11,10:00,no-show\n")
+        report = import_appointments(hospital, source, CSV)
+        self.assertEqual(report.imported, 1)
+        self.assertEqual(report.rejects, [(2, "Unknown status: no-show")])
+
+    def test_closed_statuses_can_be_listed_in_any_case(self):
+        hospital = self.source()
+        for status in STATUSES:
+            expected = sorted(a.appointment_id for a in hospital.appointments.values() if a.status == status)
+            for spelling in (status, status.lower(), status.upper()):
+                self.assertEqual(sorted(a.appointment_id for a in hospital.appointments_by_status(spelling)),
+                                 expected, spelling)
+                rows, _ = hospital.page_appointments(page_size=20, status=spelling)
+                self.assertEqual(sorted(a.appointment_id for a in rows), expected, spelling)
+
+
+if __name__ == "__main__":
+    unittest.main()
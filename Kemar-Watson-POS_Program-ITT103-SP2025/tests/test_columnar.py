@@ -0,0 +1,40 @@
+"""Analytics reports over the columnar appointment store
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from columnar import numpy
+from hospital_system import HospitalSystem
+
+
+class RevenueTests(unittest.TestCase):
+
+    def revenue(self, use_numpy: bool):
+        hospital = HospitalSystem(echo=None)
+        patient_id = hospital.add_patient("John Smith", 35, "male")
+        doctor_id = hospital.add_doctor("Dr. Sarah Wilson", 40, "female", "Cardiology")
+        hospital.set_consultation_fee("Cardiology", 49.99, "2025-01-01")
+        for time in ("09:00", "10:00", "11:00"):
+            hospital.book_appointment(patient_id, doctor_id, "2025-03-03", time)
+        hospital.book_appointment(patient_id, doctor_id, "2025-04-01", "09:00")
+        hospital.cancel_appointment(hospital.book_appointment(patient_id, doctor_id, "2025-04-01", "10:00"))
+        hospital.appointment_columns(use_numpy=use_numpy)
+        return doctor_id, hospital.revenue_by_doctor_month("2025-03-01", "2025-04-30")
+
+    def test_revenue_is_in_cents(self):
+        doctor_id, revenue = self.revenue(use_numpy=False)
+        self.assertEqual(revenue, {doctor_id: {"2025-03": 14997, "2025-04": 4999}})
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy_matches_the_fallback(self):
+        doctor_id, revenue = self.revenue(use_numpy=True)
+        self.assertEqual(revenue, {doctor_id: {"2025-03": 14997, "2025-04": 4999}})
+
+
+if __name__ == "__main__":
+    unittest.main()
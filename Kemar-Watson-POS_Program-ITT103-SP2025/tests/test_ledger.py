@@ -0,0 +1,223 @@
+"""Randomised checks that the revenue ledger always equals a full recomputation
+
+Each test drives a seeded random sequence of bill changes (new bills,
+added and re-added services, regenerated bills, cancellations, archive
+runs) and after every step compares the ledger's running totals with
+sums recomputed in integer cents from a model kept by the test itself.
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calendar_model import DEFAULT_TIMES, date_key, format_date
+from hospital_system import HospitalSystem
+from ledger import Ledger, to_cents
+from storage import WriteAheadLog
+from archive import AppointmentArchive
+
+SEEDS = range(8)
+STEPS = 250
+SERVICES = ["X-Ray", "Lab Work", "Medication", "Ultrasound", "Dressing"]
+FIRST_DAY = date_key("2025-01-06")
+DAYS = 90
+
+
+def random_amount(rng: random.Random) -> Decimal:
+    """A dollar amount with at most two decimals, e.g. Decimal('1234.05')"""
+    return Decimal(rng.randint(1, 2_000_000)) / 100
+
+
+class Model:
+    """What every bill should total, in cents, kept apart from the system under test"""
+
+    def __init__(self):
+        # appointment_id -> [doctor_id, day, consultation cents, {service: cents}]
+        self.live = {}
+        # appointment_id -> (doctor_id, day, total cents) when it was archived
+        self.archived = {}
+
+    @staticmethod
+    def total(entry) -> int:
+        return entry[2] + sum(entry[3].values())
+
+    def entries(self):
+        for doctor_id, day, consultation, services in self.live.values():
+            yield doctor_id, day, consultation + sum(services.values())
+        yield from self.archived.values()
+
+    def day_total(self, day: int) -> int:
+        return sum(cents for _, entry_day, cents in self.entries() if entry_day == day)
+
+    def doctor_total(self, doctor_id: str) -> int:
+        return sum(cents for entry_doctor, _, cents in self.entries() if entry_doctor == doctor_id)
+
+    def total_between(self, start: int, end: int, doctor_id=None) -> int:
+        return sum(cents for entry_doctor, day, cents in self.entries()
+                   if start <= day <= end and doctor_id in (None, entry_doctor))
+
+
+class RandomBills:
+    """A hospital with booked appointments and a seeded stream of bill changes"""
+
+    def __init__(self, seed: int, storage=None):
+        self.rng = random.Random(seed)
+        self.hospital = HospitalSystem(storage, echo=None)
+        self.model = Model()
+        self.archive_dir = tempfile.mkdtemp(prefix="ledger-archive-")
+        self.cutoff = FIRST_DAY
+        rng, hospital = self.rng, self.hospital
+        self.doctor_ids = [hospital.add_doctor(f"Doctor {i}", 40, "other", "General") for i in range(4)]
+        patient_ids = [hospital.add_patient(f"Patient {i}", 30, "other") for i in range(20)]
+        for _ in range(300):
+            day = FIRST_DAY + rng.randrange(DAYS)
+            hospital.book_appointment(rng.choice(patient_ids), rng.choice(self.doctor_ids), format_date(day),
+                                      rng.choice(DEFAULT_TIMES))
+
+    def close(self) -> None:
+        self.hospital.close()
+        shutil.rmtree(self.archive_dir, ignore_errors=True)
+
+    def step(self) -> str:
+        rng, hospital, model = self.rng, self.hospital, self.model
+        choice = rng.random()
+        if choice < 0.3 or not model.live:
+            appointment_id = rng.choice(list(hospital.appointments))
+            if hospital.generate_bill(appointment_id):
+                appointment = hospital.appointments[appointment_id]
+                # Billing again starts a fresh bill, so earlier services are gone
+                model.live[appointment_id] = [appointment.doctor.doctor_id, appointment.date_key,
+                                              appointment.consultation_cents
+                                              if appointment.status != "Cancelled" else 0, {}]
+            return "bill"
+        if choice < 0.8:
+            # Adding a service that is already on the bill replaces its fee
+            appointment_id = rng.choice(list(model.live))
+            service, amount = rng.choice(SERVICES), random_amount(rng)
+            if hospital.add_service_to_bill(appointment_id, service, float(amount)):
+                model.live[appointment_id][3][service] = int(amount * 100)
+            return "amend"
+        if choice < 0.95:
+            # Cancelling keeps an issued bill as it is
+            hospital.cancel_appointment(rng.choice(list(hospital.appointments)))
+            return "cancel"
+        # Archive no later than halfway, so there are always appointments left to bill
+        self.cutoff = min(self.cutoff + rng.randint(1, 10), FIRST_DAY + DAYS // 2)
+        hospital.close_past_appointments(format_date(self.cutoff))
+        hospital.archive_appointments(format_date(self.cutoff), AppointmentArchive(self.archive_dir)
+                                      if hospital.archive is None else None)
+        for appointment_id in [a for a in model.live if a not in hospital.appointments]:
+            entry = model.live.pop(appointment_id)
+            model.archived[appointment_id] = (entry[0], entry[1], Model.total(entry))
+        return "archive"
+
+
+class LedgerTests(unittest.TestCase):
+
+    def assertMatchesModel(self, hospital: HospitalSystem, model: Model, rng: random.Random, context: str) -> None:
+        ledger = hospital.ledger
+        for appointment_id, entry in model.live.items():
+            self.assertEqual(hospital.bills[appointment_id].total_cents, Model.total(entry), context)
+        self.assertEqual(sorted(model.live), sorted(hospital.bills), context)
+        for day in range(FIRST_DAY - 1, FIRST_DAY + DAYS + 1):
+            self.assertEqual(ledger.day_total(day), model.day_total(day), f"{context}, day {day}")
+        for doctor_id in hospital.doctors:
+            self.assertEqual(ledger.doctor_total(doctor_id), model.doctor_total(doctor_id), context)
+        for _ in range(5):
+            start = FIRST_DAY + rng.randrange(-5, DAYS)
+            end = start + rng.randrange(0, 40)
+            doctor_id = rng.choice([None, *hospital.doctors])
+            self.assertEqual(ledger.total_between(start, end, doctor_id),
+                             model.total_between(start, end, doctor_id), f"{context}, {start}-{end} {doctor_id}")
+        for month in range(1, 5):
+            first, last = date_key(f"2025-{month:02d}-01"), date_key(f"2025-{month + 1:02d}-01") - 1
+            self.assertEqual(hospital.revenue_for_month(2025, month), model.total_between(first, last), context)
+        self.assertEqual(hospital.verify_ledger(), [], context)
+
+    def test_running_totals_equal_recomputation(self):
+        for seed in SEEDS:
+            run = RandomBills(seed)
+            check = random.Random(seed + 1000)
+            try:
+                for number in range(STEPS):
+                    action = run.step()
+                    self.assertMatchesModel(run.hospital, run.model, check, f"seed {seed}, step {number} ({action})")
+            finally:
+                run.close()
+
+    def test_totals_survive_checkpoint_and_replay(self):
+        for seed in SEEDS:
+            data = tempfile.mkdtemp(prefix="ledger-data-")
+            run = RandomBills(seed, WriteAheadLog(data, sync="commit", checkpoint_every=None))
+            check = random.Random(seed + 2000)
+            try:
+                for number in range(STEPS):
+                    run.step()
+                    if number == STEPS // 2:
+                        run.hospital.storage.checkpoint(run.hospital)
+                run.hospital.close()
+                restored = HospitalSystem(WriteAheadLog(data), echo=None)
+                try:
+                    self.assertMatchesModel(restored, run.model, check, f"seed {seed}, restored")
+                finally:
+                    restored.close()
+            finally:
+                run.close()
+                shutil.rmtree(data, ignore_errors=True)
+
+    def test_post_remove_and_forget_keep_ledger_consistent(self):
+        """Ledger alone, with removals the system does not exercise"""
+        for seed in SEEDS:
+            rng = random.Random(seed)
+            ledger = Ledger()
+            doctors = [SimpleNamespace(doctor_id=f"D{i}") for i in range(3)]
+            bills = {}
+            forgotten = []
+            for number in range(STEPS):
+                choice = rng.random()
+                if choice < 0.6 or not bills:
+                    appointment_id = f"A{rng.randrange(60)}"
+                    bill = bills.get(appointment_id)
+                    if bill is None:
+                        appointment = SimpleNamespace(appointment_id=appointment_id, doctor=rng.choice(doctors),
+                                                      date_key=FIRST_DAY + rng.randrange(30))
+                        bill = bills[appointment_id] = SimpleNamespace(appointment=appointment, total_cents=0)
+                    bill.total_cents = to_cents(str(random_amount(rng)))
+                    ledger.post(bill)
+                elif choice < 0.8:
+                    ledger.remove(bills.pop(rng.choice(list(bills))).appointment.appointment_id)
+                else:
+                    bill = bills.pop(rng.choice(list(bills)))
+                    ledger.forget(bill.appointment.appointment_id)
+                    forgotten.append(bill)
+                context = f"seed {seed}, step {number}"
+                self.assertEqual(ledger.verify(list(bills.values())), [], context)
+                everything = list(bills.values()) + forgotten
+                for day in range(FIRST_DAY, FIRST_DAY + 30):
+                    self.assertEqual(ledger.day_total(day), sum(b.total_cents for b in everything
+                                                                if b.appointment.date_key == day), context)
+                for doctor in doctors:
+                    self.assertEqual(ledger.doctor_total(doctor.doctor_id),
+                                     sum(b.total_cents for b in everything if b.appointment.doctor is doctor),
+                                     context)
+
+    def test_to_cents_is_exact(self):
+        rng = random.Random(7)
+        for _ in range(10_000):
+            amount = random_amount(rng)
+            cents = int(amount * 100)
+            self.assertEqual(to_cents(float(amount)), cents)
+            self.assertEqual(to_cents(str(amount)), cents)
+            self.assertEqual(to_cents(amount), cents)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""Recovery of the write-ahead log after a crash
+
+Usage: python -m unittest discover tests   (or: python -m pytest tests)
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital_system import HospitalSystem
+from storage import WriteAheadLog
+
+
+class TornLogTests(unittest.TestCase):
+
+    def setUp(self):
+        self.data = tempfile.mkdtemp(prefix="wal-data-")
+
+    def tearDown(self):
+        shutil.rmtree(self.data, ignore_errors=True)
+
+    def open(self) -> HospitalSystem:
+        return HospitalSystem(WriteAheadLog(self.data, sync="commit", checkpoint_every=None), echo=None)
+
+    def log_path(self) -> str:
+        names = sorted(name for name in os.listdir(self.data) if name.endswith(".log"))
+        return os.path.join(self.data, names[-1])
+
+    def test_records_after_a_torn_line_survive_the_next_restart(self):
+        hospital = self.open()
+        first = hospital.add_patient("John Smith", 35, "male")
+        hospital.close()
+        with open(self.log_path(), "a", encoding="utf-8") as handle:
+            handle.write('["add_pat')
+
+        hospital = self.open()
+        self.assertEqual(list(hospital.patients), [first])
+        second = hospital.add_patient("Jane Doe", 29, "female")
+        hospital.close()
+
+        hospital = self.open()
+        try:
+            self.assertEqual(list(hospital.patients), [first, second])
+        finally:
+            hospital.close()
+        with open(self.log_path(), encoding="utf-8") as handle:
+            self.assertNotIn("add_pat", handle.read())
+
+    def test_a_last_line_without_its_newline_is_dropped(self):
+        hospital = self.open()
+        first = hospital.add_patient("John Smith", 35, "male")
+        hospital.close()
+        path = self.log_path()
+        with open(path, "rb") as handle:
+            complete = handle.read()
+        with open(path, "ab") as handle:
+            # A whole record whose trailing newline never reached the disk
+            handle.write(complete.rstrip(b"\n").replace(first.encode(), b"P99999"))
+
+        hospital = self.open()
+        self.assertEqual(list(hospital.patients), [first])
+        second = hospital.add_patient("Jane Doe", 29, "female")
+        hospital.close()
+
+        hospital = self.open()
+        try:
+            self.assertEqual(list(hospital.patients), [first, second])
+        finally:
+            hospital.close()
+
+
+class BackgroundCheckpointTests(unittest.TestCase):
+
+    def setUp(self):
+        self.data = tempfile.mkdtemp(prefix="wal-data-")
+
+    def tearDown(self):
+        shutil.rmtree(self.data, ignore_errors=True)
+
+    def test_records_added_while_the_snapshot_is_written_are_replayed(self):
+        hospital = HospitalSystem(WriteAheadLog(self.data, sync="commit", checkpoint_every=None), echo=None)
+        first = [hospital.add_patient(f"Patient {i}", 30, "other") for i in range(200)]
+        hospital.storage.checkpoint(hospital, wait=False)
+        # Not in the captured state, so they must come back from the new log
+        second = [hospital.add_patient(f"Later {i}", 40, "other") for i in range(50)]
+        hospital.close()
+        logs = [name for name in os.listdir(self.data) if name.endswith(".log")]
+        self.assertEqual(len(logs), 1)
+        self.assertIn("snapshot.pickle", os.listdir(self.data))
+
+        restored = HospitalSystem(WriteAheadLog(self.data), echo=None)
+        try:
+            self.assertEqual(list(restored.patients), first + second)
+        finally:
+            restored.close()
+
+    def test_triggered_checkpoints_do_not_lose_records(self):
+        hospital = HospitalSystem(WriteAheadLog(self.data, checkpoint_every=25), echo=None)
+        added = [hospital.add_patient(f"Patient {i}", 30, "other") for i in range(300)]
+        hospital.close()
+        restored = HospitalSystem(WriteAheadLog(self.data), echo=None)
+        try:
+            self.assertEqual(list(restored.patients), added)
+        finally:
+            restored.close()
+
+
+class ReplayTests(unittest.TestCase):
+
+    def setUp(self):
+        self.data = tempfile.mkdtemp(prefix="wal-data-")
+
+    def tearDown(self):
+        shutil.rmtree(self.data, ignore_errors=True)
+
+    def test_bookings_keep_the_price_they_were_logged_with(self):
+        hospital = HospitalSystem(WriteAheadLog(self.data, checkpoint_every=None), echo=None)
+        patient_id = hospital.add_patient("John Smith", 35, "male")
+        doctor_id = hospital.add_doctor("Dr. Sarah Wilson", 40, "female", "Cardiology")
+        hospital.set_consultation_fee("Cardiology", 49.99, "2025-01-01")
+        logged = hospital.book_appointment(patient_id, doctor_id, "2025-03-03", "09:00")
+        hospital.storage.checkpoint(hospital)
+        replayed = hospital.book_appointment(patient_id, doctor_id, "2025-03-03", "10:00")
+        hospital.set_consultation_fee("Cardiology", 75, "2025-01-01")
+        hospital.close()
+
+        restored = HospitalSystem(WriteAheadLog(self.data), echo=None)
+        try:
+            self.assertEqual(restored.appointments[logged].consultation_cents, 4999)
+            self.assertEqual(restored.appointments[replayed].consultation_cents, 4999)
+        finally:
+            restored.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
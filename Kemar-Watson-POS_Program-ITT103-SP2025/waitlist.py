@@ -0,0 +1,133 @@
+import heapq
+import itertools
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from id_allocator import get_allocator
+
+# Longest date window a waitlist entry may cover; an entry is queued once per day of its window
+MAX_WINDOW_DAYS = 31
+
+WAITING = "Waiting"
+OFFERED = "Offered"
+
+
+class WaitlistEntry:
+    """A patient waiting for a slot with a doctor, or any doctor of a specialty"""
+
+    __slots__ = ("entry_id", "patient_id", "doctor_id", "specialty", "start_day", "end_day",
+                 "priority", "auto_book", "state", "sequence")
+
+    def __init__(self, patient_id: str, start_day: int, end_day: int, doctor_id: Optional[str] = None,
+                 specialty: Optional[str] = None, priority: int = 0, auto_book: bool = True,
+                 entry_id: Optional[str] = None):
+        self.entry_id = entry_id or get_allocator().next_id("W")
+        self.patient_id = patient_id
+        self.doctor_id = doctor_id
+        self.specialty = specialty.strip().lower() if specialty else None
+        self.start_day = start_day
+        self.end_day = end_day
+        self.priority = priority
+        self.auto_book = auto_book
+        self.state = WAITING
+        self.sequence = 0
+
+    def check(self) -> Optional[str]:
+        """Return the reason the entry is invalid, or None if it is valid"""
+        if (self.doctor_id is None) == (self.specialty is None):
+            return "Give either a doctor or a specialty"
+        if self.end_day < self.start_day:
+            return "The end date is before the start date"
+        if self.end_day - self.start_day >= MAX_WINDOW_DAYS:
+            return f"The date window may cover at most {MAX_WINDOW_DAYS} days"
+        return None
+
+    def to_record(self) -> list:
+        return [self.entry_id, self.patient_id, self.doctor_id, self.specialty, self.start_day, self.end_day,
+                self.priority, self.auto_book]
+
+    @classmethod
+    def from_record(cls, record) -> "WaitlistEntry":
+        entry_id, patient_id, doctor_id, specialty, start_day, end_day, priority, auto_book = record
+        return cls(patient_id, start_day, end_day, doctor_id, specialty, priority, auto_book, entry_id)
+
+
+class Waitlist:
+    """Priority queues of waiting patients, one per (doctor or specialty, day)
+
+    An entry is pushed onto the queue of every day in its window. Entries
+    that were booked, offered or withdrawn are left in the other queues and
+    skipped when they reach the top, so matching a freed slot costs
+    O(log n) amortized. Higher priority wins; equal priorities are served
+    in the order they joined.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, WaitlistEntry] = {}
+        # entry_id -> (doctor_id, day, minute) offered to an entry that does not auto-book
+        self.offers: Dict[str, Tuple[str, int, int]] = {}
+        self._queues: Dict[tuple, List[tuple]] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _push(self, entry: WaitlistEntry) -> None:
+        entry.state = WAITING
+        entry.sequence = next(self._sequence)
+        scope = ("doctor", entry.doctor_id) if entry.doctor_id is not None else ("specialty", entry.specialty)
+        item = (-entry.priority, entry.sequence, entry.entry_id)
+        for day in range(entry.start_day, entry.end_day + 1):
+            heapq.heappush(self._queues.setdefault(scope + (day,), []), item)
+
+    def add(self, entry: WaitlistEntry) -> None:
+        with self._lock:
+            self.entries[entry.entry_id] = entry
+            self._push(entry)
+
+    def remove(self, entry_id: str) -> Optional[WaitlistEntry]:
+        """Take an entry off the waitlist; its queue items are dropped lazily"""
+        with self._lock:
+            self.offers.pop(entry_id, None)
+            return self.entries.pop(entry_id, None)
+
+    def requeue(self, entry_id: str) -> bool:
+        """Put an offered entry back in its queues, behind those already waiting"""
+        with self._lock:
+            entry = self.entries.get(entry_id)
+            if entry is None:
+                return False
+            self.offers.pop(entry_id, None)
+            self._push(entry)
+            return True
+
+    def _top(self, key: tuple) -> Optional[tuple]:
+        queue = self._queues.get(key)
+        while queue:
+            item = queue[0]
+            entry = self.entries.get(item[2])
+            if entry is not None and entry.state == WAITING and entry.sequence == item[1]:
+                return item
+            heapq.heappop(queue)
+        if queue is not None:
+            del self._queues[key]
+        return None
+
+    def take_match(self, doctor_id: str, specialty: str, day: int) -> Optional[WaitlistEntry]:
+        """Best waiting entry for a free slot of `doctor_id` on `day`, marked as offered"""
+        with self._lock:
+            best_key, best = None, None
+            for key in (("doctor", doctor_id, day), ("specialty", specialty.strip().lower(), day)):
+                item = self._top(key)
+                if item is not None and (best is None or item < best):
+                    best_key, best = key, item
+            if best is None:
+                return None
+            heapq.heappop(self._queues[best_key])
+            entry = self.entries[best[2]]
+            entry.state = OFFERED
+            return entry
+
+    def waiting_for(self, patient_id: str) -> List[WaitlistEntry]:
+        return [entry for entry in list(self.entries.values()) if entry.patient_id == patient_id]